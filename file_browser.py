@@ -5,6 +5,7 @@ Runs on port 8080 by default.
 """
 
 import os
+import sys
 import mimetypes
 from pathlib import Path
 from flask import (
@@ -17,6 +18,25 @@ app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024 * 1024  # 5GB max upload
 BASE_DIR = os.environ.get('WORKSPACE', '/workspace')
 
+# Directory listings are shared with the SpriteForge GUI (pipeline/gui/services)
+GUI_DIR = os.environ.get('SPRITEFORGE_GUI_DIR') or next(
+    (d for d in (
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipeline', 'gui'),
+        os.path.join(BASE_DIR, 'pipeline', 'gui'),
+        '/opt/pipeline/gui',
+    ) if os.path.isdir(d)),
+    None
+)
+if GUI_DIR:
+    sys.path.insert(0, GUI_DIR)
+
+from services.listing import list_directory, InvalidCursor  # noqa: E402
+from services.archive import archive_response  # noqa: E402
+from services.uploads import (  # noqa: E402
+    init_upload, upload_status, write_chunk, complete_upload, abort_upload,
+    UploadError, UPLOAD_MAX_CHUNK_SIZE,
+)
+
 
 # ---------------------------------------------------------------------
 # HTML TEMPLATE
@@ -112,11 +132,15 @@ HTML_TEMPLATE = '''
     </div>
 
     <div class="toolbar">
-        <form action="{{ url_for('upload', path=current_path) }}" method="post" enctype="multipart/form-data">
+        <form id="upload-form" action="{{ url_for('upload', path=current_path) }}" method="post" enctype="multipart/form-data"
+              data-init="{{ url_for('uploads_init', path=current_path) }}" data-uploads="{{ url_for('uploads_status', upload_id='') }}">
             <input type="file" name="file">
             <button type="submit">Upload</button>
+            <span id="upload-progress"></span>
         </form>
         <a class="btn" href="{{ url_for('edit_file', path=current_path) }}">New File</a>
+        <a class="btn" href="{{ url_for('archive', path=current_path, format='zip') }}">Download ZIP</a>
+        <a class="btn" href="{{ url_for('archive', path=current_path, format='tar') }}">Download TAR</a>
     </div>
 
     <table>
@@ -144,7 +168,87 @@ HTML_TEMPLATE = '''
         </tr>
         {% endfor %}
     </table>
+
+    <div class="toolbar" style="margin-top: 20px;">
+        <span>{{ items|length }} of {{ total }} entries</span>
+        {% if next_cursor %}
+            <a class="btn" href="{{ url_for('browse', path=current_path, cursor=next_cursor) }}">Next page</a>
+        {% endif %}
+    </div>
 </div>
+<script>
+// Chunked, resumable upload (see /_uploads/*); plain multipart post if fetch is missing.
+// Each chunk carries its own SHA-256; no whole-file digest is sent at init, since
+// SubtleCrypto cannot hash a multi-GB file without reading it all into memory.
+(function () {
+    const form = document.getElementById('upload-form');
+    const status = document.getElementById('upload-progress');
+    if (!window.fetch || !window.Blob || !Blob.prototype.slice) return;
+
+    async function sha256(buf) {
+        if (!window.crypto || !crypto.subtle) return null;
+        const d = new Uint8Array(await crypto.subtle.digest('SHA-256', buf));
+        return Array.from(d, b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    // conflictOk: a chunk PUT answers 409 with the server's offset to resume from
+    async function call(url, opts, conflictOk) {
+        const res = await fetch(url, opts);
+        const body = await res.json();
+        if (!res.ok && !(conflictOk && res.status === 409)) throw new Error(body.message || res.status);
+        return body;
+    }
+
+    async function send(file) {
+        const key = 'upload:' + form.dataset.init + ':' + file.name + ':' + file.size + ':' + file.lastModified;
+        let state = null;
+        if (localStorage.getItem(key)) {
+            const res = await fetch(form.dataset.uploads + localStorage.getItem(key));
+            if (res.ok) state = await res.json();
+        }
+        if (!state) {
+            state = await call(form.dataset.init, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({filename: file.name, size: file.size})
+            });
+            localStorage.setItem(key, state.upload_id);
+        }
+
+        const base = form.dataset.uploads + state.upload_id;
+        let offset = state.offset, failures = 0;
+        while (offset < file.size) {
+            status.textContent = Math.floor(100 * offset / file.size) + '%';
+            const chunk = await file.slice(offset, offset + state.chunk_size).arrayBuffer();
+            const sum = await sha256(chunk);
+            try {
+                offset = (await call(base + '?offset=' + offset, {
+                    method: 'PUT', headers: sum ? {'X-Chunk-SHA256': sum} : {}, body: chunk
+                }, true)).offset;
+                failures = 0;
+            } catch (err) {
+                if (++failures > 5) throw err;
+                await new Promise(r => setTimeout(r, 1000 * 2 ** failures));
+            }
+        }
+        status.textContent = 'verifying...';
+        await call(base + '/complete', {method: 'POST'});
+        localStorage.removeItem(key);
+    }
+
+    form.addEventListener('submit', async function (e) {
+        const file = form.file.files[0];
+        e.preventDefault();
+        if (!file) return;
+        try {
+            await send(file);
+            location.reload();
+        } catch (err) {
+            status.textContent = 'Upload failed: ' + err.message + ' (upload again to resume)';
+        }
+    });
+})();
+</script>
 </body>
 </html>
 '''
@@ -161,10 +265,7 @@ def safe_path(path: str) -> Path:
     return full
 
 
-def format_size(path: Path) -> str:
-    if path.is_dir():
-        return "-"
-    size = path.stat().st_size
+def format_size(size: int) -> str:
     for unit in ["B", "KB", "MB", "GB"]:
         if size < 1024:
             return f"{size:.1f}{unit}"
@@ -181,14 +282,21 @@ def browse(path):
     full = safe_path(path)
     if not full.exists():
         return "Not found", 404
+    if not full.is_dir():
+        return redirect(url_for("download", path=path))
+
+    try:
+        page = list_directory(str(full), cursor=request.args.get("cursor"), dirs_first=True)
+    except InvalidCursor:
+        return "Invalid cursor", 400
 
     items = []
-    for entry in sorted(full.iterdir(), key=lambda p: (not p.is_dir(), p.name.lower())):
+    for entry in page["items"]:
         items.append({
-            "name": entry.name,
-            "rel_path": str(Path(path, entry.name)),
-            "is_dir": entry.is_dir(),
-            "size": format_size(entry)
+            "name": entry["name"],
+            "rel_path": str(Path(path, entry["name"])),
+            "is_dir": entry["is_dir"],
+            "size": "-" if entry["is_dir"] else format_size(entry["size"])
         })
 
     breadcrumb = []
@@ -201,7 +309,9 @@ def browse(path):
         HTML_TEMPLATE,
         items=items,
         breadcrumb=breadcrumb,
-        current_path=path
+        current_path=path,
+        next_cursor=page["next_cursor"],
+        total=page["total"]
     )
 
 
@@ -213,6 +323,22 @@ def download(path):
     return send_file(full, as_attachment=True)
 
 
+# Underscored like /_uploads so it cannot shadow a top-level "archive" directory
+@app.route("/_archive/", defaults={"path": ""})
+@app.route("/_archive/<path:path>")
+def archive(path):
+    """Streams a directory as ?format=zip (default) or tar."""
+    full = safe_path(path)
+    if not full.is_dir():
+        return "Not found", 404
+
+    name = full.name or "workspace"
+    try:
+        return archive_response(str(full), request.args.get("format", "zip"), name=name)
+    except ValueError as e:
+        return str(e), 400
+
+
 @app.route("/delete/<path:path>")
 def delete(path):
     full = safe_path(path)
@@ -228,6 +354,7 @@ def delete(path):
     return redirect(url_for("browse", path=str(Path(path).parent)))
 
 
+@app.route("/upload/", defaults={"path": ""}, methods=["POST"])
 @app.route("/upload/<path:path>", methods=["POST"])
 def upload(path):
     full = safe_path(path)
@@ -240,6 +367,55 @@ def upload(path):
     return redirect(url_for("browse", path=path))
 
 
+# ---------------------------------------------------------------------
+# Chunked uploads: init -> PUT ?offset= chunks -> complete
+# ---------------------------------------------------------------------
+def upload_call(fn, *args):
+    try:
+        return jsonify(fn(*args))
+    except UploadError as e:
+        return jsonify(e.to_dict()), e.status
+
+
+@app.route("/_uploads/init/", defaults={"path": ""}, methods=["POST"])
+@app.route("/_uploads/init/<path:path>", methods=["POST"])
+def uploads_init(path):
+    """JSON {filename, size, sha256?, overwrite?} -> {upload_id, offset, chunk_size, ...}."""
+    data = request.get_json(silent=True) or {}
+    full = safe_path(path)
+    filename = secure_filename(data.get("filename") or "")
+    if not full.is_dir() or not filename:
+        return jsonify({"status": "error", "message": "Invalid upload target"}), 400
+
+    return upload_call(
+        init_upload, str(full / filename), data.get("size"), data.get("sha256"), bool(data.get("overwrite", True))
+    )
+
+
+@app.route("/_uploads/<upload_id>", methods=["GET"])
+def uploads_status(upload_id):
+    return upload_call(upload_status, upload_id)
+
+
+@app.route("/_uploads/<upload_id>", methods=["PUT"])
+def uploads_chunk(upload_id):
+    offset = request.args.get("offset", type=int)
+    if offset is None:
+        return jsonify({"status": "error", "message": "offset is required"}), 400
+    data = request.stream.read(UPLOAD_MAX_CHUNK_SIZE + 1)
+    return upload_call(write_chunk, upload_id, offset, data, request.headers.get("X-Chunk-SHA256"))
+
+
+@app.route("/_uploads/<upload_id>/complete", methods=["POST"])
+def uploads_complete(upload_id):
+    return upload_call(complete_upload, upload_id)
+
+
+@app.route("/_uploads/<upload_id>", methods=["DELETE"])
+def uploads_abort(upload_id):
+    return upload_call(abort_upload, upload_id)
+
+
 @app.route("/edit/<path:path>", methods=["GET", "POST"])
 def edit_file(path):
     full = safe_path(path)
@@ -1,8 +1,18 @@
 # api/ai.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
+import queue
 import logging
+import threading
 
-from services.ai.provider import run_ai_task
+from services.ai.provider import (
+    run_ai_task, hedge_delay, breakers, AI_MODE, AI_HYBRID_STRATEGY, MODE_PROVIDERS, PROVIDER_MODELS
+)
+from services.ai.latency import latency
+from services.ai.batch import run_batch, AI_BATCH_MAX_ITEMS
+from services.ai.utils import IncrementalJSONExtractor
+from services.ai.schema import output_stats
+from services.ai.groq_provider import limiter as groq_limiter
 from services.ai.prompt_builder import (
     build_motion_suggest_prompt,
     build_motion_refine_prompt,
@@ -10,10 +20,56 @@ from services.ai.prompt_builder import (
     build_motion_translation_prompt,
     build_sprite_suggest_prompt,
     build_sprite_refine_prompt,
+    prompt_report,
 )
 
 ai_bp = Blueprint("ai", __name__, url_prefix="/api/ai")
 
+SSE_KEEPALIVE_SECONDS = 15
+
+# Task name → builds the prompt_builder payload from the request body
+TASK_BUILDERS = {
+    "motion_suggest": lambda data: build_motion_suggest_prompt(
+        user_prompt=data.get("prompt", ""),
+        preset=data.get("preset", {})
+    ),
+    "motion_refine": lambda data: build_motion_refine_prompt(
+        user_prompt=data.get("prompt", ""),
+        existing_motion=data.get("existing_motion", {})
+    ),
+    "motion_style": lambda data: build_motion_style_prompt(
+        style_name=data.get("style", ""),
+        existing_motion=data.get("existing_motion", {})
+    ),
+    "motion_translate": lambda data: build_motion_translation_prompt(
+        existing_motion=data.get("existing_motion", {}),
+        target_language=data.get("target_language", "en")
+    ),
+    "sprite_suggest": lambda data: build_sprite_suggest_prompt(
+        user_prompt=data.get("prompt", ""),
+        preset=data.get("preset", {}),
+        reference_descriptions=data.get("reference_descriptions", [])
+    ),
+    "sprite_refine": lambda data: build_sprite_refine_prompt(
+        user_prompt=data.get("prompt", ""),
+        existing_prompt=data.get("existing_prompt", {}),
+        reference_descriptions=data.get("reference_descriptions", [])
+    ),
+}
+
+
+def _use_cache(data: dict) -> bool:
+    """Requests bypass the response cache with "no_cache": true or Cache-Control: no-cache."""
+    if data.get("no_cache"):
+        return False
+    return "no-cache" not in request.headers.get("Cache-Control", "").lower()
+
+
+def _run(task: str):
+    data = request.get_json(force=True)
+    payload = TASK_BUILDERS[task](data)
+    return jsonify(run_ai_task(task, payload, use_cache=_use_cache(data)))
+
 
 # ------------------------------------------------------------
 #  MOTION ENDPOINTS
@@ -21,42 +77,22 @@ ai_bp = Blueprint("ai", __name__, url_prefix="/api/ai")
 
 @ai_bp.post("/motion/suggest")
 def motion_suggest():
-    data = request.get_json(force=True)
-    payload = build_motion_suggest_prompt(
-        user_prompt=data.get("prompt", ""),
-        preset=data.get("preset", {})
-    )
-    return jsonify(run_ai_task("motion_suggest", payload))
+    return _run("motion_suggest")
 
 
 @ai_bp.post("/motion/refine")
 def motion_refine():
-    data = request.get_json(force=True)
-    payload = build_motion_refine_prompt(
-        user_prompt=data.get("prompt", ""),
-        existing_motion=data.get("existing_motion", {})
-    )
-    return jsonify(run_ai_task("motion_refine", payload))
+    return _run("motion_refine")
 
 
 @ai_bp.post("/motion/style")
 def motion_style():
-    data = request.get_json(force=True)
-    payload = build_motion_style_prompt(
-        style_name=data.get("style", ""),
-        existing_motion=data.get("existing_motion", {})
-    )
-    return jsonify(run_ai_task("motion_style", payload))
+    return _run("motion_style")
 
 
 @ai_bp.post("/motion/translate")
 def motion_translate():
-    data = request.get_json(force=True)
-    payload = build_motion_translation_prompt(
-        existing_motion=data.get("existing_motion", {}),
-        target_language=data.get("target_language", "en")
-    )
-    return jsonify(run_ai_task("motion_translate", payload))
+    return _run("motion_translate")
 
 
 # ------------------------------------------------------------
@@ -65,24 +101,122 @@ def motion_translate():
 
 @ai_bp.post("/sprite/suggest")
 def sprite_suggest():
-    data = request.get_json(force=True)
-    payload = build_sprite_suggest_prompt(
-        user_prompt=data.get("prompt", ""),
-        preset=data.get("preset", {}),
-        reference_descriptions=data.get("reference_descriptions", [])
-    )
-    return jsonify(run_ai_task("sprite_suggest", payload))
+    return _run("sprite_suggest")
 
 
 @ai_bp.post("/sprite/refine")
 def sprite_refine():
+    return _run("sprite_refine")
+
+
+# ------------------------------------------------------------
+#  BATCH
+# ------------------------------------------------------------
+
+@ai_bp.post("/batch")
+def ai_batch():
+    """
+    {"tasks": [{"task": "motion_translate", ...same body as the task
+    endpoint}, ...]} → {"results": [...]} in the same order, with
+    per-item errors. Identical items run once.
+    """
     data = request.get_json(force=True)
-    payload = build_sprite_refine_prompt(
-        user_prompt=data.get("prompt", ""),
-        existing_prompt=data.get("existing_prompt", {}),
-        reference_descriptions=data.get("reference_descriptions", [])
+    tasks = data.get("tasks")
+    if not isinstance(tasks, list) or not tasks:
+        return jsonify({"status": "error", "message": "'tasks' must be a non-empty list"}), 400
+    if len(tasks) > AI_BATCH_MAX_ITEMS:
+        return jsonify({"status": "error", "message": f"At most {AI_BATCH_MAX_ITEMS} tasks per batch"}), 400
+
+    items = []
+    for entry in tasks:
+        task = entry.get("task") if isinstance(entry, dict) else None
+        if task not in TASK_BUILDERS:
+            items.append({"task": task, "status": "error", "message": f"Unknown task '{task}'"})
+            continue
+        try:
+            items.append((task, TASK_BUILDERS[task](entry)))
+        except Exception as e:
+            items.append({"task": task, "status": "error", "message": f"Invalid input: {e}"})
+
+    return jsonify(run_batch(items, use_cache=_use_cache(data)))
+
+
+# ------------------------------------------------------------
+#  STREAMING
+# ------------------------------------------------------------
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@ai_bp.post("/stream")
+def ai_stream():
+    """
+    Runs one task ({"task": "motion_suggest", ...same body as the task
+    endpoint}) and streams server-sent events:
+
+      delta    {"provider", "text"}     generated text as it arrives
+      partial  {"provider", "value"}    best-effort parse of the object so far
+      result   <final JSON>             the same body the task endpoint returns
+    """
+    data = request.get_json(force=True)
+    task = data.get("task")
+    if task not in TASK_BUILDERS:
+        return jsonify({"status": "error", "message": f"Unknown task '{task}'"}), 400
+
+    payload = TASK_BUILDERS[task](data)
+    use_cache = _use_cache(data)
+    events: "queue.Queue" = queue.Queue()
+    # Set when the client goes away, so generation stops at the next chunk
+    cancel = threading.Event()
+
+    def on_delta(provider: str, text: str):
+        events.put(("delta", {"provider": provider, "text": text}))
+
+    def worker():
+        try:
+            result = run_ai_task(task, payload, use_cache=use_cache, on_delta=on_delta, cancel=cancel)
+        except Exception as e:
+            logging.error(f"[AI] Stream task '{task}' failed: {e}")
+            result = {"status": "error", "message": str(e)}
+        events.put(("result", result))
+
+    threading.Thread(target=worker, name=f"ai-stream-{task}", daemon=True).start()
+
+    def stream():
+        extractors = {}
+        last_partial = {}
+
+        try:
+            while True:
+                try:
+                    event, body = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event == "result":
+                    yield _sse("result", body)
+                    return
+
+                yield _sse("delta", body)
+
+                provider = body["provider"]
+                extractor = extractors.setdefault(provider, IncrementalJSONExtractor())
+                extractor.feed(body["text"])
+                value = extractor.partial()
+                if value is not None and value != last_partial.get(provider):
+                    last_partial[provider] = value
+                    yield _sse("partial", {"provider": provider, "value": value})
+        finally:
+            # Client disconnected (GeneratorExit) or the result was sent
+            cancel.set()
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return jsonify(run_ai_task("sprite_refine", payload))
 
 
 # ------------------------------------------------------------
@@ -91,7 +225,45 @@ def sprite_refine():
 
 @ai_bp.get("/providers")
 def providers():
+    """
+    Circuit-breaker state per provider. "active" is the provider the
+    current mode would try first, or null when all of them are open.
+    """
+    candidates = MODE_PROVIDERS.get(AI_MODE, [])
+    healthy = [name for name in candidates if breakers[name].available()]
     return jsonify({
-        "providers": ["ollama", "groq"],
-        "active": "ollama"
+        "mode": AI_MODE,
+        "providers": [
+            {"name": name, "model": PROVIDER_MODELS.get(name), "enabled": name in candidates, **breaker.status()}
+            for name, breaker in breakers.items()
+        ],
+        "active": healthy[0] if healthy else None
     })
+
+
+@ai_bp.get("/latency")
+def provider_latency():
+    return jsonify({
+        "mode": AI_MODE,
+        "hybrid_strategy": AI_HYBRID_STRATEGY,
+        "hedge_delay": hedge_delay(),
+        "providers": latency.stats(),
+    })
+
+
+@ai_bp.get("/metrics")
+def ai_metrics():
+    """
+    Schema outcomes per provider, the re-call rate (tasks needing a second
+    provider) and the Groq rate limiter's queue and 429 counts.
+    """
+    return jsonify({
+        "structured_output": output_stats.stats(),
+        "groq_rate_limit": groq_limiter.stats(),
+    })
+
+
+@ai_bp.get("/prompt-report")
+def ai_prompt_report():
+    """Estimated prompt tokens per task, full vs compact, and tokens saved."""
+    return jsonify(prompt_report.report())
@@ -0,0 +1,37 @@
+# api/cache.py
+from flask import Blueprint, jsonify
+
+from services.disk_cache import CACHES
+from services.render_cache import get_render_cache
+from services.motion_cache import get_motion_cache
+from services.ai.response_cache import get_response_cache
+from services.reference_descriptor import get_reference_cache
+from services.thumbnails import get_thumbnail_cache
+
+cache_bp = Blueprint("cache", __name__)
+
+
+def _ensure_caches():
+    # Caches are created lazily; make sure the known ones are listed
+    get_render_cache()
+    get_motion_cache()
+    get_response_cache()
+    get_reference_cache()
+    get_thumbnail_cache()
+
+
+@cache_bp.get("/stats")
+def cache_stats():
+    _ensure_caches()
+    return jsonify({name: cache.stats() for name, cache in sorted(CACHES.items())})
+
+
+@cache_bp.post("/<name>/clear")
+def cache_clear(name):
+    _ensure_caches()
+    cache = CACHES.get(name)
+    if cache is None:
+        return jsonify({"status": "error", "message": f"Unknown cache '{name}'"}), 404
+
+    removed = cache.clear()
+    return jsonify({"status": "success", "cache": name, "removed": removed})
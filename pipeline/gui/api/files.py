@@ -1,10 +1,19 @@
 # api/files.py
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 import os
 import logging
 
+from services.thumbnails import get_thumbnail, prewarm_directory, bucket_for, IMAGE_EXTENSIONS
+from services.image_pool import IMAGE_DECODE_ERRORS
+from services.jobs import submit_background_job, JobQueueFull
+from services.file_serving import serve_file, is_immutable_request
+from services.listing import list_directory
+from api.jobs import job_links
+
 files_bp = Blueprint("files", __name__)
 
+DEFAULT_THUMBNAIL_SIZE = 128
+
 
 @files_bp.get("/preview")
 def files_preview():
@@ -15,38 +24,90 @@ def files_preview():
     if not path or not os.path.exists(path):
         return jsonify({"error": "File not found"}), 404
 
-    ext = os.path.splitext(path)[1].lower()
+    return serve_file(path)
+
+
+@files_bp.get("/thumbnail")
+def files_thumbnail():
+    """
+    GET /api/files/thumbnail?path=/absolute/path/to/image.png&size=128
+    WebP thumbnail; size snaps up to the nearest bucket.
+    """
+    path = request.args.get("path")
+    if not path or not os.path.isfile(path):
+        return jsonify({"error": "File not found"}), 404
+    if not path.lower().endswith(IMAGE_EXTENSIONS):
+        return jsonify({"error": "Not an image"}), 400
+
+    size = request.args.get("size", DEFAULT_THUMBNAIL_SIZE, type=int)
+    try:
+        thumb = get_thumbnail(path, size)
+    except IMAGE_DECODE_ERRORS as e:
+        logging.error(f"[Files] Thumbnail failed for {path}: {e}")
+        return jsonify({"error": "Could not read image"}), 422
 
-    if ext in [".png", ".jpg", ".jpeg", ".webp"]:
-        return send_file(path, mimetype="image/png")
+    # The thumbnail is as cacheable as the URL's pin on its source
+    return serve_file(thumb, mimetype="image/webp", immutable=is_immutable_request(path))
 
-    if ext in [".mp4", ".webm"]:
-        return send_file(path, mimetype="video/mp4")
 
-    return send_file(path)
+@files_bp.post("/thumbnails/prewarm")
+def files_thumbnails_prewarm():
+    """
+    POST /api/files/thumbnails/prewarm {"dir": "/path/to/frames", "sizes": [64, 128]}
+    Renders the directory's thumbnails in a background job.
+    """
+    data = request.get_json(force=True) or {}
+    directory = data.get("dir")
+    if not directory or not os.path.isdir(directory):
+        return jsonify({"status": "error", "message": "Directory not found"}), 404
+
+    sizes = data.get("sizes") or [DEFAULT_THUMBNAIL_SIZE]
+    try:
+        sizes = [int(s) for s in sizes]
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "'sizes' must be a list of integers"}), 400
+
+    try:
+        job = submit_background_job(
+            "thumbnails:prewarm",
+            prewarm_directory, directory, sizes,
+            params={"dir": directory, "buckets": sorted({bucket_for(s) for s in sizes})},
+        )
+    except JobQueueFull:
+        return jsonify({"status": "error", "message": "Job queue is full, try again later"}), 503
+
+    return jsonify({"status": "queued", "job_id": job.id, **job_links(job.id)}), 202
+
+
+def listing_args(args) -> dict:
+    """list_directory() keyword arguments from query parameters."""
+    ext = args.get("ext")
+    return {
+        "cursor": args.get("cursor"),
+        "limit": args.get("limit", type=int),
+        "extensions": [e for e in ext.split(",") if e] if ext else None,
+        "kind": args.get("kind"),
+        "sort": args.get("sort", "name"),
+        "order": args.get("order", "asc"),
+        "dirs_first": args.get("dirs_first") in ("1", "true"),
+    }
 
 
 @files_bp.get("/list")
 def files_list():
     """
     GET /api/files/list?path=/workspace/projects/<id>/outputs
-    Returns directory contents.
+    Returns one page of directory contents. Optional: cursor, limit,
+    ext=png,webp, kind=file|dir, sort=name|size|mtime, order=asc|desc,
+    dirs_first=1. Pass next_cursor back as cursor for the next page.
     """
     root = request.args.get("path")
-    if not root:
-        return jsonify({"items": []})
-
-    if not os.path.exists(root):
-        return jsonify({"items": []})
-
-    items = []
-    for name in sorted(os.listdir(root)):
-        full = os.path.join(root, name)
-        items.append({
-            "name": name,
-            "path": full,
-            "is_file": os.path.isfile(full),
-            "is_dir": os.path.isdir(full)
-        })
-
-    return jsonify({"items": items})
+    if not root or not os.path.isdir(root):
+        return jsonify({"items": [], "next_cursor": None, "total": 0})
+
+    try:
+        page = list_directory(root, **listing_args(request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(page)
@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify
 
+from services import http_client
+
 health_bp = Blueprint('health', __name__)
 
 @health_bp.route('/api/health')
@@ -9,3 +11,8 @@ def health():
         "name": "SpriteForge",
         "version": "2026.1"
     })
+
+
+@health_bp.route('/api/health/http')
+def health_http():
+    return jsonify({"hosts": http_client.stats()})
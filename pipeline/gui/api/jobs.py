@@ -0,0 +1,87 @@
+# api/jobs.py
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
+
+from services.jobs import get_job, list_jobs
+
+jobs_bp = Blueprint("jobs", __name__)
+
+# Comment line sent while a job is quiet so proxies keep the stream open
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def job_links(job_id: str) -> dict:
+    return {
+        "status_url": f"/api/jobs/{job_id}",
+        "result_url": f"/api/jobs/{job_id}/result",
+        "events_url": f"/api/jobs/{job_id}/events",
+    }
+
+
+@jobs_bp.get("/")
+def jobs_list():
+    return jsonify({"jobs": [job.to_dict() for job in list_jobs()]})
+
+
+@jobs_bp.get("/<job_id>")
+def job_status(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@jobs_bp.get("/<job_id>/result")
+def job_result(job_id):
+    """
+    202 while the job is queued/running, the job's result once finished.
+    """
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    if not job.done:
+        return jsonify(job.to_dict()), 202
+
+    return jsonify({**job.to_dict(), "result": job.result})
+
+
+@jobs_bp.get("/<job_id>/events")
+def job_events(job_id):
+    """
+    Server-sent event stream of a job's progress.
+    Resumes after Last-Event-ID (or ?after=N) and closes once the job
+    has finished and every event has been delivered.
+    """
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    try:
+        after = int(request.headers.get("Last-Event-ID") or request.args.get("after", 0))
+    except ValueError:
+        after = 0
+
+    def stream():
+        seq = after
+        while True:
+            events = job.wait_events(seq, timeout=SSE_KEEPALIVE_SECONDS)
+            if not events:
+                if job.done:
+                    return
+                yield ": keepalive\n\n"
+                continue
+
+            for event in events:
+                seq = event["seq"]
+                yield (
+                    f"id: {seq}\n"
+                    f"event: {event['type']}\n"
+                    f"data: {json.dumps(event['data'])}\n\n"
+                )
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,26 @@
 # api/models.py
 from flask import Blueprint, request, jsonify
+import os
 import logging
 
+from werkzeug.utils import secure_filename
+
 from services.models import (
     list_all_models,
     load_active_models,
     save_active_models,
+    MODEL_ROOT,
+    MODEL_UPLOAD_FOLDERS,
+    VALID_EXTENSIONS,
+)
+from services.uploads import (
+    init_upload,
+    upload_status,
+    write_chunk,
+    complete_upload,
+    abort_upload,
+    UploadError,
+    UPLOAD_MAX_CHUNK_SIZE,
 )
 
 models_bp = Blueprint("models", __name__)
@@ -68,3 +83,70 @@ def models_set_active():
     logging.info(f"[Models] Updating active models for project {project_id}")
     saved = save_active_models(project_id, selection)
     return jsonify(saved)
+
+
+# ------------------------------------------------------------
+#  CHUNKED UPLOADS
+# ------------------------------------------------------------
+
+def _upload_call(fn, *args):
+    try:
+        return jsonify(fn(*args))
+    except UploadError as e:
+        return jsonify(e.to_dict()), e.status
+
+
+@models_bp.post("/upload/init")
+def models_upload_init():
+    """
+    Starts a chunked upload into /workspace/models/<type>/.
+
+    Body:
+    {
+      "type": "checkpoints" | "loras" | "vae" | ...,
+      "filename": "model.safetensors",
+      "size": 6938040682,
+      "sha256": "...",        # optional, verified on complete
+      "overwrite": false
+    }
+    Then PUT /upload/<id>?offset=N chunks (X-Chunk-SHA256 header) and
+    POST /upload/<id>/complete. GET /upload/<id> returns the offset to
+    resume from.
+    """
+    data = request.json or {}
+    folder = data.get("type")
+    filename = secure_filename(data.get("filename") or "")
+
+    if folder not in MODEL_UPLOAD_FOLDERS:
+        return jsonify({"status": "error", "message": f"type must be one of {', '.join(MODEL_UPLOAD_FOLDERS)}"}), 400
+    if not filename.lower().endswith(VALID_EXTENSIONS):
+        return jsonify({"status": "error", "message": f"Model files must end in {', '.join(VALID_EXTENSIONS)}"}), 400
+
+    dest = os.path.join(MODEL_ROOT, folder, filename)
+    logging.info(f"[Models] Upload started: {folder}/{filename}")
+    return _upload_call(init_upload, dest, data.get("size"), data.get("sha256"), bool(data.get("overwrite")))
+
+
+@models_bp.get("/upload/<upload_id>")
+def models_upload_status(upload_id):
+    return _upload_call(upload_status, upload_id)
+
+
+@models_bp.put("/upload/<upload_id>")
+def models_upload_chunk(upload_id):
+    offset = request.args.get("offset", type=int)
+    if offset is None:
+        return jsonify({"status": "error", "message": "offset is required"}), 400
+
+    data = request.stream.read(UPLOAD_MAX_CHUNK_SIZE + 1)
+    return _upload_call(write_chunk, upload_id, offset, data, request.headers.get("X-Chunk-SHA256"))
+
+
+@models_bp.post("/upload/<upload_id>/complete")
+def models_upload_complete(upload_id):
+    return _upload_call(complete_upload, upload_id)
+
+
+@models_bp.delete("/upload/<upload_id>")
+def models_upload_abort(upload_id):
+    return _upload_call(abort_upload, upload_id)
@@ -1,12 +1,18 @@
 # api/motion.py
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 import os
 import logging
 
 from services.hymotion import generate_motion
+from services.file_serving import serve_file
+from services.listing import list_directory
+from services.thumbnails import IMAGE_EXTENSIONS
 
 motion_bp = Blueprint("motion", __name__)
 
+# Frames per /preview/frames page
+FRAMES_PAGE_LIMIT = 1000
+
 
 @motion_bp.get("/skeletons")
 def motion_skeletons():
@@ -48,22 +54,34 @@ def preview_video():
     path = request.args.get("path")
     if not path or not os.path.exists(path):
         return jsonify({"error": "Video not found"}), 404
-    return send_file(path, mimetype="video/mp4")
+    return serve_file(path)
 
 
 @motion_bp.get("/preview/frames")
 def preview_frames():
+    """
+    GET /api/motion/preview/frames?dir=...&cursor=&limit=
+    Frame image paths in name order, one page at a time.
+    """
     frames_dir = request.args.get("dir")
-    if not frames_dir or not os.path.exists(frames_dir):
+    if not frames_dir or not os.path.isdir(frames_dir):
         return jsonify({"error": "Frames directory not found"}), 404
 
-    frames = sorted([
-        f for f in os.listdir(frames_dir)
-        if f.lower().endswith((".png", ".jpg", ".jpeg", ".webp"))
-    ])
+    try:
+        page = list_directory(
+            frames_dir,
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit", FRAMES_PAGE_LIMIT, type=int),
+            extensions=IMAGE_EXTENSIONS,
+            kind="file",
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({
-        "frames": [os.path.join(frames_dir, f) for f in frames]
+        "frames": [item["path"] for item in page["items"]],
+        "next_cursor": page["next_cursor"],
+        "total": page["total"],
     })
 
 
@@ -72,4 +90,4 @@ def preview_frame():
     path = request.args.get("path")
     if not path or not os.path.exists(path):
         return jsonify({"error": "Frame not found"}), 404
-    return send_file(path, mimetype="image/png")
+    return serve_file(path)
@@ -1,5 +1,6 @@
 # api/project.py
 from flask import Blueprint, request, jsonify
+import os
 import logging
 
 from services.project import (
@@ -8,7 +9,9 @@ from services.project import (
     list_projects,
     prepare_project_for_gui,
     ensure_project_scaffold,
+    PROJECT_ROOT,
 )
+from services.archive import archive_response
 
 project_bp = Blueprint("project", __name__)
 
@@ -47,3 +50,19 @@ def project_load(project_id):
 @project_bp.get("/list")
 def project_list():
     return jsonify(list_projects())
+
+
+@project_bp.get("/export/<project_id>")
+def project_export(project_id):
+    """
+    GET /api/project/export/<project_id>?format=zip|tar
+    Streams the whole project directory as an archive.
+    """
+    project_dir = os.path.join(PROJECT_ROOT, project_id)
+    if os.path.dirname(os.path.normpath(project_dir)) != PROJECT_ROOT or not os.path.isdir(project_dir):
+        return jsonify({"error": "Project not found"}), 404
+
+    try:
+        return archive_response(project_dir, request.args.get("format", "zip"), name=project_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
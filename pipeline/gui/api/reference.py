@@ -2,12 +2,12 @@
 from flask import Blueprint, request, jsonify
 import logging
 
-from services.reference_descriptor import save_reference_file, describe_reference_images
+from services.reference_descriptor import save_reference_file, describe_reference_images, VISION_BACKENDS
 
-bp = Blueprint("reference", __name__, url_prefix="/api/reference")
+reference_bp = Blueprint("reference", __name__, url_prefix="/api/reference")
 
 
-@bp.post("/upload")
+@reference_bp.post("/upload")
 def upload_reference():
     project_id = request.form.get("project_id")
     if not project_id:
@@ -17,7 +17,10 @@ def upload_reference():
         return jsonify({"status": "error", "message": "Missing file"}), 400
 
     file = request.files["file"]
-    meta = save_reference_file(project_id, file)
+    try:
+        meta = save_reference_file(project_id, file)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
     return jsonify({
         "status": "success",
@@ -25,7 +28,7 @@ def upload_reference():
     })
 
 
-@bp.post("/describe")
+@reference_bp.post("/describe")
 def describe_references():
     data = request.get_json(force=True)
     paths = data.get("paths", [])
@@ -33,7 +36,12 @@ def describe_references():
     if not paths:
         return jsonify({"status": "error", "message": "No paths provided"}), 400
 
-    descriptions = describe_reference_images(paths)
+    backend = data.get("backend")
+    if backend is not None and backend not in VISION_BACKENDS:
+        return jsonify({"status": "error", "message": f"Unknown vision backend '{backend}'"}), 400
+
+    # Cached descriptors (by image content) are returned without a model call
+    descriptions = describe_reference_images(paths, use_cache=not data.get("no_cache"), backend=backend)
 
     return jsonify({
         "status": "success",
@@ -1,14 +1,34 @@
 # api/sprites.py
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 import os
 import logging
 
-from services.comfyui import generate_sprites
-from services.spritesheet import assemble_spritesheet
+from services.spritesheet import assemble_spritesheet, MAX_TEXTURE_SIZE
+from services.image_pool import IMAGE_DECODE_ERRORS
+from services.workflow import run_workflow_job
+from services.jobs import submit_job, JobQueueFull
+from api.jobs import job_links
+from services.file_serving import serve_file
 
 sprites_bp = Blueprint("sprites", __name__)
 
 
+def _int_field(data: dict, name: str, default, minimum: int):
+    """data[name] as an int >= minimum (default if absent); raises ValueError with the message."""
+    value = data.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} must be an integer >= {minimum}")
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer >= {minimum}")
+    if number != float(value) or number < minimum:
+        raise ValueError(f"{name} must be an integer >= {minimum}")
+    return number
+
+
 @sprites_bp.post("/generate")
 def sprites_generate():
     """
@@ -25,22 +45,32 @@ def sprites_generate():
       "render_model": "model_id"
     }
 
-    For now we still expect frames_dir; later this will call workflow.run().
+    For now we still expect project_id + frames_dir and run the project's
+    sprite workflow. The render is queued; the response carries a job id.
     """
     data = request.json or {}
 
     # TEMP: bridge between old and new
+    project_id = data.get("project_id")
     frames_dir = data.get("frames_dir")
     character = data.get("character", "unnamed")
     style = data.get("style")  # legacy style id
 
-    if not frames_dir:
-        return jsonify({"status": "error", "message": "frames_dir is required (temporary bridge)"}), 400
+    if not project_id or not frames_dir:
+        return jsonify({"status": "error", "message": "project_id and frames_dir are required (temporary bridge)"}), 400
 
     logging.info(f"[SpriteForge] sprite generate: character={character} frames={frames_dir} style={style}")
 
-    result = generate_sprites(frames_dir, character, style)
-    return jsonify(result)
+    try:
+        job = submit_job(
+            "workflow:sprite",
+            run_workflow_job, project_id, "sprite", data,
+            params={"project_id": project_id, "workflow_type": "sprite", "character": character},
+        )
+    except JobQueueFull:
+        return jsonify({"status": "error", "message": "Job queue is full, try again later"}), 503
+
+    return jsonify({"status": "queued", "job_id": job.id, **job_links(job.id)}), 202
 
 
 @sprites_bp.post("/assemble")
@@ -49,24 +79,92 @@ def sprites_assemble():
     New contract (from sprites.js):
 
     {
-      "frames": ["/path/to/frame1.png", "..."],
-      "layout": "auto",
+      "project_id": "...",
+      "frames": ["/path/to/frame1.png", "..."],   # or "frames_dir"
+      "stride": 1,
+      "layout": "strip" | "grid" | "packed",
+      "rows": null,
+      "columns": null,
       "padding": 2,
+      "max_size": 4096,
+      "power_of_two": false,
+      "pivot": [0.5, 0.5],
+      "background": "transparent",
+      "dedupe": null,
       "character": "Goblin Ninja"
     }
-
-    For now we still accept frames_dir; later we’ll resolve frames → temp dir.
     """
     data = request.json or {}
+    project_id = data.get("project_id")
     character = data.get("character", "unnamed")
+    frames = data.get("frames")
     frames_dir = data.get("frames_dir")
 
-    if not frames_dir:
-        return jsonify({"status": "error", "message": "frames_dir is required (temporary bridge)"}), 400
-
-    logging.info(f"[SpriteForge] spritesheet assemble: character={character} frames={frames_dir}")
-
-    result = assemble_spritesheet(frames_dir, character)
+    if not project_id:
+        return jsonify({"status": "error", "message": "project_id is required"}), 400
+
+    if not frames and frames_dir:
+        if not os.path.isdir(frames_dir):
+            return jsonify({"status": "error", "message": "Frames directory not found"}), 404
+        frames = [
+            os.path.join(frames_dir, f) for f in sorted(os.listdir(frames_dir))
+            if f.lower().endswith((".png", ".jpg", ".jpeg", ".webp"))
+        ]
+
+    if not frames:
+        return jsonify({"status": "error", "message": "frames or frames_dir is required"}), 400
+    if not isinstance(frames, list) or not all(isinstance(f, str) for f in frames):
+        return jsonify({"status": "error", "message": "frames must be a list of paths"}), 400
+
+    missing = [f for f in frames if not os.path.isfile(f)]
+    if missing:
+        return jsonify({
+            "status": "error",
+            "message": f"{len(missing)} frame(s) not found",
+            "missing": missing[:10],
+        }), 400
+
+    try:
+        stride = _int_field(data, "stride", 1, 1)
+        padding = _int_field(data, "padding", 0, 0)
+        max_size = _int_field(data, "max_size", MAX_TEXTURE_SIZE, 1)
+        rows = _int_field(data, "rows", None, 1)
+        columns = _int_field(data, "columns", None, 1)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    pivot = data.get("pivot", [0.5, 0.5])
+    if not (
+        isinstance(pivot, list) and len(pivot) == 2
+        and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in pivot)
+    ):
+        return jsonify({"status": "error", "message": "pivot must be a list of two numbers"}), 400
+
+    layout = data.get("layout", "strip")
+    if layout == "auto":
+        layout = "grid"
+
+    logging.info(f"[SpriteForge] spritesheet assemble: character={character} frames={len(frames)} layout={layout}")
+
+    try:
+        result = assemble_spritesheet(
+            project_id,
+            frames,
+            stride=stride,
+            layout=layout,
+            rows=rows,
+            columns=columns,
+            padding=padding,
+            max_size=max_size,
+            power_of_two=bool(data.get("power_of_two", False)),
+            pivot=(float(pivot[0]), float(pivot[1])),
+            background=data.get("background"),
+            dedupe=data.get("dedupe"),
+        )
+    except IMAGE_DECODE_ERRORS as e:
+        # A frame vanished or is not a readable image
+        logging.error(f"[SpriteForge] spritesheet assemble failed: {e}")
+        return jsonify({"status": "error", "message": f"Could not read frames: {e}"}), 400
     return jsonify(result)
 
 
@@ -75,4 +173,4 @@ def preview_sheet():
     path = request.args.get("path")
     if not path or not os.path.exists(path):
         return jsonify({"error": "Sprite sheet not found"}), 404
-    return send_file(path, mimetype="image/png")
+    return serve_file(path)
@@ -1,7 +1,9 @@
 # api/workflow.py
 from flask import Blueprint, request, jsonify
-from services.workflow import run_workflow
+from services.workflow import run_workflow_job
 from services.project import ensure_project_scaffold
+from services.jobs import submit_job, JobQueueFull
+from api.jobs import job_links
 import logging
 
 workflow_bp = Blueprint("workflow", __name__, url_prefix="/api/workflow")
@@ -9,6 +11,10 @@ workflow_bp = Blueprint("workflow", __name__, url_prefix="/api/workflow")
 
 @workflow_bp.post("/<workflow_type>/run")
 def run(workflow_type):
+    """
+    Queues the workflow and returns immediately with a job id.
+    Poll /api/jobs/<job_id> or stream /api/jobs/<job_id>/events.
+    """
     data = request.get_json(force=True)
 
     project_id = data.get("project_id")
@@ -17,8 +23,16 @@ def run(workflow_type):
 
     ensure_project_scaffold(project_id)
 
-    logging.info(f"[WorkflowAPI] Running workflow '{workflow_type}' for project {project_id}")
+    logging.info(f"[WorkflowAPI] Queueing workflow '{workflow_type}' for project {project_id}")
 
-    result = run_workflow(project_id, workflow_type, data)
+    try:
+        job = submit_job(
+            f"workflow:{workflow_type}",
+            run_workflow_job, project_id, workflow_type, data,
+            params={"project_id": project_id, "workflow_type": workflow_type},
+        )
+    except JobQueueFull as e:
+        logging.warning(f"[WorkflowAPI] Rejected workflow '{workflow_type}': {e}")
+        return jsonify({"status": "error", "message": "Job queue is full, try again later"}), 503
 
-    return jsonify(result)
+    return jsonify({"status": "queued", "job_id": job.id, **job_links(job.id)}), 202
@@ -15,6 +15,9 @@ from api.files import files_bp
 from api.ai import ai_bp
 from api.health import health_bp
 from api.motion_presets import preset_bp
+from api.jobs import jobs_bp
+from api.cache import cache_bp
+from api.reference import reference_bp
 
 print("CWD =", os.getcwd()) 
 print("ENV FILE EXISTS =", os.path.exists(".env"))
@@ -59,6 +62,9 @@ def create_app():
     app.register_blueprint(ai_bp, url_prefix="/api/ai")
     app.register_blueprint(health_bp)
     app.register_blueprint(preset_bp, url_prefix="/api/motion-presets")
+    app.register_blueprint(jobs_bp, url_prefix="/api/jobs")
+    app.register_blueprint(cache_bp, url_prefix="/api/cache")
+    app.register_blueprint(reference_bp, url_prefix="/api/reference")
     # Vue router catch‑all
     @app.route("/<path:path>")
     def catch_all(path):
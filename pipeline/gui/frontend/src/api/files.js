@@ -4,6 +4,26 @@ export async function listFiles(project_id, path = '') {
   return res.json()
 }
 
+// One page of /api/files/list; pass the previous page's next_cursor to continue
+export async function listFilesPage(path, cursor = null, options = {}) {
+  const params = new URLSearchParams({ path, ...options })
+  if (cursor) params.set('cursor', cursor)
+  const res = await fetch(`/api/files/list?${params}`)
+  return res.json()
+}
+
+// Every entry of a directory, following next_cursor across pages
+export async function listAllFiles(path, options = {}) {
+  const items = []
+  let cursor = null
+  do {
+    const page = await listFilesPage(path, cursor, options)
+    items.push(...(page.items || []))
+    cursor = page.next_cursor
+  } while (cursor)
+  return { items, total: items.length }
+}
+
 export async function uploadFile(project_id, path, file) {
   const form = new FormData()
   form.append('project_id', project_id)
@@ -16,3 +36,17 @@ export async function uploadFile(project_id, path, file) {
   })
   return res.json()
 }
+
+// Cached WebP thumbnail; size snaps up to 64 / 128 / 256 / 512
+export function thumbnailUrl(path, size = 128) {
+  return `/api/files/thumbnail?path=${encodeURIComponent(path)}&size=${size}`
+}
+
+export async function prewarmThumbnails(dir, sizes = [128]) {
+  const res = await fetch('/api/files/thumbnails/prewarm', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ dir, sizes })
+  })
+  return res.json()
+}
@@ -27,3 +27,85 @@ export async function setActiveModel(model) {
   })
   return res.json()
 }
+
+// ------------------------------------------------------------
+//  Chunked, resumable upload
+// ------------------------------------------------------------
+// init → PUT chunks at offsets → complete. The upload id is kept in
+// localStorage per (type, name, size, mtime), so picking the same file
+// again after a failure or reload resumes from the server's offset.
+
+const CHUNK_RETRIES = 5
+
+async function sha256Hex(data) {
+  if (!globalThis.crypto?.subtle) return null
+  const digest = await crypto.subtle.digest('SHA-256', data)
+  return [...new Uint8Array(digest)].map(b => b.toString(16).padStart(2, '0')).join('')
+}
+
+async function json(res) {
+  const body = await res.json()
+  if (!res.ok) throw new Error(body.message || `HTTP ${res.status}`)
+  return body
+}
+
+export async function uploadModelChunked(file, type, { onProgress, overwrite = false } = {}) {
+  const resumeKey = `spriteforge-upload:${type}:${file.name}:${file.size}:${file.lastModified}`
+  let state = null
+
+  const savedId = localStorage.getItem(resumeKey)
+  if (savedId) {
+    const res = await fetch(`/api/models/upload/${savedId}`)
+    if (res.ok) state = await res.json()
+    else localStorage.removeItem(resumeKey)
+  }
+
+  if (!state) {
+    state = await json(await fetch('/api/models/upload/init', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ type, filename: file.name, size: file.size, overwrite })
+    }))
+    localStorage.setItem(resumeKey, state.upload_id)
+  }
+
+  const id = state.upload_id
+  let offset = state.offset
+  let failures = 0
+  onProgress?.(offset, file.size)
+
+  while (offset < file.size) {
+    const chunk = await file.slice(offset, offset + state.chunk_size).arrayBuffer()
+    const checksum = await sha256Hex(chunk)
+
+    let res
+    try {
+      res = await fetch(`/api/models/upload/${id}?offset=${offset}`, {
+        method: 'PUT',
+        headers: checksum ? { 'X-Chunk-SHA256': checksum } : {},
+        body: chunk
+      })
+    } catch (err) {
+      res = null
+    }
+
+    if (res && (res.ok || res.status === 409)) {
+      // 409: the server holds a different offset; carry on from there
+      offset = (await res.json()).offset
+      failures = 0
+      onProgress?.(offset, file.size)
+      continue
+    }
+    if (res && res.status < 500 && res.status !== 400) {
+      localStorage.removeItem(resumeKey)
+      await json(res)
+    }
+    // Network error, 5xx or a corrupted chunk (400): retry with backoff
+    if (++failures > CHUNK_RETRIES) throw new Error(`Chunk at ${offset} failed ${failures} times`)
+    await new Promise(r => setTimeout(r, 1000 * 2 ** (failures - 1)))
+  }
+
+  const res = await fetch(`/api/models/upload/${id}/complete`, { method: 'POST' })
+  if (res.status !== 409) localStorage.removeItem(resumeKey)
+  return json(res)
+}
@@ -34,3 +34,44 @@ export async function translateMotion(existing_motion, target_language) {
   })
   return res.json()
 }
+
+// Streams any AI task ({ task: 'motion_suggest', ...body }) over SSE.
+// onPartial(value, provider) receives the JSON object as it is generated;
+// resolves with the final result.
+export async function streamAiTask(task, body, onPartial) {
+  const res = await fetch('/api/ai/stream', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ...body, task })
+  })
+  if (!res.ok) return res.json()
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+
+      let event = 'message'
+      let data = ''
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      if (!data) continue
+
+      const parsed = JSON.parse(data)
+      if (event === 'partial' && onPartial) onPartial(parsed.value, parsed.provider)
+      if (event === 'result') return parsed
+    }
+  }
+  return { status: 'error', message: 'Stream ended without a result' }
+}
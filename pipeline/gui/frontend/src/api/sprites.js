@@ -1,9 +1,34 @@
 // src/api/sprites.js
-export async function runSpriteWorkflow(payload) {
+export async function runSpriteWorkflow(payload, onProgress = null) {
   const res = await fetch('/api/workflow/sprite/run', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(payload)
   })
-  return res.json()
+  const queued = await res.json()
+  if (!queued.job_id) return queued
+
+  await waitForJob(queued.job_id, onProgress)
+  const result = await fetch(`/api/jobs/${queued.job_id}/result`)
+  const data = await result.json()
+  return { job_id: queued.job_id, ...(data.result || data) }
+}
+
+export function waitForJob(jobId, onProgress = null) {
+  return new Promise((resolve) => {
+    const events = new EventSource(`/api/jobs/${jobId}/events`)
+
+    events.addEventListener('progress', (e) => {
+      if (onProgress) onProgress(JSON.parse(e.data))
+    })
+    events.addEventListener('finished', (e) => {
+      events.close()
+      resolve(JSON.parse(e.data))
+    })
+    events.onerror = () => {
+      // EventSource reconnects on its own (resuming via Last-Event-ID);
+      // only give up when the server refused the stream outright.
+      if (events.readyState === EventSource.CLOSED) resolve(null)
+    }
+  })
 }
@@ -1,5 +1,5 @@
 import { defineStore } from 'pinia'
-import { listFiles, uploadFile} from '../api/files'
+import { listAllFiles, uploadFile } from '../api/files'
 
 export const useFilesStore = defineStore('files', {
   state: () => ({
@@ -14,7 +14,7 @@ export const useFilesStore = defineStore('files', {
     async load(path = '') {
       this.loading = true
       this.currentPath = path
-      const data = await listFiles(path)
+      const data = await listAllFiles(path, { limit: 5000 })
       this.items = data.items
       this.loading = false
 
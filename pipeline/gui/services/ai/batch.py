@@ -0,0 +1,69 @@
+# services/ai/batch.py
+"""
+Runs many prompt_builder tasks concurrently.
+
+Identical (task, payload) pairs are run once and fanned back out. The
+batch pool bounds how many tasks are in flight across all batches; the
+per-provider limits in provider.py (AI_CONCURRENCY_OLLAMA / _GROQ) bound
+what actually reaches each backend.
+"""
+
+import os
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union
+
+from .provider import run_ai_task
+
+AI_BATCH_WORKERS = int(os.getenv("AI_BATCH_WORKERS", "4"))
+AI_BATCH_MAX_ITEMS = int(os.getenv("AI_BATCH_MAX_ITEMS", "100"))
+
+_batch_executor = ThreadPoolExecutor(max_workers=AI_BATCH_WORKERS, thread_name_prefix="ai-batch")
+
+
+def run_batch(items: List[Union[tuple, dict]], use_cache: bool = True) -> dict:
+    """
+    items: (task, payload) tuples, or an error dict for entries the caller
+    could not build. Returns {"results": [...]} in input order, each
+    {"index", "task", "status", "result" | "message"}.
+    """
+    results: list = [None] * len(items)
+    groups = {}
+
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            results[index] = {"index": index, **item}
+            continue
+        task, payload = item
+        key = json.dumps([task, payload], sort_keys=True, ensure_ascii=False)
+        groups.setdefault(key, (task, payload, []))[2].append(index)
+
+    logging.info(f"[AI] Batch of {len(items)} tasks ({len(groups)} unique)")
+
+    futures = [
+        (_batch_executor.submit(run_ai_task, task, payload, use_cache), task, indices)
+        for task, payload, indices in groups.values()
+    ]
+
+    for future, task, indices in futures:
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.error(f"[AI] Batch task '{task}' raised: {e}")
+            result = {"status": "error", "message": str(e)}
+
+        if isinstance(result, dict) and result.get("status") == "error":
+            entry = {"task": task, "status": "error", "message": result.get("message", "AI task failed")}
+        else:
+            entry = {"task": task, "status": "success", "result": result}
+
+        for index in indices:
+            results[index] = {"index": index, **entry}
+
+    return {
+        "results": results,
+        "count": len(items),
+        "unique": len(groups),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+    }
@@ -1,42 +1,185 @@
 # services/ai/groq_provider.py
 import json
 import logging
-import requests
+from services import http_client
+from services.ai.utils import IncrementalJSONExtractor
+from services.ai.prompt_builder import serialize_payload, estimate_tokens, tokens_for_chars
+from services.ai.health import provider_error
+from services.ai.rate_limit import RateLimiter, parse_duration, parse_retry_after
 import os
 
-GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_URL = os.getenv("GROQ_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+# Stream tokens and stop at the first complete JSON object
+GROQ_STREAM = os.getenv("GROQ_STREAM", "1") == "1"
+
+# Client-side limits (requests / tokens per minute for the account tier)
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "6000"))
+GROQ_QUEUE_TIMEOUT = float(os.getenv("GROQ_QUEUE_TIMEOUT", "120"))
+GROQ_MAX_THROTTLE_RETRIES = int(os.getenv("GROQ_MAX_THROTTLE_RETRIES", "5"))
+# Completion tokens reserved per call until the real usage is known
+GROQ_COMPLETION_TOKENS = int(os.getenv("GROQ_COMPLETION_TOKENS", "512"))
+
+limiter = RateLimiter(GROQ_RPM, GROQ_TPM, GROQ_QUEUE_TIMEOUT)
+
 def get_groq_key():
     return os.getenv("GROQ_API_KEY")
 GROQ_KEY = get_groq_key()
 
-def call_groq(task: str, payload: dict) -> dict:
+
+def _request_body(prompt: str, stream: bool) -> dict:
+    body = {
+        "model": GROQ_MODEL,
+        "messages": [
+            {"role": "system", "content": "Return only strict JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.2
+    }
+    if stream:
+        body["stream"] = True
+    return body
+
+
+def _post(prompt: str, stream: bool, reserved: int):
+    """
+    Sends a chat completion once the rate limiter admits it. A 429 pauses
+    the limiter for Retry-After and the call queues again rather than
+    failing (up to GROQ_MAX_THROTTLE_RETRIES times). The last 429 is
+    returned open, for the caller's raise_for_status().
+
+    A call that never reached Groq gives its reservation back here; once
+    a response is returned, settling it is the caller's job.
+    """
+    attempts = GROQ_MAX_THROTTLE_RETRIES + 1
+    for attempt in range(attempts):
+        waited = limiter.acquire(reserved)
+        if waited > 0.05:
+            logging.info(f"[AI][Groq] Queued {waited:.2f}s for rate limit")
+
+        try:
+            r = http_client.post(
+                GROQ_URL,
+                headers={
+                    "Authorization": f"Bearer {GROQ_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json=_request_body(prompt, stream),
+                stream=stream,
+                timeout=60
+            )
+        except Exception as e:
+            # Unsent: refund it all. Sent but unanswered: Groq may have read the prompt
+            limiter.settle(reserved, 0 if http_client.never_sent(e) else reserved - GROQ_COMPLETION_TOKENS)
+            raise
+        limiter.update_from_headers(r.headers)
+        if r.status_code != 429 or attempt == attempts - 1:
+            if r.status_code == 429:
+                logging.warning(f"[AI][Groq] 429 after {attempts} attempts, giving up")
+            return r
+
+        retry_after = (
+            parse_retry_after(r.headers.get("retry-after"))
+            or parse_duration(r.headers.get("x-ratelimit-reset-tokens"))
+        )
+        r.close()
+        limiter.on_throttled(retry_after)
+        logging.warning(f"[AI][Groq] 429 (attempt {attempt + 1}), retrying after {retry_after}s")
+
+
+def probe_groq() -> bool:
+    """Health check for the circuit breaker (the models list is not rate limited like completions)."""
+    if not GROQ_KEY:
+        return False
+    base = GROQ_URL.rsplit("/chat/completions", 1)[0]
+    r = http_client.get(
+        f"{base}/models",
+        headers={"Authorization": f"Bearer {GROQ_KEY}"},
+        timeout=(2, 5),
+        retries=0
+    )
+    return r.status_code == 200
+
+
+def call_groq(task: str, payload: dict, on_delta=None, cancel=None) -> dict:
     """
     Sends a strict JSON payload to Groq.
+
+    on_delta(text) receives generated text as it streams; setting the
+    `cancel` event abandons the request between chunks.
     """
-    print("GROQ_KEY:", GROQ_KEY)
+    if GROQ_STREAM:
+        return _stream_groq(payload, on_delta, cancel)
+
+    prompt = serialize_payload(payload)
+    prompt_tokens = estimate_tokens(prompt)
+    reserved = prompt_tokens + GROQ_COMPLETION_TOKENS
+    r = None
+    usage = None
     try:
-        r = requests.post(
-            GROQ_URL,
-            headers={
-                "Authorization": f"Bearer {GROQ_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "llama-3.3-70b-versatile",
-                "messages": [
-                    {"role": "system", "content": "Return only strict JSON."},
-                    {"role": "user", "content": json.dumps(payload)}
-                ],
-                "temperature": 0.2
-            },
-            timeout=60
-        )
+        r = _post(prompt, stream=False, reserved=reserved)
         r.raise_for_status()
 
-        content = r.json()["choices"][0]["message"]["content"]
-        print("Groq response content:", content)
+        data = r.json()
+        usage = (data.get("usage") or {}).get("total_tokens")
+
+        content = data["choices"][0]["message"]["content"]
+        logging.debug(f"[AI][Groq] Response content: {content}")
         return json.loads(content)
 
     except Exception as e:
         logging.error(f"[AI][Groq] Error: {e}")
-        return {"status": "error", "message": str(e)}
+        return provider_error(e)
+
+    finally:
+        # Errors and 429s carry no usage; charge them the prompt
+        if r is not None:
+            limiter.settle(reserved, usage or prompt_tokens)
+
+
+def _stream_groq(payload: dict, on_delta=None, cancel=None) -> dict:
+    extractor = IncrementalJSONExtractor()
+    prompt = serialize_payload(payload)
+    prompt_tokens = estimate_tokens(prompt)
+    reserved = prompt_tokens + GROQ_COMPLETION_TOKENS
+    answered = False
+    generated = 0
+    try:
+        with _post(prompt, stream=True, reserved=reserved) as r:
+            answered = True
+            r.raise_for_status()
+
+            # OpenAI-style server-sent events: "data: {...}" ... "data: [DONE]"
+            for line in r.iter_lines(chunk_size=None):
+                if cancel is not None and cancel.is_set():
+                    return {"status": "error", "message": "Cancelled"}
+                if not line.startswith(b"data:"):
+                    continue
+
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+
+                choices = json.loads(data).get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content") or ""
+                if text:
+                    generated += len(text)
+                    if on_delta:
+                        on_delta(text)
+                    objects = extractor.feed(text)
+                    if objects:
+                        return objects[0]
+
+    except Exception as e:
+        logging.error(f"[AI][Groq] Error: {e}")
+        return provider_error(e)
+
+    finally:
+        # Streams stop early, before Groq's usage chunk; settle on estimates.
+        # Calls that got no response at all were settled by _post.
+        if answered:
+            limiter.settle(reserved, prompt_tokens + tokens_for_chars(generated))
+
+    logging.error("[AI][Groq] No JSON found in streamed response")
+    return {"status": "error", "message": "No JSON found in Groq response"}
@@ -0,0 +1,162 @@
+# services/ai/health.py
+"""
+Per-provider circuit breakers.
+
+After AI_BREAKER_FAILURES consecutive failures a provider's breaker
+opens and routing skips it without paying a connection attempt. A
+background thread probes open providers (cheap health endpoints, not a
+generation) and closes the breaker once one answers. Providers without
+a probe go half-open after the cooldown and let one real call through.
+
+Only transport failures count (connection errors, timeouts, 5xx, 429).
+A reply the model got wrong (no JSON, schema miss) proves the provider
+is reachable and counts as a success here. Providers mark transport
+failures with provider_error().
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+import requests
+
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "3"))
+AI_BREAKER_COOLDOWN = float(os.getenv("AI_BREAKER_COOLDOWN", "30"))
+AI_BREAKER_PROBE_INTERVAL = float(os.getenv("AI_BREAKER_PROBE_INTERVAL", "10"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+_TRANSPORT_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def is_transport_error(e: Exception) -> bool:
+    """True if `e` means the provider could not be reached or is overloaded."""
+    if isinstance(e, _TRANSPORT_EXCEPTIONS):
+        return True
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        return e.response.status_code >= 500 or e.response.status_code == 429
+    return False
+
+
+def provider_error(e: Exception) -> dict:
+    """Error result for a provider exception, flagged {"transport": True} when it is one."""
+    result = {"status": "error", "message": str(e)}
+    if is_transport_error(e):
+        result["transport"] = True
+    return result
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, probe: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.probe = probe
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = None
+        self.last_probe = None
+        self.trips = 0
+
+    def available(self) -> bool:
+        """Routing check: like allow() but without claiming a half-open trial."""
+        with self._lock:
+            if self.state != OPEN:
+                return True
+            return self.probe is None and time.monotonic() - self.opened_at >= AI_BREAKER_COOLDOWN
+
+    def allow(self) -> bool:
+        """True if a call may go to this provider now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.probe is None \
+                    and time.monotonic() - self.opened_at >= AI_BREAKER_COOLDOWN:
+                # No probe: the next real call is the trial
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info(f"[AI][Health] {self.name} recovered, closing breaker")
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self, reason: str):
+        with self._lock:
+            self.failures += 1
+            self.last_error = reason
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= AI_BREAKER_FAILURES):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                logging.warning(f"[AI][Health] {self.name} breaker open after {self.failures} failures: {reason}")
+                opened = True
+            else:
+                opened = False
+        if opened and self.probe is not None:
+            _ensure_prober()
+
+    def run_probe(self):
+        """Background check while open; a healthy answer closes the breaker."""
+        try:
+            healthy = bool(self.probe())
+        except Exception as e:
+            logging.debug(f"[AI][Health] {self.name} probe error: {e}")
+            healthy = False
+
+        self.last_probe = {"at": time.time(), "healthy": healthy}
+        if healthy:
+            self.record_success()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "healthy": self.state == CLOSED,
+                "consecutive_failures": self.failures,
+                "open_for": round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED else 0.0,
+                "trips": self.trips,
+                "last_error": self.last_error,
+                "last_probe": self.last_probe,
+            }
+
+
+breakers: Dict[str, CircuitBreaker] = {}
+
+_prober: Optional[threading.Thread] = None
+_prober_lock = threading.Lock()
+
+
+def register(name: str, probe: Optional[Callable[[], bool]] = None) -> CircuitBreaker:
+    breaker = breakers.get(name)
+    if breaker is None:
+        breaker = breakers[name] = CircuitBreaker(name, probe)
+    return breaker
+
+
+def _probe_loop():
+    while True:
+        time.sleep(AI_BREAKER_PROBE_INTERVAL)
+        for breaker in list(breakers.values()):
+            if breaker.state == OPEN and breaker.probe is not None:
+                breaker.run_probe()
+
+
+def _ensure_prober():
+    global _prober
+    with _prober_lock:
+        if _prober is None or not _prober.is_alive():
+            _prober = threading.Thread(target=_probe_loop, name="ai-health-probe", daemon=True)
+            _prober.start()
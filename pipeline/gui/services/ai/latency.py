@@ -0,0 +1,84 @@
+# services/ai/latency.py
+"""
+Per-provider latency samples for AI calls.
+
+Keeps the last LATENCY_WINDOW call durations per provider and reports
+percentiles; hybrid mode uses them to pick its hedge delay. A hedge leg
+cancelled because the other provider won is kept as a lower-bound sample
+(its elapsed time), so slow calls still show up in the tail.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+LATENCY_WINDOW = 200
+
+
+def _percentile(sorted_samples, q: float) -> Optional[float]:
+    if not sorted_samples:
+        return None
+    # Nearest-rank
+    rank = max(1, math.ceil(q / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class LatencyTracker:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._calls: Dict[str, int] = {}
+        self._failures: Dict[str, int] = {}
+        self._cancelled: Dict[str, int] = {}
+
+    def record(self, provider: str, seconds: float, ok: bool):
+        with self._lock:
+            self._calls[provider] = self._calls.get(provider, 0) + 1
+            if ok:
+                self._samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+            else:
+                self._failures[provider] = self._failures.get(provider, 0) + 1
+
+    def record_cancelled(self, provider: str, seconds: float, lower_bound: bool):
+        """A call abandoned after `seconds`; with lower_bound it is kept as a sample."""
+        with self._lock:
+            self._calls[provider] = self._calls.get(provider, 0) + 1
+            self._cancelled[provider] = self._cancelled.get(provider, 0) + 1
+            if lower_bound:
+                self._samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, provider: str) -> int:
+        with self._lock:
+            return len(self._samples.get(provider, ()))
+
+    def percentile(self, provider: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        return _percentile(samples, q)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            providers = set(self._calls)
+            snapshot = {p: sorted(self._samples.get(p, ())) for p in providers}
+            calls = dict(self._calls)
+            failures = dict(self._failures)
+            cancelled = dict(self._cancelled)
+
+        return {
+            p: {
+                "calls": calls.get(p, 0),
+                "failures": failures.get(p, 0),
+                "cancelled": cancelled.get(p, 0),
+                "samples": len(samples),
+                "p50": _percentile(samples, 50),
+                "p90": _percentile(samples, 90),
+                "p95": _percentile(samples, 95),
+                "p99": _percentile(samples, 99),
+            }
+            for p, samples in snapshot.items()
+        }
+
+
+latency = LatencyTracker()
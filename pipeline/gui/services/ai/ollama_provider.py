@@ -1,24 +1,58 @@
 # services/ai/ollama_provider.py
 import json
 import logging
-import requests
+from services import http_client
+from services.ai.utils import IncrementalJSONExtractor
+from services.ai.schema import task_schema
+from services.ai.prompt_builder import serialize_payload
+from services.ai.health import provider_error
 import os
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434/api/generate")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:latest")
 
+# Stream tokens and stop at the first complete JSON object
+OLLAMA_STREAM = os.getenv("OLLAMA_STREAM", "1") == "1"
 
-def call_ollama(task: str, payload: dict) -> dict:
+# Output constraint: "schema" (JSON Schema from expected_output, Ollama >= 0.5),
+# "json" (any JSON object) or "off"
+OLLAMA_FORMAT = os.getenv("OLLAMA_FORMAT", "schema").lower()
+
+
+def _request_body(payload: dict, stream: bool) -> dict:
+    body = {
+        "model": OLLAMA_MODEL,
+        "prompt": serialize_payload(payload),
+        "stream": stream
+    }
+    if OLLAMA_FORMAT == "schema":
+        body["format"] = task_schema(payload) or "json"
+    elif OLLAMA_FORMAT == "json":
+        body["format"] = "json"
+    return body
+
+
+def probe_ollama() -> bool:
+    """Health check for the circuit breaker: the server answers and lists models."""
+    base = OLLAMA_URL.rsplit("/api/", 1)[0]
+    r = http_client.get(f"{base}/api/tags", timeout=(2, 5), retries=0)
+    return r.status_code == 200
+
+
+def call_ollama(task: str, payload: dict, on_delta=None, cancel=None) -> dict:
     """
     Sends a strict JSON payload to a local Ollama model.
+
+    on_delta(text) receives generated text as it streams; setting the
+    `cancel` event abandons the request between chunks.
     """
+    if OLLAMA_STREAM:
+        return _stream_ollama(payload, on_delta, cancel)
+
     try:
-        r = requests.post(
+        r = http_client.post(
             OLLAMA_URL,
-            json={
-                "model": "llama3:latest",
-                "prompt": json.dumps(payload),
-                "stream": False
-            },
+            json=_request_body(payload, stream=False),
             timeout=60
         )
         r.raise_for_status()
@@ -33,7 +67,7 @@ def call_ollama(task: str, payload: dict) -> dict:
         if start != -1 and end != -1:
             json_str = raw[start:end]
             try:
-                print("Ollama extracted JSON string:", json_str)
+                logging.debug(f"[AI][Ollama] Extracted JSON string: {json_str}")
                 return json.loads(json_str)
             except Exception as e:
                 logging.error(f"[AI][Ollama] JSON parse error: {e}")
@@ -46,4 +80,45 @@ def call_ollama(task: str, payload: dict) -> dict:
 
     except Exception as e:
         logging.error(f"[AI][Ollama] Error: {e}")
-        return {"status": "error", "message": str(e)}
+        return provider_error(e)
+
+
+def _stream_ollama(payload: dict, on_delta=None, cancel=None) -> dict:
+    extractor = IncrementalJSONExtractor()
+    try:
+        with http_client.post(
+            OLLAMA_URL,
+            json=_request_body(payload, stream=True),
+            stream=True,
+            timeout=60
+        ) as r:
+            r.raise_for_status()
+
+            for line in r.iter_lines(chunk_size=None):
+                if cancel is not None and cancel.is_set():
+                    return {"status": "error", "message": "Cancelled"}
+                if not line:
+                    continue
+
+                chunk = json.loads(line)
+                text = chunk.get("response", "")
+                if text:
+                    if on_delta:
+                        on_delta(text)
+                    objects = extractor.feed(text)
+                    if objects:
+                        # Leaving the block closes the connection, which
+                        # makes Ollama stop generating
+                        return objects[0]
+
+                if chunk.get("error"):
+                    return {"status": "error", "message": chunk["error"]}
+                if chunk.get("done"):
+                    break
+
+    except Exception as e:
+        logging.error(f"[AI][Ollama] Error: {e}")
+        return provider_error(e)
+
+    logging.error("[AI][Ollama] No JSON found in streamed response")
+    return {"status": "error", "message": "No JSON found in Ollama response"}
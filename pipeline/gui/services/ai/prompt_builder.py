@@ -10,9 +10,36 @@ Supports:
   - motion_translate
   - sprite_suggest
   - sprite_refine
+
+Compact mode (AI_COMPACT_PROMPTS, on by default) post-processes every
+payload before it is sent:
+  - expected_output that repeats an input object becomes a {"$ref"}
+    pointer to it instead of a second copy
+  - reference descriptions lose file paths and empty/"unknown" fields
+    and are deduplicated
+  - the payload is trimmed to the task's token budget
+  - payloads are serialized without whitespace
 """
 
+import os
+import copy
 import json
+import logging
+import threading
+
+AI_COMPACT_PROMPTS = os.getenv("AI_COMPACT_PROMPTS", "1") == "1"
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "2048"))
+
+# Per-task overrides of AI_PROMPT_TOKEN_BUDGET
+TASK_TOKEN_BUDGETS = {
+    "sprite_suggest": 1536,
+    "sprite_refine": 1536,
+}
+
+# Shortest a reference description string is cut down to
+MIN_DESCRIPTION_CHARS = 80
+
+REF_RULE = "expected_output values of the form {\"$ref\": \"#/input/x\"} mean: same structure as input.x"
 
 
 def _json(obj):
@@ -20,6 +47,26 @@ def _json(obj):
     return json.dumps(obj, ensure_ascii=False)
 
 
+def serialize_payload(payload: dict) -> str:
+    """The prompt text providers send for a payload."""
+    if AI_COMPACT_PROMPTS:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(payload)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough llama-style token count (~4 characters per token for JSON-ish
+    English). Good enough for budgets; not a tokenizer.
+    """
+    return max(1, tokens_for_chars(len(text)))
+
+
+def tokens_for_chars(count: int) -> int:
+    """estimate_tokens() for `count` characters of text not kept around."""
+    return (count + 3) // 4
+
+
 # ------------------------------------------------------------
 #  MOTION PROMPTS
 # ------------------------------------------------------------
@@ -75,7 +122,7 @@ def build_motion_suggest_prompt(user_prompt: str, preset: dict):
             }
         }
     }
-    return payload
+    return finalize_payload(payload)
 
 
 def build_motion_refine_prompt(user_prompt: str, existing_motion: dict):
@@ -103,7 +150,7 @@ def build_motion_refine_prompt(user_prompt: str, existing_motion: dict):
             "motion": existing_motion
         }
     }
-    return payload
+    return finalize_payload(payload)
 
 
 def build_motion_style_prompt(style_name: str, existing_motion: dict):
@@ -131,7 +178,7 @@ def build_motion_style_prompt(style_name: str, existing_motion: dict):
             "motion": existing_motion
         }
     }
-    return payload
+    return finalize_payload(payload)
 
 
 def build_motion_translation_prompt(existing_motion: dict, target_language: str):
@@ -159,7 +206,7 @@ def build_motion_translation_prompt(existing_motion: dict, target_language: str)
             "motion": existing_motion
         }
     }
-    return payload
+    return finalize_payload(payload)
 
 
 # ------------------------------------------------------------
@@ -196,7 +243,7 @@ def build_sprite_suggest_prompt(user_prompt: str, preset: dict, reference_descri
             }
         }
     }
-    return payload
+    return finalize_payload(payload)
 
 
 def build_sprite_refine_prompt(user_prompt: str, existing_prompt: dict, reference_descriptions: list):
@@ -227,4 +274,162 @@ def build_sprite_refine_prompt(user_prompt: str, existing_prompt: dict, referenc
             "sprite_prompt": existing_prompt
         }
     }
-    return payload
+    return finalize_payload(payload)
+
+
+# ------------------------------------------------------------
+#  COMPACT MODE
+# ------------------------------------------------------------
+
+class PromptReport:
+    """Estimated prompt tokens per task, full vs compact."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = {}
+
+    def record(self, task: str, full_tokens: int, compact_tokens: int, truncated: bool, fitted: bool = True):
+        with self._lock:
+            entry = self._tasks.setdefault(task, {
+                "prompts": 0, "full_tokens": 0, "compact_tokens": 0, "truncated": 0, "over_budget": 0,
+            })
+            entry["prompts"] += 1
+            entry["full_tokens"] += full_tokens
+            entry["compact_tokens"] += compact_tokens
+            entry["truncated"] += int(truncated)
+            entry["over_budget"] += int(not fitted)
+
+    def report(self) -> dict:
+        with self._lock:
+            tasks = {}
+            for task, entry in self._tasks.items():
+                saved = entry["full_tokens"] - entry["compact_tokens"]
+                tasks[task] = {
+                    **entry,
+                    "tokens_saved": saved,
+                    "saved_pct": round(100 * saved / entry["full_tokens"], 1) if entry["full_tokens"] else 0.0,
+                }
+            return {"compact": AI_COMPACT_PROMPTS, "tasks": tasks}
+
+
+prompt_report = PromptReport()
+
+
+# Descriptor fields that identify the image rather than describe it
+DESCRIPTION_BOOKKEEPING = ("path", "hash", "cached")
+
+
+def _compact_description(desc):
+    if isinstance(desc, dict):
+        return {
+            k: v for k, v in desc.items()
+            if k not in DESCRIPTION_BOOKKEEPING and v not in (None, "", [], {}, "unknown")
+        }
+    if isinstance(desc, str):
+        return " ".join(desc.split())
+    return desc
+
+
+def _dedupe(items: list) -> list:
+    seen = set()
+    unique = []
+    for item in items:
+        key = json.dumps(item, sort_keys=True, ensure_ascii=False)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def _longest_string(obj, parent=None, key=None, best=None):
+    """(container, key, length) of the longest string leaf in obj."""
+    if isinstance(obj, str):
+        if best is None or len(obj) > best[2]:
+            return (parent, key, len(obj))
+        return best
+    items = obj.items() if isinstance(obj, dict) else enumerate(obj) if isinstance(obj, list) else []
+    for k, v in items:
+        best = _longest_string(v, obj, k, best)
+    return best
+
+
+def _fit_budget(payload: dict, budget: int) -> tuple:
+    """
+    Shrinks reference descriptions (halving the longest string, then
+    dropping the last description) and then preset strings until the
+    payload fits. The user prompt and the object being edited are never
+    touched. Every pass strictly shrinks the payload, so this always
+    terminates. Returns (truncated, fitted).
+    """
+    inputs = payload.get("input", {})
+    truncated = False
+
+    def over():
+        return estimate_tokens(serialize_payload(payload)) > budget
+
+    for field in ("reference_descriptions", "preset"):
+        target = inputs.get(field)
+        while target and over():
+            truncated = True
+            longest = _longest_string(target)
+            if longest and longest[2] > MIN_DESCRIPTION_CHARS:
+                container, key, length = longest
+                # The marker counts towards the minimum, so a cut string is
+                # at most MIN_DESCRIPTION_CHARS long and never picked again
+                keep = max(MIN_DESCRIPTION_CHARS - 1, length // 2)
+                container[key] = container[key][:keep].rstrip() + "…"
+            elif isinstance(target, list):
+                target.pop()
+            else:
+                break
+
+    fitted = not over()
+    if not fitted:
+        logging.warning(
+            f"[AI] Prompt for '{payload.get('task')}' is still over its "
+            f"{budget}-token budget after truncation"
+        )
+    return truncated, fitted
+
+
+def compact_payload(payload: dict) -> dict:
+    compact = copy.deepcopy(payload)
+    inputs = compact.get("input", {})
+    expected = compact.get("expected_output")
+
+    # expected_output → $ref where it only repeats an input object
+    if isinstance(expected, dict):
+        for out_key, value in list(expected.items()):
+            for in_key, in_value in inputs.items():
+                if isinstance(value, dict) and value and value == in_value:
+                    expected[out_key] = {"$ref": f"#/input/{in_key}"}
+                    break
+
+        if REF_RULE not in compact["instructions"]["rules"] and any(
+            isinstance(v, dict) and "$ref" in v for v in expected.values()
+        ):
+            compact["instructions"]["rules"].append(REF_RULE)
+
+    if isinstance(inputs.get("reference_descriptions"), list):
+        inputs["reference_descriptions"] = _dedupe(
+            [_compact_description(d) for d in inputs["reference_descriptions"]]
+        )
+
+    return compact
+
+
+def finalize_payload(payload: dict) -> dict:
+    """Applies compact mode (if enabled) and records the token report."""
+    full_tokens = estimate_tokens(json.dumps(payload))
+    if not AI_COMPACT_PROMPTS:
+        prompt_report.record(payload["task"], full_tokens, full_tokens, False)
+        return payload
+
+    compact = compact_payload(payload)
+    budget = TASK_TOKEN_BUDGETS.get(payload["task"], AI_PROMPT_TOKEN_BUDGET)
+    truncated, fitted = _fit_budget(compact, budget)
+
+    prompt_report.record(
+        payload["task"], full_tokens, estimate_tokens(serialize_payload(compact)), truncated, fitted
+    )
+    return compact
@@ -1,45 +1,296 @@
 # services/ai/provider.py
 import os
+import time
 import logging
-from .ollama_provider import call_ollama
-from .groq_provider import call_groq
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from .registry import PROVIDERS, PROBES, MODELS
+from .health import register as register_breaker, is_transport_error
+from .response_cache import cache_key, get_response_cache
+from .latency import latency
+from .schema import conform, output_stats
 
 AI_MODE = os.getenv("AI_MODE", "hybrid").lower()  # "ollama", "groq", or "hybrid"
 
+# Hybrid strategy:
+#   "fallback" – wait for Ollama, then try Groq if it failed
+#   "hedge"    – start Groq too if Ollama hasn't answered after the hedge delay
+#   "race"     – start both at once
+AI_HYBRID_STRATEGY = os.getenv("AI_HYBRID_STRATEGY", "hedge").lower()
 
-def run_ai_task(task: str, payload: dict) -> dict:
+# "auto" derives the delay from Ollama's recent latency percentile
+AI_HEDGE_DELAY = os.getenv("AI_HEDGE_DELAY", "auto")
+AI_HEDGE_PERCENTILE = float(os.getenv("AI_HEDGE_PERCENTILE", "90"))
+AI_HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", "1.0"))
+AI_HEDGE_MAX_DELAY = float(os.getenv("AI_HEDGE_MAX_DELAY", "20.0"))
+AI_HEDGE_DEFAULT_DELAY = float(os.getenv("AI_HEDGE_DEFAULT_DELAY", "8.0"))
+AI_HEDGE_MIN_SAMPLES = 5
+
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AI_HEDGE_WORKERS", "8")),
+    thread_name_prefix="ai-hedge",
+)
+
+PROVIDER_MODELS = MODELS
+
+# Concurrent in-flight calls per provider (a local Ollama serves one
+# generation at a time; Groq is limited by its rate limits instead)
+PROVIDER_CONCURRENCY = {
+    "ollama": int(os.getenv("AI_CONCURRENCY_OLLAMA", "1")),
+    "groq": int(os.getenv("AI_CONCURRENCY_GROQ", "4")),
+}
+_provider_slots = {name: threading.BoundedSemaphore(PROVIDER_CONCURRENCY.get(name, 1)) for name in PROVIDERS}
+
+# Consecutive failures open a provider's breaker; routing then skips it
+# until a background probe sees it healthy again
+breakers = {name: register_breaker(name, PROBES.get(name)) for name in PROVIDERS}
+
+# Providers each mode may answer from, in preference order
+MODE_PROVIDERS = {
+    "groq": ["groq"],
+    "ollama": ["ollama"],
+    "hybrid": ["ollama", "groq"],
+}
+
+
+class _CancelScope:
+    """A hedge leg's cancel flag; also reads as set once the caller cancels."""
+
+    def __init__(self, parent=None):
+        self._event = threading.Event()
+        self._parent = parent
+
+    def set(self):
+        self._event.set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set() or (self._parent is not None and self._parent.is_set())
+
+    @property
+    def lost(self) -> bool:
+        """Cancelled because the other leg answered first (not by the caller)."""
+        return self._event.is_set()
+
+
+def _cancelled(cancel) -> bool:
+    return cancel is not None and cancel.is_set()
+
+
+def _lookup_cached(task: str, payload: dict):
+    cache = get_response_cache()
+    for name in MODE_PROVIDERS.get(AI_MODE, []):
+        result = cache.get(cache_key(task, payload, name, PROVIDER_MODELS[name]))
+        if result is not None:
+            logging.info(f"[AI] Cache hit for task '{task}' ({name})")
+            return result
+    return None
+
+
+def _is_valid(result) -> bool:
+    return isinstance(result, dict) and result.get("status") != "error"
+
+
+def _available(names):
+    return [name for name in names if breakers[name].available()]
+
+
+def _call(name: str, task: str, payload: dict, on_delta=None, cancel=None) -> dict:
+    """
+    Calls a provider, records its latency and caches successful results
+    under its name/model. on_delta(provider, text) receives streamed text;
+    `cancel` is handed to the provider so a losing hedge can stop early.
+    At most PROVIDER_CONCURRENCY[name] calls run at once, and none while
+    the provider's circuit breaker is open.
+    """
+    if not breakers[name].allow():
+        return {"status": "error", "message": f"{name} is unavailable (circuit open)"}
+
+    kwargs = {}
+    if on_delta:
+        kwargs["on_delta"] = lambda text: on_delta(name, text)
+    if cancel is not None:
+        kwargs["cancel"] = cancel
+
+    with _provider_slots[name]:
+        if cancel is not None and cancel.is_set():
+            return {"status": "error", "message": "Cancelled"}
+        return _call_provider(name, task, payload, kwargs, cancel)
+
+
+def _call_provider(name: str, task: str, payload: dict, kwargs: dict, cancel) -> dict:
+    start = time.monotonic()
+    ok = False
+    try:
+        try:
+            result = PROVIDERS[name](task, payload, **kwargs)
+        except Exception as e:
+            if (cancel is None or not cancel.is_set()) and is_transport_error(e):
+                breakers[name].record_failure(str(e))
+            raise
+
+        # Health is about reaching the model; a bad answer (no JSON, schema
+        # miss) still proves it is reachable
+        if cancel is None or not cancel.is_set():
+            if isinstance(result, dict) and result.get("transport"):
+                breakers[name].record_failure(result.get("message"))
+            else:
+                breakers[name].record_success()
+
+        if _is_valid(result):
+            # Check against expected_output; near misses are repaired here
+            # instead of costing another model call
+            result, outcome = conform(result, payload)
+            if cancel is None or not cancel.is_set():
+                output_stats.record(name, outcome)
+        ok = _is_valid(result)
+    finally:
+        elapsed = time.monotonic() - start
+        if cancel is None or not cancel.is_set():
+            latency.record(name, elapsed, ok)
+        else:
+            # A leg that lost the race would have taken at least this long;
+            # dropping it would hide exactly the slow calls hedging is for
+            latency.record_cancelled(name, elapsed, lower_bound=getattr(cancel, "lost", False))
+
+    if ok:
+        get_response_cache().put(cache_key(task, payload, name, PROVIDER_MODELS[name]), result)
+    return result
+
+
+def hedge_delay() -> float:
+    """Seconds to wait for Ollama before also asking Groq."""
+    if AI_HEDGE_DELAY != "auto":
+        return float(AI_HEDGE_DELAY)
+
+    if latency.count("ollama") < AI_HEDGE_MIN_SAMPLES:
+        return AI_HEDGE_DEFAULT_DELAY
+
+    observed = latency.percentile("ollama", AI_HEDGE_PERCENTILE)
+    return min(AI_HEDGE_MAX_DELAY, max(AI_HEDGE_MIN_DELAY, observed))
+
+
+def _run_hedged(task: str, payload: dict, delay: float, on_delta=None, cancel=None) -> dict:
+    """
+    Starts Ollama, and Groq as well once `delay` seconds pass without a
+    valid Ollama answer (or straight away if Ollama fails first). The first
+    valid result wins; the other call is cancelled (it stops at its next
+    streamed chunk, or never starts). Setting `cancel` stops both.
+    """
+    cancels = {"ollama": _CancelScope(cancel), "groq": _CancelScope(cancel)}
+    futures = {
+        _hedge_executor.submit(_call, "ollama", task, payload, on_delta, cancels["ollama"]): "ollama"
+    }
+    backup_started = False
+    errors = []
+
+    def start_backup(reason: str):
+        nonlocal backup_started
+        logging.info(f"[AI] Starting Groq ({reason})")
+        future = _hedge_executor.submit(_call, "groq", task, payload, on_delta, cancels["groq"])
+        futures[future] = "groq"
+        backup_started = True
+        return future
+
+    if delay <= 0:
+        start_backup("race")
+
+    deadline = time.monotonic() + delay
+    pending = set(futures)
+
+    while pending:
+        timeout = None if backup_started else max(0.0, deadline - time.monotonic())
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"[AI] {name} exception: {e}")
+                errors.append(f"{name}: {e}")
+                continue
+
+            if _is_valid(result):
+                for other in pending:
+                    cancels[futures[other]].set()
+                    other.cancel()
+                logging.info(f"[AI] {name} answered first")
+                return result
+
+            errors.append(f"{name}: {result.get('message') if isinstance(result, dict) else result}")
+
+        if not backup_started:
+            if _cancelled(cancel):
+                break
+            if done:
+                output_stats.record_recall()
+            pending.add(start_backup("Ollama failed" if done else f"hedge after {delay:.1f}s"))
+
+    if _cancelled(cancel):
+        return {"status": "error", "message": "Cancelled"}
+    logging.error(f"[AI] Hedged call failed: {errors}")
+    return {"status": "error", "message": "Both Ollama and Groq failed", "errors": errors}
+
+
+def run_ai_task(task: str, payload: dict, use_cache: bool = True, on_delta=None, cancel=None) -> dict:
     """
     Canonical AI entry point.
     The API layer builds the payload using prompt_builder.
     This function routes to the active provider with fallback logic.
+
+    Identical requests are answered from the response cache;
+    use_cache=False skips the lookup (the fresh result is still cached).
+    on_delta(provider, text) receives generated text as it streams;
+    setting the `cancel` event stops generation at the next chunk.
     """
 
     logging.info(f"[AI] Running task '{task}' via mode '{AI_MODE}'")
 
+    if use_cache:
+        cached = _lookup_cached(task, payload)
+        if cached is not None:
+            return cached
+
+    output_stats.record_task()
+
     # -----------------------------
     # MODE: GROQ ONLY
     # -----------------------------
     if AI_MODE == "groq":
         logging.info("[AI] Using Groq provider (forced mode)")
-        return call_groq(task, payload)
+        return _call("groq", task, payload, on_delta, cancel)
 
     # -----------------------------
     # MODE: OLLAMA ONLY
     # -----------------------------
     if AI_MODE == "ollama":
         logging.info("[AI] Using Ollama provider (forced mode)")
-        return call_ollama(task, payload)
+        return _call("ollama", task, payload, on_delta, cancel)
 
     # -----------------------------
     # MODE: HYBRID (Ollama → Groq)
     # -----------------------------
+    if AI_MODE == "hybrid":
+        available = _available(MODE_PROVIDERS["hybrid"])
+        if not available:
+            logging.error("[AI] All providers are unavailable (circuits open)")
+            return {"status": "error", "message": "All AI providers are unavailable"}
+        if len(available) == 1:
+            logging.info(f"[AI] Using {available[0]} only (other provider's circuit is open)")
+            return _call(available[0], task, payload, on_delta, cancel)
+
+    if AI_MODE == "hybrid" and AI_HYBRID_STRATEGY in ("hedge", "race"):
+        delay = 0.0 if AI_HYBRID_STRATEGY == "race" else hedge_delay()
+        logging.info(f"[AI] Using hybrid mode ({AI_HYBRID_STRATEGY}, Groq after {delay:.1f}s)")
+        return _run_hedged(task, payload, delay, on_delta, cancel)
+
     if AI_MODE == "hybrid":
         logging.info("[AI] Using hybrid mode (Ollama → Groq fallback)")
 
         # 1. Try Ollama first
         try:
             logging.info("[AI] Trying Ollama first...")
-            result = call_ollama(task, payload)
+            result = _call("ollama", task, payload, on_delta, cancel)
 
             if isinstance(result, dict) and result.get("status") != "error":
                 logging.info("[AI] Ollama succeeded")
@@ -52,9 +303,12 @@ def run_ai_task(task: str, payload: dict) -> dict:
             logging.warning("[AI] Falling back to Groq")
 
         # 2. Try Groq second
+        if _cancelled(cancel):
+            return {"status": "error", "message": "Cancelled"}
+        output_stats.record_recall()
         try:
             logging.info("[AI] Trying Groq fallback...")
-            return call_groq(task, payload)
+            return _call("groq", task, payload, on_delta, cancel)
 
         except Exception as e:
             logging.error(f"[AI] Groq exception: {e}")
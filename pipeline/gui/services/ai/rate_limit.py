@@ -0,0 +1,216 @@
+# services/ai/rate_limit.py
+"""
+Client-side rate limiting for Groq.
+
+Two token buckets (requests per minute, tokens per minute) gate every
+call. Callers queue in FIFO order until both buckets can cover them,
+instead of firing and collecting 429s. The buckets are corrected from
+Groq's x-ratelimit-* response headers, and a 429's Retry-After pauses
+the whole queue.
+"""
+
+import re
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from Groq reset headers ("7.66s", "2m59.56s", "250ms") or plain numbers."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if matched else None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as delta-seconds or an HTTP date."""
+    seconds = parse_duration(value)
+    if seconds is not None:
+        return seconds
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self.stamp = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60.0
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, amount: float) -> float:
+        # A single request larger than the bucket only waits for a full one
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, rpm: float, tpm: float, queue_timeout: float):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned = set()
+        self._paused_until = 0.0
+
+        self.waiting = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.timeouts = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _advance(self):
+        self._serving += 1
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+        self._cond.notify_all()
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Blocks until one request and `tokens` tokens are available, in
+        arrival order. Returns the seconds spent queued.
+        """
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if ticket == self._serving:
+                        self.requests.refill(now)
+                        self.tokens.refill(now)
+                        wait = max(
+                            self._paused_until - now,
+                            self.requests.wait_time(1),
+                            self.tokens.wait_time(tokens),
+                        )
+                        if wait <= 0:
+                            self.requests.level -= 1
+                            self.tokens.level -= min(tokens, self.tokens.capacity)
+                            self._advance()
+                            break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        if ticket == self._serving:
+                            self._advance()
+                        else:
+                            self._abandoned.add(ticket)
+                        raise RateLimitTimeout(f"Waited {self.queue_timeout:.0f}s for Groq rate limit")
+
+                    self._cond.wait(min(wait, remaining) if wait is not None else remaining)
+            finally:
+                self.waiting -= 1
+
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            return waited
+
+    def settle(self, estimated: int, actual: int):
+        """Corrects the token bucket once a call's real usage is known."""
+        with self._cond:
+            self.tokens.refill(time.monotonic())
+            # Over-estimates refund tokens, but never past a full bucket
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated - actual)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def on_throttled(self, retry_after: Optional[float]):
+        """A 429 came back: stop everyone for Retry-After (or a second)."""
+        with self._cond:
+            self.throttled += 1
+            self.tokens.level = min(self.tokens.level, 0)
+        self.pause(retry_after if retry_after is not None else 1.0)
+
+    def update_from_headers(self, headers):
+        """
+        Groq reports tokens-per-minute and requests-per-day state:
+        x-ratelimit-{limit,remaining,reset}-{tokens,requests}.
+        """
+        def number(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        limit_tokens = number("x-ratelimit-limit-tokens")
+        remaining_tokens = number("x-ratelimit-remaining-tokens")
+        remaining_requests = number("x-ratelimit-remaining-requests")
+
+        with self._cond:
+            if limit_tokens:
+                self.tokens.capacity = limit_tokens
+            if remaining_tokens is not None:
+                self.tokens.refill(time.monotonic())
+                self.tokens.level = min(self.tokens.level, remaining_tokens)
+
+        if remaining_requests is not None and remaining_requests <= 0:
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self.pause(reset)
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            self.tokens.refill(now)
+            self.requests.refill(now)
+            return {
+                "rpm": self.requests.capacity,
+                "tpm": self.tokens.capacity,
+                "requests_available": round(self.requests.level, 2),
+                "tokens_available": round(self.tokens.level),
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                "admitted": self.admitted,
+                "timeouts": self.timeouts,
+                "throttled_429": self.throttled,
+                "avg_wait": round(self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+                "max_wait": round(self.max_wait, 3),
+                "paused_for": round(max(0.0, self._paused_until - now), 3),
+            }
@@ -1,7 +1,7 @@
 # services/ai/registry.py
 
-from services.ai.groq_provider import call_groq
-from services.ai.ollama_provider import call_ollama
+from services.ai.groq_provider import call_groq, probe_groq, GROQ_MODEL
+from services.ai.ollama_provider import call_ollama, probe_ollama, OLLAMA_MODEL
 
 PROVIDERS = {
     "groq": call_groq,
@@ -9,3 +9,14 @@ PROVIDERS = {
     # "openai": call_openai,        # future
     # "anthropic": call_anthropic,  # future
 }
+
+# Cheap health checks used to close an open circuit breaker
+PROBES = {
+    "groq": probe_groq,
+    "ollama": probe_ollama,
+}
+
+MODELS = {
+    "groq": GROQ_MODEL,
+    "ollama": OLLAMA_MODEL,
+}
@@ -0,0 +1,163 @@
+# services/ai/response_cache.py
+"""
+LLM response cache for run_ai_task.
+
+Key: task + canonical JSON of the prompt_builder payload + provider + model.
+
+Two tiers:
+  - in-memory LRU (AI_CACHE_MAX_ENTRIES)
+  - optional SQLite file (AI_CACHE_SQLITE=path) that survives restarts
+
+Entries expire after AI_CACHE_TTL seconds in both tiers. Error results
+are never stored.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from services.disk_cache import CACHES
+
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "3600"))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "256"))
+AI_CACHE_SQLITE = os.getenv("AI_CACHE_SQLITE", "")
+
+
+def cache_key(task: str, payload: dict, provider: str, model: str) -> str:
+    canonical = json.dumps(
+        {"task": task, "payload": payload, "provider": provider, "model": model},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, ttl: float, max_entries: int, sqlite_path: str = ""):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path
+
+        self.memory_hits = 0
+        self.sqlite_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires, json)
+        self._db = self._open_db(sqlite_path) if sqlite_path else None
+
+        CACHES["ai"] = self
+
+    @staticmethod
+    def _open_db(path: str) -> Optional[sqlite3.Connection]:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, expires REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+            db.commit()
+            return db
+        except Exception as e:
+            logging.error(f"[AI][Cache] SQLite tier disabled ({path}): {e}")
+            return None
+
+    def _remember(self, key: str, expires: float, value: str):
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return json.loads(item[1])
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT expires, value FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                except Exception as e:
+                    logging.error(f"[AI][Cache] SQLite read failed: {e}")
+                    row = None
+                if row and row[0] > now:
+                    self._remember(key, row[0], row[1])
+                    self.sqlite_hits += 1
+                    return json.loads(row[1])
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        expires = time.time() + self.ttl
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, expires, encoded)
+            self.stores += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, expires, value) VALUES (?, ?, ?)",
+                        (key, expires, encoded),
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logging.error(f"[AI][Cache] SQLite write failed: {e}")
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._memory)
+            self._memory.clear()
+            if self._db is not None:
+                count = max(count, self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0])
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.sqlite_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "sqlite": self.sqlite_path if self._db is not None else None,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "sqlite_hits": self.sqlite_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(AI_CACHE_TTL, AI_CACHE_MAX_ENTRIES, AI_CACHE_SQLITE)
+        return _cache
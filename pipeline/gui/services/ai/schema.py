@@ -0,0 +1,291 @@
+# services/ai/schema.py
+"""
+Structured-output support for prompt_builder tasks.
+
+Each payload's "expected_output" is an example document: placeholder
+strings ("string", "number", ...) for suggest tasks, or the existing
+object itself for refine / style / translate tasks. From it we derive
+
+  - a JSON Schema, passed to Ollama as its `format` constraint
+  - a local validator and repair pass, so near-miss answers (missing
+    placeholder fields, "1.5" instead of 1.5, the object without its
+    wrapper key) are fixed without asking another model. A field missing
+    from a refine / style / translate answer is not filled from the input
+    it was meant to change; that answer stays invalid and is re-asked.
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Tuple
+
+PLACEHOLDER_TYPES = {
+    "string": "string",
+    "number": "number",
+    "integer": "integer",
+    "boolean": "boolean",
+}
+
+_PY_TYPES = {
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+}
+
+
+# ---------------------------------------------------------
+# Schema derivation
+# ---------------------------------------------------------
+
+def schema_from_example(example: Any) -> Dict[str, Any]:
+    if isinstance(example, str):
+        return {"type": PLACEHOLDER_TYPES.get(example, "string")}
+    if isinstance(example, bool):
+        return {"type": "boolean"}
+    if isinstance(example, (int, float)):
+        return {"type": "number"}
+    if isinstance(example, list):
+        return {"type": "array", "items": schema_from_example(example[0]) if example else {}}
+    if isinstance(example, dict):
+        if not example:
+            return {"type": "object"}
+        return {
+            "type": "object",
+            "properties": {k: schema_from_example(v) for k, v in example.items()},
+            "required": list(example.keys()),
+        }
+    return {}
+
+
+def _resolve_refs(value: Any, payload: dict) -> Any:
+    """Expands compact-mode {"$ref": "#/input/x"} pointers into the payload."""
+    if isinstance(value, dict):
+        ref = value.get("$ref")
+        if len(value) == 1 and isinstance(ref, str) and ref.startswith("#/"):
+            target = payload
+            for part in ref[2:].split("/"):
+                target = target.get(part) if isinstance(target, dict) else None
+            return target if target is not None else {}
+        return {k: _resolve_refs(v, payload) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_refs(v, payload) for v in value]
+    return value
+
+
+def expected_example(payload: dict):
+    """The payload's expected_output with $ref pointers resolved, or None."""
+    expected = payload.get("expected_output") if isinstance(payload, dict) else None
+    if not isinstance(expected, dict):
+        return None
+    return _resolve_refs(expected, payload)
+
+
+def task_schema(payload: dict):
+    """JSON Schema for a prompt_builder payload, or None without expected_output."""
+    expected = expected_example(payload)
+    if expected is None:
+        return None
+    return schema_from_example(expected)
+
+
+# ---------------------------------------------------------
+# Validation
+# ---------------------------------------------------------
+
+def _type_ok(value: Any, expected: str) -> bool:
+    if expected in ("number", "integer") and isinstance(value, bool):
+        return False
+    return isinstance(value, _PY_TYPES[expected])
+
+
+def validate(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    errors = []
+    expected = schema.get("type")
+
+    if expected and not _type_ok(value, expected):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    if expected == "object":
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: missing")
+        for key, sub in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(validate(value[key], sub, f"{path}.{key}"))
+
+    if expected == "array" and schema.get("items"):
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
+
+# ---------------------------------------------------------
+# Repair
+# ---------------------------------------------------------
+
+def _is_placeholder(example: Any) -> bool:
+    """True when the example holds only type placeholders, no real input data."""
+    if isinstance(example, str):
+        return example in PLACEHOLDER_TYPES
+    if isinstance(example, dict):
+        return all(_is_placeholder(v) for v in example.values())
+    if isinstance(example, list):
+        return all(_is_placeholder(v) for v in example)
+    return False
+
+
+def _default(example: Any) -> Any:
+    """Fill value for a missing placeholder field."""
+    if isinstance(example, dict):
+        return {k: _default(v) for k, v in example.items()}
+    if isinstance(example, list):
+        return []
+    return {"string": "", "number": 0, "integer": 0, "boolean": False}[example]
+
+
+def _coerce(value: Any, expected: str) -> Tuple[Any, bool]:
+    try:
+        if expected in ("number", "integer") and isinstance(value, str):
+            number = float(value.strip())
+            if expected == "integer" or number.is_integer():
+                number = int(number)
+            return number, True
+        if expected == "string" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value), True
+        if expected == "string" and isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return ", ".join(value), True
+        if expected == "array" and isinstance(value, str):
+            return [value], True
+        if expected == "boolean" and isinstance(value, str) and value.lower() in ("true", "false"):
+            return value.lower() == "true", True
+    except ValueError:
+        pass
+    return value, False
+
+
+def _repair(value: Any, example: Any, schema: Dict[str, Any]) -> Tuple[Any, bool]:
+    expected = schema.get("type")
+    if not expected:
+        return value, False
+
+    if not _type_ok(value, expected):
+        value, changed = _coerce(value, expected)
+        if not changed:
+            return value, False
+        return value, True
+
+    changed = False
+    if expected == "object" and isinstance(example, dict):
+        value = dict(value)
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key not in value:
+                # Only suggest-style placeholders are filled; copying real
+                # input back in would pass off the unchanged input as an answer
+                if _is_placeholder(example[key]):
+                    value[key] = _default(example[key])
+                    changed = True
+                continue
+            value[key], sub_changed = _repair(value[key], example[key], sub_schema)
+            changed = changed or sub_changed
+
+    elif expected == "array" and schema.get("items") and isinstance(example, list) and example:
+        items = []
+        for item in value:
+            item, sub_changed = _repair(item, example[0], schema["items"])
+            items.append(item)
+            changed = changed or sub_changed
+        value = items
+
+    return value, changed
+
+
+def repair(value: Any, example: Dict[str, Any], schema: Dict[str, Any]) -> Tuple[Any, bool]:
+    """
+    Returns (value, changed). Besides field-level fixes, an answer that is
+    the single wrapped object without its wrapper key ({"overall": ...}
+    instead of {"motion": {"overall": ...}}) is re-wrapped.
+    """
+    if not isinstance(value, dict):
+        return value, False
+
+    changed = False
+    required = schema.get("required", [])
+    if len(required) == 1 and required[0] not in value:
+        key = required[0]
+        inner = schema["properties"][key]
+        if inner.get("type") == "object" and set(value) & set(inner.get("properties", {})):
+            value = {key: value}
+            changed = True
+
+    value, fixed = _repair(value, example, schema)
+    return value, changed or fixed
+
+
+def conform(result: Any, payload: dict) -> Tuple[Any, str]:
+    """
+    Validates a provider result against the payload's expected_output,
+    repairing near misses. Returns (result, outcome) where outcome is
+    "valid", "repaired", "invalid" or "unchecked" (no schema).
+    """
+    schema = task_schema(payload)
+    if schema is None:
+        return result, "unchecked"
+
+    if not validate(result, schema):
+        return result, "valid"
+
+    repaired, changed = repair(result, expected_example(payload), schema)
+    if changed and not validate(repaired, schema):
+        return repaired, "repaired"
+
+    errors = validate(repaired, schema)
+    return {
+        "status": "error",
+        "message": "AI output does not match the expected schema",
+        "errors": errors[:10],
+    }, "invalid"
+
+
+# ---------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------
+
+class StructuredOutputStats:
+    """
+    Per-provider outcome counts, plus how often a task needed a second
+    provider call (the re-call rate).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outcomes: Dict[str, Dict[str, int]] = {}
+        self.tasks = 0
+        self.recalls = 0
+
+    def record(self, provider: str, outcome: str):
+        with self._lock:
+            counts = self._outcomes.setdefault(provider, {"valid": 0, "repaired": 0, "invalid": 0, "unchecked": 0})
+            counts[outcome] += 1
+
+    def record_task(self):
+        with self._lock:
+            self.tasks += 1
+
+    def record_recall(self):
+        with self._lock:
+            self.recalls += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tasks": self.tasks,
+                "recalls": self.recalls,
+                "recall_rate": round(self.recalls / self.tasks, 4) if self.tasks else None,
+                "providers": json.loads(json.dumps(self._outcomes)),
+            }
+
+
+output_stats = StructuredOutputStats()
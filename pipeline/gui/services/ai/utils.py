@@ -1,27 +1,104 @@
 # services/ai/utils.py
 import json
 
+
+class IncrementalJSONExtractor:
+    """
+    Single-pass, string-aware scanner for top-level JSON objects in text
+    that arrives in pieces (streamed LLM output).
+
+    feed() returns the objects completed by each piece; partial() returns
+    a best-effort parse of the object still being written, with open
+    strings / brackets closed, for progress display.
+    """
+
+    def __init__(self):
+        self.objects = []
+        self._reset()
+
+    def _reset(self):
+        self._buf = []
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        # Last point where the open object could be cut and closed cleanly
+        self._safe = None
+
+    @property
+    def in_object(self) -> bool:
+        return bool(self._stack)
+
+    def feed(self, text: str) -> list:
+        found = []
+
+        for ch in text:
+            if not self._stack:
+                if ch == "{":
+                    self._buf = [ch]
+                    self._stack = ["}"]
+                continue
+
+            if self._in_string:
+                self._buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == ",":
+                self._safe = (len(self._buf), list(self._stack))
+            self._buf.append(ch)
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._stack.append("}")
+            elif ch == "[":
+                self._stack.append("]")
+            elif ch in "}]":
+                if ch != self._stack[-1]:
+                    # Unbalanced: drop the candidate and rescan from here
+                    self._reset()
+                    continue
+                self._stack.pop()
+                if not self._stack:
+                    chunk = "".join(self._buf)
+                    self._reset()
+                    try:
+                        found.append(json.loads(chunk))
+                    except ValueError:
+                        pass
+
+        self.objects.extend(found)
+        return found
+
+    def partial(self):
+        if not self._stack:
+            return None
+
+        text = "".join(self._buf)
+        candidates = [
+            text + ('"' if self._in_string else "") + "".join(reversed(self._stack)),
+        ]
+        if self._safe:
+            cut, stack = self._safe
+            candidates.append(text[:cut] + "".join(reversed(stack)))
+
+        for candidate in candidates:
+            try:
+                value = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(value, dict):
+                return value
+        return None
+
+
 def extract_json_objects(text: str):
-    objs = []
-    depth = 0
-    start = None
-
-    for i, ch in enumerate(text):
-        if ch == '{':
-            if depth == 0:
-                start = i
-            depth += 1
-        elif ch == '}':
-            depth -= 1
-            if depth == 0 and start is not None:
-                chunk = text[start:i+1]
-                try:
-                    objs.append(json.loads(chunk))
-                except Exception:
-                    pass
-                start = None
-
-    return objs
+    return IncrementalJSONExtractor().feed(text)
 
 
 def extract_best_json(text: str):
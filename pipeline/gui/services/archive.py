@@ -0,0 +1,172 @@
+# services/archive.py
+"""
+SpriteForge – Streaming Archives
+--------------------------------
+ZIP / tar downloads of whole directories (motion frames, projects),
+generated while the response is being sent:
+
+- no temp file: archive bytes are handed to the client as they are
+  produced, one file chunk at a time, so memory stays flat however big
+  the directory is
+- ZIP members that are already compressed (PNG, JPEG, WebP, MP4, ...)
+  are stored, everything else is deflated
+- tar is written header / data / padding by hand for the same reason
+  (tarfile.addfile would buffer a whole member)
+
+Only regular files are archived; symlinks are skipped so an archive
+never reaches outside the requested directory. Files that cannot be
+opened are left out; a read that fails part way ends that member early
+(tar pads it to its declared size) rather than aborting the download.
+"""
+
+import os
+import time
+import logging
+import tarfile
+import zipfile
+from typing import Iterator, Optional, Tuple
+
+from flask import Response, stream_with_context
+from werkzeug.utils import secure_filename
+
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+
+# ZIP timestamps cannot predate 1980
+ZIP_EPOCH = 315619200
+
+# Already-compressed formats; deflating them costs CPU for ~0% gain
+STORED_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".webp", ".gif",
+    ".mp4", ".webm", ".mov", ".mkv",
+    ".zip", ".gz", ".bz2", ".xz", ".7z",
+    ".safetensors",
+)
+
+
+class _Pipe:
+    """Write-only sink the archive writers fill and the generator drains."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_files(root: str) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """(path, relative name, stat) of every regular file under root, in a stable order."""
+    for current, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(current, name)
+            if os.path.islink(path):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield path, os.path.relpath(path, root).replace(os.sep, "/"), st
+
+
+def _open_member(path: str):
+    try:
+        return open(path, "rb")
+    except OSError as e:
+        logging.warning(f"[Archive] Skipping {path}: {e}")
+        return None
+
+
+def _read_chunks(f, path: str, size: Optional[int] = None) -> Iterator[bytes]:
+    remaining = size
+    try:
+        while remaining is None or remaining > 0:
+            chunk = f.read(ARCHIVE_CHUNK_SIZE if remaining is None else min(ARCHIVE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    except OSError as e:
+        logging.warning(f"[Archive] Read of {path} failed, member truncated: {e}")
+    if remaining:
+        # File shrank (or failed) while archiving; keep the tar header honest
+        yield b"\0" * remaining
+
+
+def stream_zip(root: str, prefix: str) -> Iterator[bytes]:
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, "w", allowZip64=True) as zf:
+        for path, name, st in iter_files(root):
+            f = _open_member(path)
+            if f is None:
+                continue
+            info = zipfile.ZipInfo(f"{prefix}/{name}", time.localtime(max(st.st_mtime, ZIP_EPOCH))[:6])
+            info.file_size = st.st_size
+            info.external_attr = (st.st_mode & 0xFFFF) << 16
+            info.compress_type = (
+                zipfile.ZIP_STORED if name.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+            )
+
+            with f, zf.open(info, "w") as member:
+                for chunk in _read_chunks(f, path):
+                    member.write(chunk)
+                    yield pipe.drain()
+            yield pipe.drain()
+
+    yield pipe.drain()
+
+
+def stream_tar(root: str, prefix: str) -> Iterator[bytes]:
+    for path, name, st in iter_files(root):
+        f = _open_member(path)
+        if f is None:
+            continue
+        info = tarfile.TarInfo(f"{prefix}/{name}")
+        info.size = st.st_size
+        info.mtime = int(st.st_mtime)
+        info.mode = st.st_mode & 0o7777
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+
+        with f:
+            yield from _read_chunks(f, path, st.st_size)
+
+        padding = -st.st_size % tarfile.BLOCKSIZE
+        if padding:
+            yield b"\0" * padding
+
+    # End-of-archive: two zero blocks
+    yield b"\0" * (2 * tarfile.BLOCKSIZE)
+
+
+ARCHIVE_FORMATS = {
+    "zip": (stream_zip, "application/zip"),
+    "tar": (stream_tar, "application/x-tar"),
+}
+
+
+def archive_response(root: str, archive_format: str = "zip", name: Optional[str] = None) -> Response:
+    """
+    Streaming download of `root` as <name>.<format>; members are stored
+    under <name>/. Raises ValueError for an unknown format.
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(ARCHIVE_FORMATS)}")
+
+    writer, mimetype = ARCHIVE_FORMATS[archive_format]
+    name = secure_filename(name or os.path.basename(os.path.normpath(root))) or "archive"
+
+    chunks = (chunk for chunk in writer(root, name) if chunk)
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{name}.{archive_format}"'
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,246 @@
+# services/atlas.py
+"""
+SpriteForge – Texture Atlas Layout
+----------------------------------
+Pure geometry for placing frames on atlas pages. No pixels are touched
+here; services/spritesheet.py renders the pages.
+
+- grid_layout():  fixed cells in row-major order (strip = one row)
+- pack_rects():   MaxRects bin packing (best short side fit) of
+                  arbitrary rectangles, e.g. alpha-trimmed frames
+
+Both split into as many pages as needed to stay within max_size and can
+round page dimensions up to powers of two.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+Rect = Tuple[int, int, int, int]  # x, y, w, h
+
+
+def next_power_of_two(value: int) -> int:
+    return 1 if value <= 1 else 1 << (value - 1).bit_length()
+
+
+def prev_power_of_two(value: int) -> int:
+    return 1 if value <= 1 else 1 << (value.bit_length() - 1)
+
+
+def _page(width: int, height: int, rects: Dict[int, Rect], power_of_two: bool) -> dict:
+    if power_of_two:
+        width, height = next_power_of_two(width), next_power_of_two(height)
+    return {"width": width, "height": height, "rects": rects}
+
+
+# ---------------------------------------------------------
+# Grid / strip
+# ---------------------------------------------------------
+
+def grid_layout(count: int, cell_w: int, cell_h: int,
+                rows: Optional[int] = None, columns: Optional[int] = None,
+                padding: int = 0, max_size: Optional[int] = None,
+                power_of_two: bool = False) -> List[dict]:
+    """
+    Lays out `count` equal cells row-major. With neither rows nor columns
+    the grid is roughly square. Cells beyond `rows` rows, or beyond what
+    fits within max_size, continue on a new page.
+    """
+    if count <= 0:
+        return []
+    if max_size and power_of_two:
+        max_size = prev_power_of_two(max_size)
+
+    rows = max(1, int(rows)) if rows else None
+    if columns:
+        columns = max(1, int(columns))
+    elif rows:
+        columns = math.ceil(count / rows)
+    else:
+        columns = math.ceil(math.sqrt(count))
+    rows_per_page = rows or math.ceil(count / columns)
+
+    if max_size:
+        fit_cols = (max_size + padding) // (cell_w + padding)
+        fit_rows = (max_size + padding) // (cell_h + padding)
+        if fit_cols < 1 or fit_rows < 1:
+            raise ValueError(f"Frame {cell_w}x{cell_h} exceeds max texture size {max_size}")
+        columns = min(columns, fit_cols)
+        rows_per_page = min(rows or math.ceil(count / columns), fit_rows)
+
+    per_page = columns * rows_per_page
+    pages = []
+
+    for start in range(0, count, per_page):
+        indices = range(start, min(start + per_page, count))
+        used_rows = math.ceil(len(indices) / columns)
+        used_cols = min(columns, len(indices))
+
+        rects = {}
+        for slot, idx in enumerate(indices):
+            col, row = slot % columns, slot // columns
+            rects[idx] = (col * (cell_w + padding), row * (cell_h + padding), cell_w, cell_h)
+
+        width = used_cols * (cell_w + padding) - padding
+        height = used_rows * (cell_h + padding) - padding
+        pages.append(_page(width, height, rects, power_of_two))
+
+    return pages
+
+
+# ---------------------------------------------------------
+# MaxRects
+# ---------------------------------------------------------
+
+class MaxRectsBin:
+    """
+    MaxRects bin (Jukka Jylänki, "A Thousand Ways to Pack the Bin"),
+    best-short-side-fit heuristic, no rotation.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.free: List[Rect] = [(0, 0, width, height)]
+
+    def insert(self, w: int, h: int) -> Optional[Tuple[int, int]]:
+        best = None
+        best_short = best_long = math.inf
+
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                leftover_w, leftover_h = fw - w, fh - h
+                short, long = min(leftover_w, leftover_h), max(leftover_w, leftover_h)
+                if short < best_short or (short == best_short and long < best_long):
+                    best = (fx, fy)
+                    best_short, best_long = short, long
+
+        if best is None:
+            return None
+
+        self._split((best[0], best[1], w, h))
+        self._prune()
+        return best
+
+    def _split(self, used: Rect):
+        ux, uy, uw, uh = used
+        result = []
+
+        for free in self.free:
+            fx, fy, fw, fh = free
+            if ux >= fx + fw or ux + uw <= fx or uy >= fy + fh or uy + uh <= fy:
+                result.append(free)
+                continue
+
+            if ux > fx:
+                result.append((fx, fy, ux - fx, fh))
+            if ux + uw < fx + fw:
+                result.append((ux + uw, fy, fx + fw - ux - uw, fh))
+            if uy > fy:
+                result.append((fx, fy, fw, uy - fy))
+            if uy + uh < fy + fh:
+                result.append((fx, uy + uh, fw, fy + fh - uy - uh))
+
+        self.free = result
+
+    def _prune(self):
+        def contains(a: Rect, b: Rect) -> bool:
+            return (a[0] <= b[0] and a[1] <= b[1]
+                    and a[0] + a[2] >= b[0] + b[2] and a[1] + a[3] >= b[1] + b[3])
+
+        pruned = []
+        for i, rect in enumerate(self.free):
+            redundant = any(
+                contains(other, rect) and (other != rect or j < i)
+                for j, other in enumerate(self.free) if j != i
+            )
+            if not redundant:
+                pruned.append(rect)
+        self.free = pruned
+
+
+def pack_rects(sizes: List[Tuple[int, int]], max_size: int, padding: int = 0,
+               power_of_two: bool = False) -> List[dict]:
+    """
+    Packs rectangles (w, h) onto as few max_size x max_size pages as the
+    heuristic manages. Each page is cropped to its used extent.
+    Returns pages as {"width", "height", "rects": {index: (x, y, w, h)}}.
+    """
+    if power_of_two:
+        # Pages are rounded up, so pack within a size that stays in bounds
+        max_size = prev_power_of_two(max_size)
+    for w, h in sizes:
+        if w > max_size or h > max_size:
+            raise ValueError(f"Frame {w}x{h} exceeds max texture size {max_size}")
+
+    # Largest first packs tighter
+    remaining = sorted(
+        range(len(sizes)),
+        key=lambda i: (max(sizes[i]), sizes[i][0] * sizes[i][1]),
+        reverse=True,
+    )
+    pages = []
+
+    while remaining:
+        rects, leftover, used_w, used_h = _fill_bin(remaining, sizes, max_size, max_size, padding)
+
+        if leftover:
+            pages.append(_page(used_w, used_h, rects, power_of_two))
+            remaining = leftover
+            continue
+
+        # Everything left fits on this page: retry with smaller bins so the
+        # page comes out compact instead of spread across max_size.
+        area = sum((sizes[i][0] + padding) * (sizes[i][1] + padding) for i in remaining)
+        for bin_w, bin_h in _candidate_bins(area, max_size, power_of_two):
+            attempt = _fill_bin(remaining, sizes, bin_w, bin_h, padding)
+            if not attempt[1]:
+                rects, leftover, used_w, used_h = attempt
+                break
+
+        pages.append(_page(used_w, used_h, rects, power_of_two))
+        remaining = []
+
+    return pages
+
+
+def _candidate_bins(area: int, max_size: int, power_of_two: bool):
+    """
+    Bin sizes smaller than max_size x max_size worth trying, smallest first.
+    Power-of-two pages try every POT rectangle (e.g. 2048x1024) since the
+    page is rounded up anyway; otherwise squares grow in ~12% steps.
+    """
+    if power_of_two:
+        sides = []
+        side = 1
+        while side <= max_size:
+            sides.append(side)
+            side *= 2
+        bins = [(w, h) for w in sides for h in sides if w * h >= area and (w, h) != (max_size, max_size)]
+        return sorted(bins, key=lambda b: (b[0] * b[1], abs(b[0] - b[1])))
+
+    bins = []
+    side = math.isqrt(area)
+    while side < max_size:
+        bins.append((side, side))
+        side = int(side * 1.125) + 1
+    return bins
+
+
+def _fill_bin(order: List[int], sizes: List[Tuple[int, int]], width: int, height: int, padding: int):
+    # Padding trails every rect, so give the bin one padding of slack
+    bin_ = MaxRectsBin(width + padding, height + padding)
+    rects, leftover = {}, []
+    used_w = used_h = 0
+
+    for idx in order:
+        w, h = sizes[idx]
+        pos = bin_.insert(w + padding, h + padding)
+        if pos is None:
+            leftover.append(idx)
+            continue
+        rects[idx] = (pos[0], pos[1], w, h)
+        used_w = max(used_w, pos[0] + w)
+        used_h = max(used_h, pos[1] + h)
+
+    return rects, leftover, used_w, used_h
@@ -4,19 +4,29 @@ import uuid
 import time
 import json
 import logging
-import requests
 
-COMFYUI_URL = "http://127.0.0.1:8188"
+from services import http_client
+from services.comfyui_events import get_event_listener
+
+COMFYUI_URL = os.getenv("COMFYUI_URL", "http://127.0.0.1:8188")
+
+# /history is polled with backoff while the event socket is down, and
+# every POLL_MAX_INTERVAL while it is up in case an event was lost
+POLL_MIN_INTERVAL = 0.25
+POLL_MAX_INTERVAL = 5.0
 
 
 def trigger_workflow(workflow: dict, inputs: dict):
+    listener = get_event_listener(COMFYUI_URL)
+
     payload = {
         "prompt": workflow,
+        "client_id": listener.client_id,
         "extra_data": inputs
     }
 
     try:
-        r = requests.post(f"{COMFYUI_URL}/prompt", json=payload)
+        r = http_client.post(f"{COMFYUI_URL}/prompt", json=payload, timeout=30)
         r.raise_for_status()
         return r.json().get("prompt_id")
     except Exception as e:
@@ -24,25 +34,89 @@ def trigger_workflow(workflow: dict, inputs: dict):
         return None
 
 
-def wait_for_result(prompt_id: str, timeout=300):
-    start = time.time()
+def _fetch_history(prompt_id: str):
+    try:
+        r = http_client.get(f"{COMFYUI_URL}/history/{prompt_id}", timeout=10)
+        if r.status_code == 200:
+            data = r.json()
+            if prompt_id in data:
+                return data[prompt_id]
+    except Exception:
+        pass
+    return None
 
-    while time.time() - start < timeout:
-        try:
-            r = requests.get(f"{COMFYUI_URL}/history/{prompt_id}")
-            if r.status_code == 200:
-                data = r.json()
-                if prompt_id in data:
-                    return data[prompt_id]
-        except Exception:
-            pass
 
-        time.sleep(1)
+def wait_for_result(prompt_id: str, timeout=300, on_event=None):
+    """
+    Blocks until ComfyUI finishes `prompt_id` and returns its /history entry.
 
-    return None
+    Completion is pushed over the shared /ws event socket. /history is
+    polled with backoff while the socket is down, right after a
+    (re)connect, and every POLL_MAX_INTERVAL while connected, so a lost
+    terminal event costs seconds rather than the whole timeout.
+
+    on_event(event_type, data) receives every socket event for the prompt.
+    """
+    deadline = time.time() + timeout
+    listener = get_event_listener(COMFYUI_URL)
+    waiter = listener.register(prompt_id, on_event)
 
+    checked_generation = None
+    checked_at = 0.0
+    delay = POLL_MIN_INTERVAL
 
-def generate_sprites(workflow: dict, inputs: dict):
+    try:
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+
+            if waiter.done.is_set():
+                break
+
+            if listener.connected:
+                if checked_generation != listener.generation or \
+                        time.monotonic() - checked_at >= POLL_MAX_INTERVAL:
+                    # (Re)connected after the prompt may have finished, or
+                    # an event was dropped on a live socket: never wait on
+                    # a lost event.
+                    checked_generation = listener.generation
+                    checked_at = time.monotonic()
+                    result = _fetch_history(prompt_id)
+                    if result:
+                        return result
+
+                delay = POLL_MIN_INTERVAL
+                waiter.done.wait(min(remaining, POLL_MAX_INTERVAL))
+                continue
+
+            # Socket down → backoff polling
+            result = _fetch_history(prompt_id)
+            if result:
+                return result
+
+            waiter.done.wait(min(remaining, delay))
+            delay = min(delay * 2, POLL_MAX_INTERVAL)
+
+        # Terminal event received; history is written right before it is sent
+        for _ in range(5):
+            result = _fetch_history(prompt_id)
+            if result:
+                return result
+            time.sleep(POLL_MIN_INTERVAL)
+
+        logging.warning(f"[ComfyUI] Prompt {prompt_id} finished ({waiter.outcome}) but has no history entry")
+        return {
+            "status": {"status_str": waiter.outcome, "completed": waiter.outcome == "success"},
+            "outputs": waiter.outputs,
+            "error": waiter.error,
+        }
+
+    finally:
+        listener.unregister(prompt_id, on_event)
+
+
+def generate_sprites(workflow: dict, inputs: dict, on_event=None):
     """
     Runs a ComfyUI workflow with runtime inputs:
       - motion frames
@@ -50,6 +124,9 @@ def generate_sprites(workflow: dict, inputs: dict):
       - reference images
       - stride
       - settings
+
+    on_event(event_type, data) is forwarded ComfyUI execution events
+    (plus a "submitted" event once the prompt is queued).
     """
 
     project_id = inputs.get("project_id")
@@ -63,7 +140,10 @@ def generate_sprites(workflow: dict, inputs: dict):
     if not prompt_id:
         return {"status": "error", "message": "Failed to trigger ComfyUI workflow"}
 
-    result = wait_for_result(prompt_id)
+    if on_event:
+        on_event("submitted", {"run_id": run_id, "prompt_id": prompt_id})
+
+    result = wait_for_result(prompt_id, on_event=on_event)
     if not result:
         return {
             "status": "error",
@@ -71,6 +151,16 @@ def generate_sprites(workflow: dict, inputs: dict):
             "prompt_id": prompt_id
         }
 
+    if (result.get("status") or {}).get("status_str") == "error":
+        logging.error(f"[SpriteForge] Sprite workflow failed: run_id={run_id}")
+        return {
+            "status": "error",
+            "message": "ComfyUI workflow failed",
+            "run_id": run_id,
+            "prompt_id": prompt_id,
+            "result": result
+        }
+
     logging.info(f"[SpriteForge] Sprite workflow complete: run_id={run_id}")
 
     return {
@@ -0,0 +1,273 @@
+# services/comfyui_events.py
+"""
+SpriteForge – ComfyUI Event Listener
+------------------------------------
+Keeps one websocket connection per process open to ComfyUI's /ws endpoint
+and tracks execution events for every prompt submitted with our client_id:
+
+- execution_start / execution_cached
+- executing (node == None means the prompt finished)
+- progress
+- executed
+- execution_success / execution_error / execution_interrupted
+
+Waiters block on a threading.Event that is set the moment the terminal
+event arrives. When the socket is down, `connected` is False and callers
+fall back to polling /history.
+"""
+
+import json
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+try:
+    import websocket  # websocket-client
+except ImportError:  # pragma: no cover - optional at dev time
+    websocket = None
+
+
+TERMINAL_EVENTS = {
+    "execution_success": "success",
+    "execution_error": "error",
+    "execution_interrupted": "interrupted",
+}
+
+# Prompts nobody waits on yet are kept so a waiter that registers late
+# (events can arrive before trigger_workflow returns) still sees them
+MAX_TRACKED_PROMPTS = 512
+
+
+class PromptWaiter:
+    def __init__(self, prompt_id: str):
+        self.prompt_id = prompt_id
+        self.done = threading.Event()
+        self.outcome: Optional[str] = None
+        self.error: Optional[dict] = None
+        self.progress: Optional[dict] = None
+        self.outputs: dict = {}
+        self.callbacks: list = []
+        # register() calls not yet matched by unregister()
+        self.watchers = 0
+
+
+class ComfyUIEventListener:
+    def __init__(self, base_url: str, client_id: Optional[str] = None,
+                 reconnect_min: float = 0.5, reconnect_max: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id or uuid.uuid4().hex
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+
+        # Incremented on every successful (re)connect so waiters know
+        # they may have missed events while the socket was down.
+        self.generation = 0
+
+        self._lock = threading.Lock()
+        self._prompts: "OrderedDict[str, PromptWaiter]" = OrderedDict()
+        self._connected = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ws = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    @property
+    def ws_url(self) -> str:
+        if self.base_url.startswith("https://"):
+            root = "wss://" + self.base_url[len("https://"):]
+        elif self.base_url.startswith("http://"):
+            root = "ws://" + self.base_url[len("http://"):]
+        else:
+            root = self.base_url
+        return f"{root}/ws?clientId={self.client_id}"
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self):
+        if websocket is None:
+            logging.warning("[ComfyUI][WS] websocket-client not installed, using /history polling")
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="comfyui-events", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def wait_connected(self, timeout: float) -> bool:
+        return self._connected.wait(timeout)
+
+    # ------------------------------------------------------------------
+    # Waiters
+    # ------------------------------------------------------------------
+    def register(self, prompt_id: str, on_event: Optional[Callable[[str, dict], None]] = None) -> PromptWaiter:
+        with self._lock:
+            waiter = self._get_or_create(prompt_id)
+            waiter.watchers += 1
+            if on_event:
+                waiter.callbacks.append(on_event)
+            return waiter
+
+    def unregister(self, prompt_id: str, on_event: Optional[Callable[[str, dict], None]] = None):
+        with self._lock:
+            waiter = self._prompts.get(prompt_id)
+            if waiter is None:
+                return
+            if on_event in waiter.callbacks:
+                waiter.callbacks.remove(on_event)
+            waiter.watchers -= 1
+            if waiter.watchers <= 0:
+                self._prompts.pop(prompt_id, None)
+                waiter.callbacks.clear()
+
+    def _get_or_create(self, prompt_id: str) -> PromptWaiter:
+        waiter = self._prompts.get(prompt_id)
+        if waiter is None:
+            waiter = PromptWaiter(prompt_id)
+            self._prompts[prompt_id] = waiter
+            self._trim()
+        return waiter
+
+    def _trim(self):
+        # Drop the oldest prompts nobody is waiting on (or that already
+        # finished; their waiters hold the object and see `done`)
+        excess = len(self._prompts) - MAX_TRACKED_PROMPTS
+        if excess <= 0:
+            return
+        for pid in list(self._prompts.keys()):
+            if excess <= 0:
+                break
+            waiter = self._prompts[pid]
+            if waiter.watchers <= 0 or waiter.done.is_set():
+                self._prompts.pop(pid)
+                excess -= 1
+
+    # ------------------------------------------------------------------
+    # Socket loop
+    # ------------------------------------------------------------------
+    def _run(self):
+        delay = self.reconnect_min
+
+        while not self._stop.is_set():
+            try:
+                self._ws = websocket.create_connection(self.ws_url, timeout=10)
+                self._ws.settimeout(None)
+                self.generation += 1
+                self._connected.set()
+                delay = self.reconnect_min
+                logging.info(f"[ComfyUI][WS] Connected to {self.ws_url}")
+
+                while not self._stop.is_set():
+                    message = self._ws.recv()
+                    if isinstance(message, bytes):
+                        continue  # binary preview frames
+                    if not message:
+                        raise ConnectionError("socket closed")
+                    self._dispatch(message)
+
+            except Exception as e:
+                if not self._stop.is_set():
+                    logging.warning(f"[ComfyUI][WS] Disconnected: {e} (retry in {delay:.1f}s)")
+            finally:
+                self._connected.clear()
+                if self._ws is not None:
+                    try:
+                        self._ws.close()
+                    except Exception:
+                        pass
+                    self._ws = None
+
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.reconnect_max)
+
+    def _dispatch(self, message: str):
+        try:
+            event = json.loads(message)
+        except ValueError:
+            return
+
+        event_type = event.get("type")
+        data = event.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+
+        with self._lock:
+            waiter = self._get_or_create(prompt_id)
+            callbacks = list(waiter.callbacks)
+
+            if event_type == "progress":
+                waiter.progress = {
+                    "value": data.get("value"),
+                    "max": data.get("max"),
+                    "node": data.get("node"),
+                }
+            elif event_type == "executed":
+                waiter.outputs[str(data.get("node"))] = data.get("output")
+            elif event_type == "execution_error":
+                waiter.error = {
+                    "node_id": data.get("node_id"),
+                    "node_type": data.get("node_type"),
+                    "exception_type": data.get("exception_type"),
+                    "exception_message": data.get("exception_message"),
+                }
+
+            finished = False
+            if event_type in TERMINAL_EVENTS:
+                waiter.outcome = waiter.outcome or TERMINAL_EVENTS[event_type]
+                finished = True
+            elif event_type == "executing" and data.get("node") is None:
+                # Older ComfyUI builds only signal completion this way
+                waiter.outcome = waiter.outcome or "success"
+                finished = True
+
+        for callback in callbacks:
+            try:
+                callback(event_type, data)
+            except Exception as e:
+                logging.error(f"[ComfyUI][WS] Event callback failed: {e}")
+
+        if finished and not waiter.done.is_set():
+            logging.info(f"[ComfyUI][WS] Prompt {prompt_id} finished: {waiter.outcome}")
+            waiter.done.set()
+
+
+# ----------------------------------------------------------------------
+# Process-wide listener
+# ----------------------------------------------------------------------
+_listener: Optional[ComfyUIEventListener] = None
+_listener_lock = threading.Lock()
+
+
+def get_event_listener(base_url: str) -> ComfyUIEventListener:
+    """
+    Returns the shared listener for this process, starting it on first use.
+    """
+    global _listener
+
+    with _listener_lock:
+        if _listener is None or _listener.base_url != base_url.rstrip("/"):
+            if _listener is not None:
+                _listener.stop()
+            _listener = ComfyUIEventListener(base_url)
+            _listener.start()
+        return _listener
@@ -0,0 +1,213 @@
+# services/disk_cache.py
+"""
+SpriteForge – Size-bounded On-disk LRU
+--------------------------------------
+Generic index for caches whose entries are files or directories on disk.
+
+- entries are tracked in <root>/index.json with size and last access
+- put() registers an already-written path; the least recently used
+  entries are deleted once the total exceeds max_bytes
+- hit / miss / store / eviction counters are kept per cache and every
+  cache registers itself in CACHES so /api/cache can report on it
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+CACHE_ROOT = os.getenv("SPRITEFORGE_CACHE_ROOT", "/workspace/pipeline/cache")
+
+# Access-time updates are flushed at most this often; puts and evictions
+# are flushed immediately.
+INDEX_FLUSH_INTERVAL = 5.0
+
+CACHES: Dict[str, "DiskLRUCache"] = {}
+
+
+def path_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def remove_path(path: str):
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        logging.error(f"[Cache] Failed to remove {path}: {e}")
+
+
+class DiskLRUCache:
+    def __init__(self, name: str, root: str, max_bytes: int):
+        self.name = name
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._last_flush = 0.0
+
+        os.makedirs(root, exist_ok=True)
+        self._load()
+        CACHES[name] = self
+
+    # ------------------------------------------------------------------
+    # Index persistence
+    # ------------------------------------------------------------------
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                entries = json.load(f)
+        except Exception as e:
+            logging.error(f"[Cache][{self.name}] Failed to load index: {e}")
+            return
+
+        # Drop entries whose files disappeared behind our back
+        self._entries = {k: v for k, v in entries.items() if os.path.exists(v.get("path", ""))}
+
+    def _flush(self, force: bool = False):
+        if not self._dirty:
+            return
+        if not force and time.time() - self._last_flush < INDEX_FLUSH_INTERVAL:
+            return
+
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.index_path)
+            self._dirty = False
+            self._last_flush = time.time()
+        except Exception as e:
+            logging.error(f"[Cache][{self.name}] Failed to write index: {e}")
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+    def entry_path(self, key: str) -> str:
+        """Default location for an entry owned by this cache."""
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not os.path.exists(entry["path"]):
+                self._entries.pop(key)
+                self._dirty = True
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry["last_access"] = time.time()
+            self._dirty = True
+            self._flush()
+            return dict(entry)
+
+    def contains(self, key: str) -> bool:
+        """Presence check that counts no hit or miss and leaves the LRU order alone."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and os.path.exists(entry["path"])
+
+    def put(self, key: str, path: str, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Registers `path` (already written) under `key`, then evicts least
+        recently used entries until the cache fits in max_bytes.
+        """
+        now = time.time()
+        entry = {
+            "path": path,
+            "size": path_size(path),
+            "created": now,
+            "last_access": now,
+            "meta": meta or {},
+        }
+
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous and previous["path"] != path:
+                remove_path(previous["path"])
+
+            self._entries[key] = entry
+            self.stores += 1
+            self._dirty = True
+            self._evict(keep=key)
+            self._flush(force=True)
+
+        return dict(entry)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            remove_path(entry["path"])
+            self._dirty = True
+            self._flush(force=True)
+            return True
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            for entry in self._entries.values():
+                remove_path(entry["path"])
+            self._entries = {}
+            self._dirty = True
+            self._flush(force=True)
+            return count
+
+    def _evict(self, keep: Optional[str] = None):
+        total = sum(e["size"] for e in self._entries.values())
+        if total <= self.max_bytes:
+            return
+
+        for key, entry in sorted(self._entries.items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            remove_path(entry["path"])
+            self._entries.pop(key)
+            total -= entry["size"]
+            self.evictions += 1
+            logging.info(f"[Cache][{self.name}] Evicted {key} ({entry['size']} bytes)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e["size"] for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,116 @@
+# services/file_serving.py
+"""
+SpriteForge – File Serving
+--------------------------
+One send_file wrapper for every preview endpoint:
+
+- strong ETag from (inode, size, mtime) and Last-Modified, so
+  If-None-Match / If-Modified-Since revalidations answer 304
+- byte ranges (206) for seeking in MP4 / WebM previews
+- content type from the extension instead of a hard-coded image/png
+- "Cache-Control: no-cache" (cheap revalidation) by default; immutable
+  for content-addressed files and for versioned URLs whose ?v= matches
+  the file's current ETag. A file only counts as content-addressed when
+  it is hash-named inside a directory this app writes by hash (the cache
+  root, project reference folders); elsewhere a hex-looking name is just
+  a name and gets ETag revalidation.
+"""
+
+import os
+import re
+import mimetypes
+from typing import Optional
+
+from flask import request, send_file
+
+from services.disk_cache import CACHE_ROOT
+
+PROJECT_ROOT = "/workspace/pipeline/projects"
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Files named by a content hash (reference working copies, cache entries)
+CONTENT_HASH_NAME = re.compile(r"[0-9a-f]{16,64}")
+
+# Project subfolders written by reference ingest, named by content hash
+REFERENCE_DIRS = (("references",), ("references", "thumbs"), ("references", "originals"))
+
+for _type, _ext in (
+    ("image/webp", ".webp"),
+    ("video/mp4", ".mp4"),
+    ("video/webm", ".webm"),
+    ("model/gltf-binary", ".glb"),
+    ("application/octet-stream", ".fbx"),
+    ("application/octet-stream", ".npz"),
+):
+    mimetypes.add_type(_type, _ext)
+
+
+def _etag(st: os.stat_result) -> str:
+    return f"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"
+
+
+def file_etag(path: str) -> str:
+    return _etag(os.stat(path))
+
+
+def guess_mimetype(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def _relative_parts(path: str, root: str):
+    """Path components of `path` below `root`, or None if it is outside."""
+    root = os.path.realpath(root)
+    if os.path.commonpath([path, root]) != root:
+        return None
+    return os.path.relpath(path, root).split(os.sep)
+
+
+def is_content_addressed(path: str) -> bool:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if not CONTENT_HASH_NAME.fullmatch(stem):
+        return False
+
+    path = os.path.realpath(path)
+    if _relative_parts(path, CACHE_ROOT) is not None:
+        return True
+
+    # <project>/references[/thumbs|/originals]/<hash>.<ext>
+    parts = _relative_parts(path, PROJECT_ROOT)
+    return parts is not None and len(parts) >= 3 and tuple(parts[1:-1]) in REFERENCE_DIRS
+
+
+def is_immutable_request(source: str) -> bool:
+    """True if the URL pins `source`'s content (hash-named file or matching ?v=)."""
+    version = request.args.get("v")
+    if version and version == file_etag(source):
+        return True
+    return is_content_addressed(source)
+
+
+def serve_file(path: str, mimetype: Optional[str] = None, immutable: Optional[bool] = None,
+               as_attachment: bool = False):
+    """
+    send_file with validators, range support and cache headers.
+    immutable=None decides from the request (see is_immutable_request).
+    """
+    if immutable is None:
+        immutable = is_immutable_request(path)
+
+    st = os.stat(path)
+    response = send_file(
+        path,
+        mimetype=mimetype or guess_mimetype(path),
+        as_attachment=as_attachment,
+        conditional=True,
+        etag=_etag(st),
+        last_modified=st.st_mtime,
+        max_age=IMMUTABLE_MAX_AGE if immutable else None,
+    )
+
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
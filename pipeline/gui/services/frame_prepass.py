@@ -0,0 +1,140 @@
+# services/frame_prepass.py
+"""
+SpriteForge – Frame Pre-pass
+----------------------------
+Vectorized analysis of sprite frames before they are laid out:
+
+- alpha bounding boxes for a whole batch of frames in one NumPy pass
+- a content hash of each frame's trimmed pixels, so pixel-identical
+  frames (holds) can share one atlas cell
+
+Frames are processed in batches of equal-sized images, one batch per
+image-pool worker, so memory stays bounded to BATCH_SIZE decoded frames
+per worker.
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from services.image_pool import pool_map
+
+BATCH_SIZE = 32
+
+
+def _load_rgba(path: str) -> np.ndarray:
+    with Image.open(path) as img:
+        if img.mode != "RGBA":
+            with img.convert("RGBA") as rgba:
+                return np.asarray(rgba)
+        return np.asarray(img)
+
+
+def alpha_bboxes(alpha: np.ndarray) -> List[Optional[Tuple[int, int, int, int]]]:
+    """
+    alpha: (N, H, W) array. Returns per-frame (left, top, right, bottom)
+    boxes of non-zero alpha, or None for fully transparent frames.
+    """
+    mask = alpha > 0
+    rows = mask.any(axis=2)  # (N, H)
+    cols = mask.any(axis=1)  # (N, W)
+    height, width = alpha.shape[1], alpha.shape[2]
+
+    top = rows.argmax(axis=1)
+    bottom = height - rows[:, ::-1].argmax(axis=1)
+    left = cols.argmax(axis=1)
+    right = width - cols[:, ::-1].argmax(axis=1)
+    empty = ~rows.any(axis=1)
+
+    return [
+        None if empty[i] else (int(left[i]), int(top[i]), int(right[i]), int(bottom[i]))
+        for i in range(alpha.shape[0])
+    ]
+
+
+def _hash_region(pixels: np.ndarray) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(pixels.shape, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(pixels).tobytes())
+    return digest.hexdigest()
+
+
+def _analyze_batch(paths: List[str]) -> List[Dict]:
+    batch = np.stack([_load_rgba(p) for p in paths])  # (N, H, W, 4), a copy
+
+    # Fully transparent pixels compare equal whatever their RGB says
+    batch[batch[..., 3] == 0] = 0
+
+    boxes = alpha_bboxes(batch[..., 3])
+    height, width = batch.shape[1], batch.shape[2]
+    results = []
+
+    for i, box in enumerate(boxes):
+        if box is None:
+            region = batch[i, :0, :0]
+        else:
+            left, top, right, bottom = box
+            region = batch[i, top:bottom, left:right]
+
+        results.append({
+            "size": (width, height),
+            "bbox": box,
+            "hash": _hash_region(region),
+        })
+
+    return results
+
+
+def analyze_frames(paths: List[str], batch_size: int = BATCH_SIZE) -> List[Dict]:
+    """
+    Returns, in input order, {"size": (w, h), "bbox": box | None,
+    "hash": hex} for every frame.
+    """
+    results: List[Optional[Dict]] = [None] * len(paths)
+
+    # Group by size so each batch stacks into one array
+    by_size: Dict[Tuple[int, int], List[int]] = {}
+    for i, path in enumerate(paths):
+        with Image.open(path) as img:
+            by_size.setdefault(img.size, []).append(i)
+
+    chunks = [
+        indices[start:start + batch_size]
+        for indices in by_size.values()
+        for start in range(0, len(indices), batch_size)
+    ]
+
+    # Batches run in the image process pool, one batch per worker
+    batches = pool_map(_analyze_batch, (([paths[i] for i in chunk],) for chunk in chunks))
+    for chunk, infos in zip(chunks, batches):
+        for idx, info in zip(chunk, infos):
+            results[idx] = info
+
+    return results
+
+
+def find_duplicates(analysis: List[Dict], match_offsets: bool = False) -> Dict[int, int]:
+    """
+    Maps the index of every repeated frame to the first frame with the
+    same trimmed pixels. By default aliases may sit at a different offset
+    within their source frame (fine for trimmed atlases, where only the
+    cell is shared); match_offsets=True requires whole-frame equality.
+    """
+    first_seen: Dict[Tuple, int] = {}
+    aliases: Dict[int, int] = {}
+
+    for i, info in enumerate(analysis):
+        key = (info["hash"], info["size"], info["bbox"]) if match_offsets else (info["hash"],)
+        if key in first_seen:
+            aliases[i] = first_seen[key]
+        else:
+            first_seen[key] = i
+
+    return aliases
+
+
+def batch_bytes(size: Tuple[int, int], batch_size: int = BATCH_SIZE) -> int:
+    """Decoded RGBA bytes held by one pre-pass batch (per worker)."""
+    return size[0] * size[1] * 4 * batch_size
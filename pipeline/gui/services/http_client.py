@@ -0,0 +1,155 @@
+# services/http_client.py
+"""
+SpriteForge – Shared HTTP Client
+--------------------------------
+One requests.Session per upstream host (ComfyUI, Ollama, Groq, ...) so
+TCP/TLS connections are pooled and kept alive across calls, plus:
+
+- default (connect, read) timeouts
+- retry with full-jitter exponential backoff on connection errors and
+  502/503/504. POSTs are only retried when the request cannot have reached
+  the server (connect failures, 503), so a prompt is never queued twice.
+- per-host request / connection counters for /api/health/http
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "4.0"))
+
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+_sessions: Dict[str, requests.Session] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url: str) -> requests.Session:
+    """The pooled session for the host `url` points at."""
+    host = _host_key(url)
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+            _stats[host] = {"requests": 0, "retries": 0, "errors": 0}
+        return session
+
+
+def _count(host: str, field: str):
+    with _lock:
+        _stats[host][field] += 1
+
+
+def never_sent(e: Exception) -> bool:
+    """True when the request failed before any byte reached the server."""
+    if isinstance(e, requests.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method: str, url: str, timeout=None, retries: Optional[int] = None,
+            **kwargs) -> requests.Response:
+    """
+    Sends a request on the host's pooled session. `timeout` may be a number
+    (read timeout) or a (connect, read) tuple. Raises like requests does
+    once retries are exhausted; the final non-retryable response is
+    returned as-is (callers still call raise_for_status()).
+    """
+    method = method.upper()
+    host = _host_key(url)
+    session = get_session(url)
+    retries = HTTP_RETRIES if retries is None else retries
+    idempotent = method in IDEMPOTENT_METHODS
+
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    elif not isinstance(timeout, tuple):
+        timeout = (min(HTTP_CONNECT_TIMEOUT, timeout), timeout)
+
+    attempt = 0
+    while True:
+        _count(host, "requests")
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries or not (idempotent or never_sent(e)):
+                _count(host, "errors")
+                raise
+            logging.warning(f"[HTTP] {method} {url} failed ({e.__class__.__name__}), retrying")
+        else:
+            retryable = response.status_code in RETRY_STATUSES and (idempotent or response.status_code == 503)
+            if attempt >= retries or not retryable:
+                return response
+            logging.warning(f"[HTTP] {method} {url} returned {response.status_code}, retrying")
+            response.close()
+
+        _count(host, "retries")
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def stats() -> Dict[str, dict]:
+    """
+    Per-host counters. connections_opened comes from urllib3's pools, so
+    reuse_ratio is the share of requests that did not need a new connection.
+    """
+    with _lock:
+        sessions = dict(_sessions)
+        counters = {host: dict(values) for host, values in _stats.items()}
+
+    report = {}
+    for host, session in sessions.items():
+        opened = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+
+        values = counters[host]
+        values["connections_opened"] = opened
+        values["reuse_ratio"] = (
+            round(1 - opened / values["requests"], 4) if values["requests"] else None
+        )
+        report[host] = values
+
+    return report
@@ -1,19 +1,232 @@
 import os
+import json
 import uuid
+import queue
+import threading
 import subprocess
 import logging
 from datetime import datetime
 
+from services.models import MODEL_ROOT
+from services.motion_cache import motion_cache_key, model_version, lookup_motion, store_motion, track_run
+from services.hymotion_worker import missing_entry_points
+
 HY_MOTION_DIR = "/workspace/hy-motion"
 OUTPUT_ROOT = "/workspace/animations"
 
+HY_MOTION_PYTHON = os.getenv("HY_MOTION_PYTHON", "python")
+HY_MOTION_INFERENCE = os.getenv("HY_MOTION_INFERENCE", os.path.join(HY_MOTION_DIR, "inference.py"))
+
+# Importable module with load_model() / run_inference(...) for the warm
+# worker (see hymotion_worker.py). The default adapter keeps the model
+# HY_MOTION_INFERENCE builds; when it cannot, every request spawns
+# inference.py, as does HY_MOTION_WORKERS=0
+HY_MOTION_ADAPTER = os.getenv(
+    "HY_MOTION_ADAPTER", os.path.join(os.path.dirname(os.path.abspath(__file__)), "hymotion_adapter.py")
+)
+HY_MOTION_WORKERS = int(os.getenv("HY_MOTION_WORKERS", "1"))
+HY_MOTION_STARTUP_TIMEOUT = float(os.getenv("HY_MOTION_STARTUP_TIMEOUT", "900"))
+HY_MOTION_JOB_TIMEOUT = float(os.getenv("HY_MOTION_JOB_TIMEOUT", "1800"))
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hymotion_worker.py")
+
+
+class HYMotionWorkerError(Exception):
+    pass
+
+
+class HYMotionUnsupported(HYMotionWorkerError):
+    """The adapter cannot keep a model loaded for this inference script."""
+
+
+class HYMotionWorker:
+    """
+    One warm hymotion_worker.py process. Jobs are written to its stdin and
+    replies read back from stdout by a reader thread, so a hung or crashed
+    worker can be detected with a timeout and respawned.
+    """
+
+    def __init__(self, index: int):
+        self.index = index
+        self.proc = None
+        self._replies: "queue.Queue" = queue.Queue()
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        command = [HY_MOTION_PYTHON, WORKER_SCRIPT, "--adapter", HY_MOTION_ADAPTER]
+        cwd = HY_MOTION_DIR if os.path.isdir(HY_MOTION_DIR) else None
+
+        logging.info(f"[HY-Motion] Starting worker {self.index}: {' '.join(command)}")
+
+        self._replies = queue.Queue()
+        self.proc = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env={**os.environ, "HY_MOTION_INFERENCE": HY_MOTION_INFERENCE},
+            text=True,
+            bufsize=1,
+        )
+        threading.Thread(
+            target=self._read_replies,
+            args=(self.proc, self._replies),
+            name=f"hymotion-worker-{self.index}",
+            daemon=True,
+        ).start()
+
+        ready = self._next_reply(HY_MOTION_STARTUP_TIMEOUT)
+        if not ready.get("ready"):
+            self.stop()
+            error = ready.get("error") or "HY-Motion worker failed to start"
+            raise (HYMotionUnsupported if ready.get("unsupported") else HYMotionWorkerError)(error)
+
+        logging.info(f"[HY-Motion] Worker {self.index} ready (pid={self.proc.pid})")
+
+    def stop(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=10)
+        except Exception:
+            pass
+        self.proc = None
+
+    @staticmethod
+    def _read_replies(proc, replies):
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                replies.put(json.loads(line))
+            except ValueError:
+                logging.warning(f"[HY-Motion] Ignoring worker output: {line}")
+        replies.put(None)  # EOF → worker exited
+
+    def _next_reply(self, timeout: float) -> dict:
+        try:
+            reply = self._replies.get(timeout=timeout)
+        except queue.Empty:
+            self.stop()
+            raise HYMotionWorkerError(f"HY-Motion worker timed out after {timeout:.0f}s")
+
+        if reply is None:
+            code = self.proc.wait() if self.proc else None
+            self.proc = None
+            raise HYMotionWorkerError(f"HY-Motion worker exited (code={code})")
+
+        return reply
+
+    def run(self, job: dict) -> dict:
+        if not self.alive:
+            self.start()
+
+        try:
+            self.proc.stdin.write(json.dumps(job) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.stop()
+            raise HYMotionWorkerError(f"HY-Motion worker pipe closed: {e}")
+
+        while True:
+            reply = self._next_reply(HY_MOTION_JOB_TIMEOUT)
+            if reply.get("id") == job["id"]:
+                return reply
+
+
+class HYMotionWorkerPool:
+    def __init__(self, size: int):
+        self._idle: "queue.Queue[HYMotionWorker]" = queue.Queue()
+        for i in range(size):
+            self._idle.put(HYMotionWorker(i))
+
+    def run(self, job: dict) -> dict:
+        worker = self._idle.get()
+        try:
+            return worker.run(job)
+        finally:
+            # A dead worker goes back too; it respawns on its next job
+            self._idle.put(worker)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_warm = None
+
+
+def _use_workers() -> bool:
+    """Warm workers only when the adapter keeps a loaded model; checked once."""
+    global _warm
+    if _warm is None:
+        missing = missing_entry_points(HY_MOTION_ADAPTER) if HY_MOTION_WORKERS > 0 else []
+        if missing:
+            logging.warning(
+                f"[HY-Motion] {HY_MOTION_ADAPTER} does not define {', '.join(missing)}; "
+                f"warm workers disabled, running one inference.py process per request "
+                f"(set HY_MOTION_ADAPTER to a module with load_model/run_inference)"
+            )
+        _warm = HY_MOTION_WORKERS > 0 and not missing
+    return _warm
+
+
+def _disable_workers(reason: str):
+    global _warm
+    logging.warning(f"[HY-Motion] {reason}; warm workers disabled, running one inference.py process per request")
+    _warm = False
+
+
+def _get_pool() -> HYMotionWorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HYMotionWorkerPool(HY_MOTION_WORKERS)
+        return _pool
+
+
+def _run_oneshot(prompt_path: str, skeleton: str, output_dir: str, seed: int | None):
+    command = [
+        HY_MOTION_PYTHON,
+        HY_MOTION_INFERENCE,
+        "--prompt", prompt_path,
+        "--skeleton", skeleton,
+        "--output", output_dir
+    ]
+
+    if seed is not None:
+        command += ["--seed", str(seed)]
+
+    logging.info(f"[HY-Motion] Command: {' '.join(command)}")
+    subprocess.run(command, check=True)
+
 
 def generate_motion(prompt: str, skeleton: str = "human", seed: int | None = None):
     """
     Runs HY-Motion using a structured text prompt instead of a preset.
-    Writes the prompt to a temporary file and passes it to inference.py.
+    Writes the prompt to a temporary file and dispatches it to a warm
+    HY-Motion worker (or a one-shot inference.py when workers are disabled
+    or no warm adapter is available).
+
+    Seeded requests are served from the motion cache when the same prompt,
+    skeleton, seed and model version were generated before.
     """
 
+    try:
+        version = model_version([HY_MOTION_DIR, os.path.join(MODEL_ROOT, "motion")], HY_MOTION_INFERENCE)
+        cache_key = motion_cache_key(prompt, skeleton, seed, version)
+    except (TypeError, ValueError, OSError) as e:
+        logging.warning(f"[HY-Motion] Not caching run: {e}")
+        cache_key = None
+
+    if cache_key:
+        cached = lookup_motion(cache_key)
+        if cached:
+            return cached
+
     run_id = str(uuid.uuid4())[:8]
     output_dir = os.path.join(OUTPUT_ROOT, run_id)
     os.makedirs(output_dir, exist_ok=True)
@@ -29,29 +242,31 @@ def generate_motion(prompt: str, skeleton: str = "human", seed: int | None = Non
 
     logging.info(f"[HY-Motion] Prompt written to {prompt_path}")
 
-    # ----------------------------------------------------------------------
-    # HY-Motion command
-    # ----------------------------------------------------------------------
-    command = [
-        "python",
-        os.path.join(HY_MOTION_DIR, "inference.py"),
-        "--prompt", prompt_path,
-        "--skeleton", skeleton,
-        "--output", output_dir
-    ]
-
-    if seed is not None:
-        command += ["--seed", str(seed)]
-
-    logging.info(f"[HY-Motion] Command: {' '.join(command)}")
-
     # ----------------------------------------------------------------------
     # Execute HY-Motion
     # ----------------------------------------------------------------------
     try:
-        subprocess.run(command, check=True)
-    except subprocess.CalledProcessError as e:
+        if _use_workers():
+            try:
+                reply = _get_pool().run({
+                    "id": run_id,
+                    "prompt": prompt_path,
+                    "skeleton": skeleton,
+                    "output": output_dir,
+                    "seed": seed,
+                })
+            except HYMotionUnsupported as e:
+                _disable_workers(str(e))
+                reply = None
+            if reply is None:
+                _run_oneshot(prompt_path, skeleton, output_dir, seed)
+            elif reply.get("status") != "success":
+                raise HYMotionWorkerError(reply.get("error") or "HY-Motion inference failed")
+        else:
+            _run_oneshot(prompt_path, skeleton, output_dir, seed)
+    except (subprocess.CalledProcessError, HYMotionWorkerError) as e:
         logging.error(f"[HY-Motion] Failed: {e}")
+        track_run(run_id, output_dir)
         return {
             "status": "error",
             "run_id": run_id,
@@ -95,4 +310,12 @@ def generate_motion(prompt: str, skeleton: str = "human", seed: int | None = Non
 
     logging.info(f"[HY-Motion] Completed run {run_id}: {result}")
 
+    if cache_key and (result["video"] or result["frames"]):
+        store_motion(cache_key, result)
+    else:
+        # Unseeded (or empty) runs still count against the disk budget
+        track_run(run_id, output_dir)
+    if cache_key:
+        result["cached"] = False
+
     return result
@@ -0,0 +1,82 @@
+# services/hymotion_adapter.py
+"""
+SpriteForge – HY-Motion Adapter
+-------------------------------
+Default HY_MOTION_ADAPTER for the warm worker (hymotion_worker.py).
+Imports the HY-Motion inference script as a module, so its __main__
+block never runs, and keeps the model it builds for the life of the
+worker.
+
+The script's functions are looked up by name:
+
+  loader  HY_MOTION_LOAD_FN  (default: load_model, build_model, load_pipeline)
+          called without arguments, returns the model / pipeline
+  runner  HY_MOTION_RUN_FN   (default: run_inference, generate, infer)
+          called as runner(model, prompt_path=, skeleton=, output_dir=, seed=)
+
+A script that exposes neither (a CLI that only parses argv), or that
+exits while being imported, raises NotImplementedError from
+load_model(); services/hymotion.py then falls back to one inference.py
+process per request.
+"""
+
+import os
+import sys
+import importlib.util
+
+HY_MOTION_INFERENCE = os.getenv("HY_MOTION_INFERENCE", "/workspace/hy-motion/inference.py")
+
+LOAD_FN_NAMES = [n.strip() for n in os.getenv("HY_MOTION_LOAD_FN", "load_model,build_model,load_pipeline").split(",") if n.strip()]
+RUN_FN_NAMES = [n.strip() for n in os.getenv("HY_MOTION_RUN_FN", "run_inference,generate,infer").split(",") if n.strip()]
+
+_runner = None
+
+
+def _import_script(path: str):
+    script_dir = os.path.dirname(os.path.abspath(path))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+    spec = importlib.util.spec_from_file_location("hymotion_inference", path)
+    module = importlib.util.module_from_spec(spec)
+
+    # Scripts that parse argv at import time see a bare command line
+    saved_argv = sys.argv
+    sys.argv = [path]
+    try:
+        spec.loader.exec_module(module)
+    except SystemExit as e:
+        raise NotImplementedError(f"{path} exits when imported (status {e.code})")
+    finally:
+        sys.argv = saved_argv
+    return module
+
+
+def _find(module, names):
+    for name in names:
+        fn = getattr(module, name, None)
+        if callable(fn):
+            return fn
+    return None
+
+
+def load_model():
+    global _runner
+    if not os.path.isfile(HY_MOTION_INFERENCE):
+        raise NotImplementedError(f"{HY_MOTION_INFERENCE} not found")
+
+    module = _import_script(HY_MOTION_INFERENCE)
+    loader = _find(module, LOAD_FN_NAMES)
+    runner = _find(module, RUN_FN_NAMES)
+    if loader is None or runner is None:
+        raise NotImplementedError(
+            f"{HY_MOTION_INFERENCE} has no model loader ({', '.join(LOAD_FN_NAMES)}) "
+            f"or runner ({', '.join(RUN_FN_NAMES)}); set HY_MOTION_LOAD_FN / HY_MOTION_RUN_FN"
+        )
+
+    _runner = runner
+    return loader()
+
+
+def run_inference(model, prompt_path, skeleton, output_dir, seed):
+    _runner(model, prompt_path=prompt_path, skeleton=skeleton, output_dir=output_dir, seed=seed)
@@ -0,0 +1,134 @@
+# services/hymotion_worker.py
+"""
+SpriteForge – Warm HY-Motion Worker
+-----------------------------------
+Long-lived process started by services/hymotion.py. Imports a HY-Motion
+adapter module once, loads the model once and then serves jobs over
+stdin/stdout, one JSON object per line:
+
+  request:  {"id": "...", "prompt": "/path/prompt.txt", "skeleton": "human",
+             "output": "/path/run_dir", "seed": 123}
+  response: {"id": "...", "status": "success"} or
+            {"id": "...", "status": "error", "error": "..."}
+
+The first line written is {"ready": true} once the model is loaded.
+
+The adapter (HY_MOTION_ADAPTER, by default inference.py itself) must
+define at module level
+
+  load_model() -> model
+  run_inference(model, prompt_path, skeleton, output_dir, seed)
+
+and be safe to import (no argv parsing or work outside its __main__
+guard). A plain CLI script is not run here: services/hymotion.py checks
+for these entry points with missing_entry_points() before starting a
+worker and otherwise falls back to one inference.py process per job. An
+adapter whose load_model() raises NotImplementedError (see
+hymotion_adapter.py) is reported as {"ready": false, "unsupported": true}
+and gets the same fallback.
+"""
+
+import os
+import ast
+import sys
+import json
+import argparse
+import importlib.util
+import traceback
+
+ENTRY_POINTS = ("load_model", "run_inference")
+
+
+def missing_entry_points(adapter_path: str) -> list:
+    """
+    Entry points the adapter does not define at module level. Read from
+    the source, so checking never executes the script.
+    """
+    try:
+        with open(adapter_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=adapter_path)
+    except (OSError, SyntaxError, ValueError):
+        return list(ENTRY_POINTS)
+
+    defined = {node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    return [name for name in ENTRY_POINTS if name not in defined]
+
+
+def _load_backend(adapter_path: str):
+    missing = missing_entry_points(adapter_path)
+    if missing:
+        raise RuntimeError(f"{adapter_path} does not define {', '.join(missing)}")
+
+    # Adapter directory and the HY-Motion checkout (our cwd) for its imports
+    for path in (os.path.dirname(os.path.abspath(adapter_path)), os.getcwd()):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    spec = importlib.util.spec_from_file_location("hymotion_adapter", adapter_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    model = module.load_model()
+
+    def run(job):
+        module.run_inference(
+            model,
+            prompt_path=job["prompt"],
+            skeleton=job["skeleton"],
+            output_dir=job["output"],
+            seed=job.get("seed"),
+        )
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--adapter", required=True)
+    args = parser.parse_args()
+
+    # Keep the protocol channel private: anything the model prints
+    # (including native libraries writing to fd 1) goes to stderr.
+    protocol = os.fdopen(os.dup(1), "w", buffering=1, encoding="utf-8")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    def reply(message: dict):
+        protocol.write(json.dumps(message) + "\n")
+        protocol.flush()
+
+    try:
+        run = _load_backend(args.adapter)
+    except NotImplementedError as e:
+        reply({"ready": False, "unsupported": True, "error": f"HY-Motion adapter unsupported: {e}"})
+        return 1
+    except Exception as e:
+        traceback.print_exc()
+        reply({"ready": False, "error": f"Failed to load HY-Motion: {e}"})
+        return 1
+
+    reply({"ready": True, "pid": os.getpid()})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            job = json.loads(line)
+        except ValueError:
+            reply({"id": None, "status": "error", "error": "Invalid job JSON"})
+            continue
+
+        try:
+            run(job)
+            reply({"id": job.get("id"), "status": "success"})
+        except Exception as e:
+            traceback.print_exc()
+            reply({"id": job.get("id"), "status": "error", "error": str(e)})
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
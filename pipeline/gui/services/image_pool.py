@@ -0,0 +1,207 @@
+# services/image_pool.py
+"""
+SpriteForge – Image Process Pool
+--------------------------------
+PNG/WebP decode and encode in Pillow is CPU-bound and holds the GIL, so
+image work fans out to a shared process pool:
+
+- decode_frames(): decode (+ optional crop / resize) in workers, yielded
+  back in input order with a bounded number of frames in flight
+- encode_image_async(): encode and write an image in a worker while the
+  caller carries on (e.g. rendering the next atlas page)
+- derive_images(): one decode of a source image, written out as several
+  bounded-size copies (working copies, thumbnails)
+- pool_map(): ordered map of any picklable worker function
+
+SPRITEFORGE_IMAGE_WORKERS sets the pool size (default: CPU count).
+With 1 worker everything runs inline in the calling thread.
+"""
+
+import os
+import uuid
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+IMAGE_WORKERS = int(os.getenv("SPRITEFORGE_IMAGE_WORKERS", "0")) or (os.cpu_count() or 1)
+
+# What a bad, truncated or oversized source image raises while decoding
+IMAGE_DECODE_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_image_workers() -> int:
+    return IMAGE_WORKERS
+
+
+def set_image_workers(workers: int):
+    """Resizes the shared pool (used by benchmarks and tests)."""
+    global IMAGE_WORKERS, _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+        IMAGE_WORKERS = max(1, int(workers))
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if IMAGE_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded Flask process can deadlock workers
+            _pool = ProcessPoolExecutor(
+                max_workers=IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logging.info(f"[ImagePool] Started {IMAGE_WORKERS} image workers")
+        return _pool
+
+
+def _inline(fn, *args) -> Future:
+    future: Future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def submit(fn: Callable, *args) -> Future:
+    pool = _get_pool()
+    if pool is None:
+        return _inline(fn, *args)
+    return pool.submit(fn, *args)
+
+
+def pool_map(fn: Callable, items: Iterable[tuple], window: Optional[int] = None) -> Iterator:
+    """
+    Yields fn(*item) for every item, in order. At most `window` calls are
+    in flight (default 2x workers), which bounds memory for large inputs.
+    """
+    window = window or max(1, 2 * IMAGE_WORKERS)
+    pending: deque = deque()
+
+    for item in items:
+        pending.append(submit(fn, *item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+# ---------------------------------------------------------
+# Worker functions (module level so they pickle)
+# ---------------------------------------------------------
+
+def _decode(path: str, crop, size) -> Tuple[str, Tuple[int, int], bytes]:
+    with Image.open(path) as src:
+        img = src if src.mode == "RGBA" else src.convert("RGBA")
+        if crop:
+            img = img.crop(crop)
+        if size and img.size != tuple(size):
+            img = img.resize(tuple(size), Image.LANCZOS)
+        return img.mode, img.size, img.tobytes()
+
+
+def _save_atomic(img: Image.Image, path: str, image_format: str, options: dict):
+    # Unique tmp name: concurrent writers of the same path must not share one
+    tmp = f"{path}.{uuid.uuid4().hex[:12]}.tmp"
+    try:
+        img.save(tmp, format=image_format, **options)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _encode(mode: str, size: Tuple[int, int], data: bytes, path: str,
+            image_format: str, options: dict) -> str:
+    img = Image.frombytes(mode, size, data)
+    _save_atomic(img, path, image_format, options)
+    return path
+
+
+def _derive(path: str, outputs: List[tuple]) -> dict:
+    with Image.open(path) as src:
+        source_size = src.size
+        img = ImageOps.exif_transpose(src)
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha else "RGB")
+
+    sizes = []
+    # Largest first so each copy is resized from the previous one
+    for dst, max_side, image_format, options in sorted(outputs, key=lambda o: -o[1]):
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        _save_atomic(img, dst, image_format, options)
+        sizes.append((dst, img.size))
+
+    by_path = dict(sizes)
+    return {"source_size": source_size, "sizes": [by_path[o[0]] for o in outputs]}
+
+
+def _derive_or_error(path: str, outputs: List[tuple]):
+    try:
+        return _derive(path, outputs)
+    except Exception as e:
+        return e
+
+
+# ---------------------------------------------------------
+# Public helpers
+# ---------------------------------------------------------
+
+def decode_frames(paths: List[str], crops: Optional[list] = None,
+                  size: Optional[Tuple[int, int]] = None,
+                  window: Optional[int] = None) -> Iterator[Image.Image]:
+    """
+    Decodes frames to RGBA in the pool, optionally cropping each to
+    crops[i] and resizing to `size`, yielding PIL images in input order.
+    """
+    crops = crops or [None] * len(paths)
+    items = ((p, c, size) for p, c in zip(paths, crops))
+
+    for mode, frame_size, data in pool_map(_decode, items, window):
+        yield Image.frombytes(mode, frame_size, data)
+
+
+def encode_image_async(img: Image.Image, path: str, image_format: str = "PNG",
+                       **options) -> Future:
+    """
+    Encodes `img` to `path` in a worker. The pixels are copied out, so the
+    caller may close `img` as soon as this returns.
+    """
+    return submit(_encode, img.mode, img.size, img.tobytes(), path, image_format, options)
+
+
+def derive_images(path: str, outputs: List[tuple]) -> dict:
+    """
+    Decodes `path` once (EXIF-rotated, alpha kept if present) and writes
+    each (dst, max_side, format, save_options) output, downscaled to fit
+    max_side. Returns {"source_size", "sizes"} with sizes in output order.
+    """
+    return submit(_derive, path, outputs).result()
+
+
+def derive_images_many(items: Iterable[tuple], window: Optional[int] = None) -> Iterator:
+    """
+    derive_images() for many (path, outputs) items across the pool, in
+    order. A failing item yields its exception instead of stopping the run.
+    """
+    return pool_map(_derive_or_error, items, window)
+
+
+def encode_image(img: Image.Image, path: str, image_format: str = "PNG", **options) -> str:
+    return encode_image_async(img, path, image_format, **options).result()
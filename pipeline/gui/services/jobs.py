@@ -0,0 +1,190 @@
+# services/jobs.py
+"""
+SpriteForge – Background Job Queue
+----------------------------------
+Long-running renders (ComfyUI sprite workflows) run on a bounded worker
+pool instead of inside the Flask request thread.
+
+- submit_job() returns a Job immediately (status "queued")
+- workers call the job function with the Job so it can emit() progress
+- every job keeps a short, sequence-numbered event log that the API
+  streams to the GUI as server-sent events
+- housekeeping (thumbnail prewarms) goes through submit_background_job(),
+  a separate small queue, so it never delays renders or fills their queue
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+JOB_WORKERS = int(os.getenv("SPRITEFORGE_JOB_WORKERS", "2"))
+MAX_PENDING_JOBS = int(os.getenv("SPRITEFORGE_MAX_PENDING_JOBS", "32"))
+MAX_FINISHED_JOBS = 200
+BACKGROUND_JOB_WORKERS = int(os.getenv("SPRITEFORGE_BACKGROUND_JOB_WORKERS", "1"))
+MAX_PENDING_BACKGROUND_JOBS = int(os.getenv("SPRITEFORGE_MAX_PENDING_BACKGROUND_JOBS", "16"))
+MAX_EVENTS_PER_JOB = 500
+
+FINISHED_STATES = ("success", "error")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, params: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"
+        self.progress: Optional[Dict[str, Any]] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created = datetime.utcnow().isoformat()
+        self.started: Optional[str] = None
+        self.finished: Optional[str] = None
+
+        self._events: List[Dict[str, Any]] = []
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def emit(self, event_type: str, data: Optional[Dict[str, Any]] = None):
+        with self._cond:
+            self._seq += 1
+            self._events.append({"seq": self._seq, "type": event_type, "data": data or {}})
+            if len(self._events) > MAX_EVENTS_PER_JOB:
+                del self._events[: len(self._events) - MAX_EVENTS_PER_JOB]
+            self._cond.notify_all()
+
+    def wait_events(self, after: int = 0, timeout: float = 15.0) -> List[Dict[str, Any]]:
+        """
+        Returns events with seq > after, blocking up to `timeout` seconds
+        for new ones. An empty list means the wait timed out.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                events = [e for e in self._events if e["seq"] > after]
+                if events or self.done:
+                    return events
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "params": self.params,
+        }
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = MAX_PENDING_JOBS,
+                 thread_name_prefix: str = "sprite-job"):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Dict[str, Any]], *args,
+               params: Optional[Dict[str, Any]] = None, **kwargs) -> Job:
+        """
+        Queues fn(job, *args, **kwargs). fn returns the result dict; a
+        result with status "error" marks the job as failed.
+        """
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.done)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending")
+
+            job = Job(kind, params)
+            self._jobs[job.id] = job
+            self._trim()
+
+        job.emit("queued", {"job_id": job.id})
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logging.info(f"[Jobs] Queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def _trim(self):
+        finished = [jid for jid, j in self._jobs.items() if j.done]
+        for jid in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._jobs.pop(jid, None)
+
+    def _run(self, job: Job, fn, args, kwargs):
+        job.status = "running"
+        job.started = datetime.utcnow().isoformat()
+        job.emit("started", {"job_id": job.id})
+        logging.info(f"[Jobs] Running {job.kind} job {job.id}")
+
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            logging.exception(f"[Jobs] {job.kind} job {job.id} crashed")
+            result = {"status": "error", "message": str(e)}
+
+        job.result = result
+        job.finished = datetime.utcnow().isoformat()
+
+        if isinstance(result, dict) and result.get("status") == "error":
+            job.error = result.get("message") or "Job failed"
+            job.status = "error"
+        else:
+            job.status = "success"
+
+        job.emit("finished", {"job_id": job.id, "status": job.status, "error": job.error})
+        logging.info(f"[Jobs] {job.kind} job {job.id} finished: {job.status}")
+
+
+# ----------------------------------------------------------------------
+# Process-wide queues
+# ----------------------------------------------------------------------
+job_queue = JobQueue()
+background_queue = JobQueue(
+    BACKGROUND_JOB_WORKERS, MAX_PENDING_BACKGROUND_JOBS, thread_name_prefix="background-job"
+)
+
+
+def submit_job(kind: str, fn: Callable[..., Dict[str, Any]], *args,
+               params: Optional[Dict[str, Any]] = None, **kwargs) -> Job:
+    return job_queue.submit(kind, fn, *args, params=params, **kwargs)
+
+
+def submit_background_job(kind: str, fn: Callable[..., Dict[str, Any]], *args,
+                          params: Optional[Dict[str, Any]] = None, **kwargs) -> Job:
+    return background_queue.submit(kind, fn, *args, params=params, **kwargs)
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    return job_queue.get(job_id) or background_queue.get(job_id)
+
+
+def list_jobs() -> List[Job]:
+    jobs = job_queue.list() + background_queue.list()
+    return sorted(jobs, key=lambda job: job.created, reverse=True)
@@ -0,0 +1,183 @@
+# services/listing.py
+"""
+SpriteForge – Directory Listings
+--------------------------------
+Paginated listings for the file APIs and the workspace file browser.
+
+- one os.scandir() pass per directory (type from d_type, one stat per
+  entry for size / mtime)
+- scans are cached per directory and reused while the directory's mtime
+  is unchanged (adding, removing or renaming an entry bumps it; rewriting
+  a file in place does not, so sizes can lag until the next change)
+- extension / kind filters and name / size / mtime sorting are applied
+  server side; pages are addressed by an opaque cursor (the sort, order
+  and sort key of the last item returned), so pages stay stable while
+  files are added
+"""
+
+import os
+import json
+import base64
+import bisect
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+LISTING_CACHE_MAX_DIRS = int(os.getenv("LISTING_CACHE_MAX_DIRS", "256"))
+LISTING_DEFAULT_LIMIT = int(os.getenv("LISTING_DEFAULT_LIMIT", "500"))
+LISTING_MAX_LIMIT = 5000
+
+SORT_KEYS = ("name", "size", "mtime")
+
+_scans: "OrderedDict[str, tuple]" = OrderedDict()
+_scans_lock = threading.Lock()
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _scan(path: str) -> List[Dict]:
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+                st = entry.stat()
+            except OSError:
+                # Vanished or dangling symlink
+                continue
+            entries.append({
+                "name": entry.name,
+                "path": entry.path,
+                "is_dir": is_dir,
+                "is_file": not is_dir,
+                "size": 0 if is_dir else st.st_size,
+                "mtime": st.st_mtime,
+            })
+    return entries
+
+
+def scan_directory(path: str) -> List[Dict]:
+    """All entries of `path`, from cache while the directory is unchanged."""
+    mtime = os.stat(path).st_mtime_ns
+
+    with _scans_lock:
+        cached = _scans.get(path)
+        if cached is not None and cached[0] == mtime:
+            _scans.move_to_end(path)
+            return cached[1]
+
+    entries = _scan(path)
+
+    with _scans_lock:
+        _scans[path] = (mtime, entries)
+        _scans.move_to_end(path)
+        while len(_scans) > LISTING_CACHE_MAX_DIRS:
+            _scans.popitem(last=False)
+    return entries
+
+
+@functools.total_ordering
+class _Descending:
+    """Wraps a sort value so it orders in reverse."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def _position(entry: Dict, sort: str, dirs_first: bool) -> list:
+    """What a cursor records about an entry: [dirs-first group?, value, name]."""
+    value = entry["name"].lower() if sort == "name" else entry[sort]
+    position = [value, entry["name"]]
+    if dirs_first:
+        position.insert(0, 0 if entry["is_dir"] else 1)
+    return position
+
+
+def _sort_key(position: list, order: str, dirs_first: bool) -> tuple:
+    # The order applies to (value, name) only; directories stay first
+    group, rest = (position[:1], position[1:]) if dirs_first else ([], position)
+    return (*group, tuple(rest) if order == "asc" else _Descending(tuple(rest)))
+
+
+def encode_cursor(listing: Dict, position: list) -> str:
+    data = {**listing, "after": position}
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, listing: Dict) -> list:
+    """The position a cursor continues after; it must come from the same sort / order."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(data, dict) or not isinstance(data.get("after"), list):
+        raise InvalidCursor("Invalid cursor")
+    if any(data.get(k) != v for k, v in listing.items()):
+        raise InvalidCursor("Cursor does not match this sort")
+    return data["after"]
+
+
+def list_directory(path: str, cursor: Optional[str] = None, limit: Optional[int] = None,
+                   extensions: Optional[Sequence[str]] = None, kind: Optional[str] = None,
+                   sort: str = "name", order: str = "asc", dirs_first: bool = False) -> Dict:
+    """
+    One page of `path`'s entries.
+
+    extensions: keep only files with these extensions (directories are
+    kept unless kind="file"). kind: "file" or "dir". sort: name | size |
+    mtime; order: asc | desc (directories still come first with
+    dirs_first). Returns {"items", "next_cursor", "total"} where total
+    counts the filtered entries. Raises FileNotFoundError,
+    NotADirectoryError and InvalidCursor / ValueError.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be 'asc' or 'desc'")
+    limit = max(1, min(LISTING_MAX_LIMIT, limit or LISTING_DEFAULT_LIMIT))
+    listing = {"sort": sort, "order": order, "dirs_first": bool(dirs_first)}
+
+    entries = scan_directory(path)
+
+    if extensions:
+        wanted = tuple(e.lower() if e.startswith(".") else "." + e.lower() for e in extensions)
+        entries = [e for e in entries if e["is_dir"] or e["name"].lower().endswith(wanted)]
+    if kind == "file":
+        entries = [e for e in entries if e["is_file"]]
+    elif kind == "dir":
+        entries = [e for e in entries if e["is_dir"]]
+
+    keyed = sorted(
+        ((_sort_key(_position(e, sort, dirs_first), order, dirs_first), e) for e in entries),
+        key=lambda pair: pair[0],
+    )
+    keys = [key for key, _ in keyed]
+
+    start = 0
+    if cursor:
+        after = _sort_key(decode_cursor(cursor, listing), order, dirs_first)
+        try:
+            start = bisect.bisect_right(keys, after)
+        except TypeError:
+            raise InvalidCursor("Invalid cursor")
+
+    page = [e for _, e in keyed[start:start + limit]]
+    more = start + limit < len(keyed)
+
+    return {
+        "items": [dict(e) for e in page],
+        "next_cursor": encode_cursor(listing, _position(page[-1], sort, dirs_first)) if more and page else None,
+        "total": len(keyed),
+    }
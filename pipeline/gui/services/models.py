@@ -9,6 +9,9 @@ PROJECT_ROOT = "/workspace/pipeline/projects"
 
 VALID_EXTENSIONS = (".safetensors", ".ckpt", ".pth")
 
+# Folders the models page may upload into
+MODEL_UPLOAD_FOLDERS = ("checkpoints", "loras", "vae", "controlnet", "ipadapter", "animatediff", "motion")
+
 MODEL_CATEGORIES = {
     "motion": "motion",
     "render": "checkpoints",
@@ -0,0 +1,128 @@
+# services/motion_cache.py
+"""
+SpriteForge – HY-Motion Result Cache
+------------------------------------
+HY-Motion is deterministic for a fixed seed, so a seeded request that was
+generated before can reuse the earlier run directory instead of running
+inference again.
+
+Key: normalized prompt text + skeleton + seed + HY-Motion model version.
+Unseeded requests are never cached.
+
+Cached runs stay where generate_motion() wrote them (under
+/workspace/animations); the cache only indexes them. Runs no seeded key
+covers (unseeded or failed) are indexed too, under "run:<run_id>", so
+they share the disk budget without ever being served as a hit. When the
+indexed runs exceed HY_MOTION_CACHE_MAX_BYTES the least recently used
+run directories are deleted.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Any, Dict, Optional
+
+from services.disk_cache import CACHE_ROOT, DiskLRUCache
+
+HY_MOTION_CACHE_DIR = os.path.join(CACHE_ROOT, "motion")
+HY_MOTION_CACHE_MAX_BYTES = int(os.getenv("HY_MOTION_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+
+# Pin explicitly when weights are swapped in place without changing files
+# the fingerprint below can see.
+HY_MOTION_MODEL_VERSION = os.getenv("HY_MOTION_MODEL_VERSION")
+
+WEIGHT_EXTENSIONS = (".safetensors", ".ckpt", ".pth", ".pt", ".bin")
+
+_cache: Optional[DiskLRUCache] = None
+_cache_lock = threading.Lock()
+_model_version: Optional[str] = None
+
+
+def get_motion_cache() -> DiskLRUCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskLRUCache("motion", HY_MOTION_CACHE_DIR, HY_MOTION_CACHE_MAX_BYTES)
+        return _cache
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Unicode-normalized, case-folded, whitespace-collapsed prompt text."""
+    text = unicodedata.normalize("NFKC", prompt or "")
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def model_version(search_dirs, inference_path: str) -> str:
+    """
+    HY_MOTION_MODEL_VERSION if set, otherwise a fingerprint of the weight
+    files (path, size, mtime) and the inference script. Computed once per
+    process; restart after swapping weights.
+    """
+    global _model_version
+    if HY_MOTION_MODEL_VERSION:
+        return HY_MOTION_MODEL_VERSION
+    if _model_version is not None:
+        return _model_version
+
+    h = hashlib.sha256()
+    for base in search_dirs:
+        for root, dirs, files in os.walk(base):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(WEIGHT_EXTENSIONS) or os.path.join(root, name) == inference_path:
+                    st = os.stat(os.path.join(root, name))
+                    h.update(f"{os.path.join(root, name)}:{st.st_size}:{st.st_mtime_ns};".encode())
+
+    _model_version = h.hexdigest()[:16]
+    return _model_version
+
+
+def motion_cache_key(prompt: str, skeleton: str, seed, version: str) -> Optional[str]:
+    if seed is None:
+        return None
+    document = {
+        "prompt": normalize_prompt(prompt),
+        "skeleton": skeleton,
+        "seed": int(seed),
+        "model": version,
+    }
+    return hashlib.sha256(json.dumps(document, sort_keys=True).encode()).hexdigest()
+
+
+def lookup_motion(key: str) -> Optional[Dict[str, Any]]:
+    entry = get_motion_cache().get(key)
+    if entry is None:
+        return None
+
+    if not entry["meta"].get("result"):
+        # A tracked run ("run:<run_id>"), not a cached result
+        return None
+
+    result = dict(entry["meta"]["result"])
+    # The run must still hold what it promised
+    for field in ("video", "frames"):
+        if result.get(field) and not os.path.exists(result[field]):
+            logging.warning(f"[MotionCache] Run {result.get('run_id')} lost its {field}; dropping entry")
+            get_motion_cache().delete(key)
+            return None
+
+    logging.info(f"[MotionCache] Hit {key[:12]} → run {result.get('run_id')}")
+    result["cached"] = True
+    return result
+
+
+def store_motion(key: str, result: Dict[str, Any]):
+    if not (result.get("video") or result.get("frames")):
+        return
+    get_motion_cache().put(key, result["output_dir"], {"result": dict(result)})
+    logging.info(f"[MotionCache] Stored {key[:12]} → run {result.get('run_id')}")
+
+
+def track_run(run_id: str, output_dir: str):
+    """Brings a run that is not cached under the disk budget (oldest evicted first)."""
+    if os.path.isdir(output_dir):
+        get_motion_cache().put(f"run:{run_id}", output_dir, {"run_id": run_id})
@@ -1,10 +1,87 @@
 # services/reference_descriptor.py
+"""
+SpriteForge – Reference Image Descriptors
+-----------------------------------------
+Ingest and structured descriptions of reference images for sprite
+suggest / refine.
+
+- uploads are hashed and deduplicated per project; the original is kept
+  and a bounded WebP working copy and thumbnail are derived once
+- descriptors are cached on disk by image content hash (SHA-256) plus the
+  vision backend identity, so a renamed or re-uploaded image is a hit
+- misses are described concurrently on a bounded thread pool
+- the vision backend is pluggable (REFERENCE_VISION_BACKEND):
+    "stub"   – fixed placeholder descriptor (default, no model)
+    "fake"   – deterministic local analysis with Pillow (palette,
+               silhouette, lighting); no model, useful for tests
+    "ollama" – an Ollama vision model (OLLAMA_VISION_MODEL)
+"""
+
 import os
+import io
+import json
+import base64
+import hashlib
 import logging
-from typing import List, Dict
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from PIL import Image
+from werkzeug.utils import secure_filename
+
+from services import http_client
+from services.image_pool import derive_images, IMAGE_DECODE_ERRORS
+from services.disk_cache import CACHE_ROOT, DiskLRUCache
+from services.ai.schema import schema_from_example
 
 PROJECT_ROOT = "/workspace/pipeline/projects"
 
+# Ingest: bounded working copy + thumbnail, original kept for archive
+REFERENCE_WORKING_MAX_SIDE = int(os.getenv("REFERENCE_WORKING_MAX_SIDE", "1024"))
+REFERENCE_THUMB_SIDE = int(os.getenv("REFERENCE_THUMB_SIDE", "256"))
+REFERENCE_WEBP_QUALITY = int(os.getenv("REFERENCE_WEBP_QUALITY", "90"))
+
+REFERENCE_VISION_BACKEND = os.getenv("REFERENCE_VISION_BACKEND", "stub").lower()
+REFERENCE_DESCRIBE_WORKERS = int(os.getenv("REFERENCE_DESCRIBE_WORKERS", "4"))
+REFERENCE_CACHE_DIR = os.path.join(CACHE_ROOT, "reference")
+REFERENCE_CACHE_MAX_BYTES = int(os.getenv("REFERENCE_CACHE_MAX_BYTES", str(64 * 1024 ** 2)))
+# Remembered file hashes (one entry per path + size + mtime seen)
+REFERENCE_HASH_MEMO_ENTRIES = int(os.getenv("REFERENCE_HASH_MEMO_ENTRIES", "4096"))
+
+OLLAMA_VISION_URL = os.getenv("OLLAMA_VISION_URL", os.getenv("OLLAMA_URL", "http://127.0.0.1:11434/api/generate"))
+OLLAMA_VISION_MODEL = os.getenv("OLLAMA_VISION_MODEL", "llava:latest")
+# Longest side sent to the vision model
+OLLAMA_VISION_MAX_SIDE = int(os.getenv("OLLAMA_VISION_MAX_SIDE", "768"))
+
+# Bump when the descriptor fields or a backend's output change meaning
+DESCRIPTOR_VERSION = "1"
+
+DESCRIPTOR_FIELDS = {
+    "summary": "string",
+    "style": "string",
+    "palette": ["string"],
+    "clothing": ["string"],
+    "silhouette": "string",
+    "lighting": "string",
+}
+
+_describe_executor = ThreadPoolExecutor(
+    max_workers=REFERENCE_DESCRIBE_WORKERS,
+    thread_name_prefix="reference-describe",
+)
+
+_cache: Optional[DiskLRUCache] = None
+_cache_lock = threading.Lock()
+_ingest_lock = threading.Lock()
+
+# (path, size, mtime_ns) → sha256, so unchanged files are not re-read;
+# least recently used entries go past REFERENCE_HASH_MEMO_ENTRIES
+_hash_memo: "OrderedDict[tuple, str]" = OrderedDict()
+_hash_memo_lock = threading.Lock()
+
 
 def _reference_dir(project_id: str) -> str:
     path = os.path.join(PROJECT_ROOT, project_id, "references")
@@ -12,41 +89,346 @@ def _reference_dir(project_id: str) -> str:
     return path
 
 
+def _load_manifest(ref_dir: str) -> Dict[str, Dict]:
+    path = os.path.join(ref_dir, "index.json")
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"[Reference] Unreadable manifest {path}: {e}")
+        return {}
+
+
+def _save_manifest(ref_dir: str, manifest: Dict[str, Dict]):
+    path = os.path.join(ref_dir, "index.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _receive(file_storage, ref_dir: str):
+    """Streams the upload to a temp file, hashing on the way. Returns (tmp, sha256, bytes)."""
+    tmp = os.path.join(ref_dir, f".incoming-{uuid.uuid4().hex}")
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in iter(lambda: file_storage.stream.read(1024 * 1024), b""):
+                h.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        # Client disconnect, full disk, ...: leave no .incoming-* behind
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return tmp, h.hexdigest(), size
+
+
+def _remove_quietly(*paths: str):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"[Reference] Could not remove {path}: {e}")
+
+
 def save_reference_file(project_id: str, file_storage) -> Dict:
     """
-    Save an uploaded reference image into the project references folder.
-    Returns metadata including serverPath for frontend use.
+    Ingests an uploaded reference image into the project references folder:
+
+      references/originals/<hash><ext>   the upload, byte for byte (archive)
+      references/<hash>.webp             working copy, longest side <= REFERENCE_WORKING_MAX_SIDE
+      references/thumbs/<hash>.webp      thumbnail, longest side <= REFERENCE_THUMB_SIDE
+
+    serverPath points at the working copy, which is what description,
+    ComfyUI and previews should read. Re-uploading identical content
+    returns the existing entry with "duplicate": true. Raises ValueError
+    if the upload is not a readable image.
     """
     ref_dir = _reference_dir(project_id)
-    filename = file_storage.filename
-    path = os.path.join(ref_dir, filename)
+    filename = secure_filename(file_storage.filename or "") or "reference"
+    tmp, content_hash, size = _receive(file_storage, ref_dir)
 
-    file_storage.save(path)
-    logging.info(f"[Reference] Saved reference image for {project_id}: {path}")
+    with _ingest_lock:
+        manifest = _load_manifest(ref_dir)
+        existing = manifest.get(content_hash)
+        if existing and all(os.path.exists(existing[k]) for k in ("serverPath", "originalPath", "thumbnailPath")):
+            os.remove(tmp)
+            if filename not in existing["filenames"]:
+                existing["filenames"].append(filename)
+                _save_manifest(ref_dir, manifest)
+            logging.info(f"[Reference] Duplicate upload for {project_id}: {filename} = {existing['filename']}")
+            return {**existing, "duplicate": True}
 
-    return {
+    stem = content_hash[:16]
+    ext = os.path.splitext(filename)[1].lower()
+    original = os.path.join(ref_dir, "originals", stem + ext)
+    working = os.path.join(ref_dir, stem + ".webp")
+    thumbnail = os.path.join(ref_dir, "thumbs", stem + ".webp")
+    try:
+        os.makedirs(os.path.dirname(original), exist_ok=True)
+        os.makedirs(os.path.dirname(thumbnail), exist_ok=True)
+        os.replace(tmp, original)
+    except BaseException:
+        _remove_quietly(tmp)
+        raise
+
+    try:
+        derived = derive_images(original, [
+            (working, REFERENCE_WORKING_MAX_SIDE, "WEBP", {"quality": REFERENCE_WEBP_QUALITY, "method": 4}),
+            (thumbnail, REFERENCE_THUMB_SIDE, "WEBP", {"quality": 80, "method": 4}),
+        ])
+    except IMAGE_DECODE_ERRORS as e:
+        _remove_quietly(original, working, thumbnail)
+        raise ValueError(f"Not a readable image: {e}")
+    except BaseException:
+        # Pool failure, interrupt, ...: drop the files and let it propagate
+        _remove_quietly(original, working, thumbnail)
+        raise
+
+    meta = {
         "filename": filename,
-        "serverPath": path,
+        "filenames": [filename],
+        "hash": content_hash,
+        "serverPath": working,
+        "originalPath": original,
+        "thumbnailPath": thumbnail,
+        "width": derived["sizes"][0][0],
+        "height": derived["sizes"][0][1],
+        "originalWidth": derived["source_size"][0],
+        "originalHeight": derived["source_size"][1],
+        "bytes": size,
+        "workingBytes": os.path.getsize(working),
+    }
+
+    with _ingest_lock:
+        manifest = _load_manifest(ref_dir)
+        manifest[content_hash] = meta
+        _save_manifest(ref_dir, manifest)
+
+    logging.info(
+        f"[Reference] Ingested {filename} for {project_id}: {meta['originalWidth']}x{meta['originalHeight']} "
+        f"{size} bytes → {meta['width']}x{meta['height']} {meta['workingBytes']} bytes"
+    )
+    return {**meta, "duplicate": False}
+
+
+# ---------------------------------------------------------
+# Content hashing and cache
+# ---------------------------------------------------------
+
+def get_reference_cache() -> DiskLRUCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskLRUCache("reference", REFERENCE_CACHE_DIR, REFERENCE_CACHE_MAX_BYTES)
+        return _cache
+
+
+def file_sha256(path: str) -> str:
+    st = os.stat(path)
+    memo_key = (path, st.st_size, st.st_mtime_ns)
+    with _hash_memo_lock:
+        digest = _hash_memo.get(memo_key)
+        if digest is not None:
+            _hash_memo.move_to_end(memo_key)
+            return digest
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _hash_memo_lock:
+        _hash_memo[memo_key] = digest
+        while len(_hash_memo) > REFERENCE_HASH_MEMO_ENTRIES:
+            _hash_memo.popitem(last=False)
+    return digest
+
+
+def _backend_identity(backend: str) -> str:
+    if backend == "ollama":
+        return f"ollama:{OLLAMA_VISION_MODEL}"
+    return backend
+
+
+def descriptor_key(content_hash: str, backend: str) -> str:
+    identity = f"{content_hash}:{_backend_identity(backend)}:{DESCRIPTOR_VERSION}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def _lookup(key: str) -> Optional[Dict]:
+    entry = get_reference_cache().get(key)
+    if entry is None:
+        return None
+    try:
+        with open(entry["path"], "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"[Reference] Unreadable cached descriptor {key[:12]}: {e}")
+        get_reference_cache().delete(key)
+        return None
+
+
+def _store(key: str, descriptor: Dict):
+    cache = get_reference_cache()
+    path = cache.entry_path(key) + ".json"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(descriptor, f)
+    os.replace(tmp, path)
+    cache.put(key, path)
+
+
+# ---------------------------------------------------------
+# Vision backends
+# ---------------------------------------------------------
+
+def describe_stub(path: str) -> Dict:
+    return {
+        "summary": "Character reference image",
+        "style": "unknown",
+        "palette": [],
+        "clothing": [],
+        "silhouette": "unknown",
+        "lighting": "unknown",
     }
 
 
-def describe_reference_images(paths: List[str]) -> List[Dict]:
+def describe_fake(path: str) -> Dict:
+    """Deterministic descriptor from the pixels alone."""
+    with Image.open(path) as img:
+        width, height = img.size
+        rgba = img.convert("RGBA")
+
+    bbox = rgba.getchannel("A").getbbox() or (0, 0, width, height)
+    box_w, box_h = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    ratio = box_h / box_w if box_w else 1.0
+    silhouette = "tall" if ratio > 1.25 else "wide" if ratio < 0.8 else "compact"
+
+    small = rgba.crop(bbox).convert("RGB")
+    small.thumbnail((64, 64))
+    quantized = small.quantize(colors=5)
+    palette = quantized.getpalette()[:15]
+    counts = sorted(quantized.getcolors() or [], reverse=True)
+    colors = [
+        "#%02x%02x%02x" % tuple(palette[index * 3:index * 3 + 3])
+        for _, index in counts
+    ]
+
+    luminance = sum(small.convert("L").getdata()) / max(1, small.width * small.height)
+    lighting = "dark" if luminance < 85 else "bright" if luminance > 170 else "balanced"
+
+    return {
+        "summary": f"{width}x{height} reference image, {silhouette} subject",
+        "style": "unknown",
+        "palette": colors,
+        "clothing": [],
+        "silhouette": silhouette,
+        "lighting": lighting,
+    }
+
+
+def describe_ollama(path: str) -> Dict:
+    """One vision-model call, constrained to the descriptor schema."""
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        img.thumbnail((OLLAMA_VISION_MAX_SIDE, OLLAMA_VISION_MAX_SIDE))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+
+    prompt = (
+        "Describe this character reference image for a sprite artist. "
+        "Return only JSON with these fields: " + json.dumps(DESCRIPTOR_FIELDS)
+    )
+    r = http_client.post(
+        OLLAMA_VISION_URL,
+        json={
+            "model": OLLAMA_VISION_MODEL,
+            "prompt": prompt,
+            "images": [base64.b64encode(buf.getvalue()).decode("ascii")],
+            "format": schema_from_example(DESCRIPTOR_FIELDS),
+            "stream": False,
+        },
+        timeout=120
+    )
+    r.raise_for_status()
+    described = json.loads(r.json().get("response") or "{}")
+
+    descriptor = describe_stub(path)
+    descriptor.update({k: v for k, v in described.items() if k in DESCRIPTOR_FIELDS})
+    return descriptor
+
+
+VISION_BACKENDS: Dict[str, Callable[[str], Dict]] = {
+    "stub": describe_stub,
+    "fake": describe_fake,
+    "ollama": describe_ollama,
+}
+
+
+# ---------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------
+
+def _describe_one(path: str, content_hash: str, backend: str, use_cache: bool) -> Dict:
+    key = descriptor_key(content_hash, backend)
+    descriptor = _lookup(key) if use_cache else None
+    if descriptor is not None:
+        return {**descriptor, "cached": True}
+
+    descriptor = VISION_BACKENDS[backend](path)
+    _store(key, descriptor)
+    return {**descriptor, "cached": False}
+
+
+def describe_reference_images(paths: List[str], use_cache: bool = True,
+                              backend: Optional[str] = None) -> List[Dict]:
     """
-    Given a list of absolute image paths, return structured descriptions.
-    Stub implementation for now; later you can plug in a real vision model.
+    Given a list of absolute image paths, return structured descriptions
+    in the same order. Images with identical content are described once;
+    cached descriptors cost no model call. Unreadable paths come back as
+    {"path", "status": "error", "message"}.
     """
-    descriptions = []
-
-    for p in paths:
-        # TODO: replace this with actual vision model output
-        descriptions.append({
-            "path": p,
-            "summary": "Character reference image",
-            "style": "unknown",
-            "palette": [],
-            "clothing": [],
-            "silhouette": "unknown",
-            "lighting": "unknown",
-        })
+    backend = (backend or REFERENCE_VISION_BACKEND).lower()
+    if backend not in VISION_BACKENDS:
+        raise ValueError(f"Unknown vision backend '{backend}'")
+
+    descriptions: List[Optional[Dict]] = [None] * len(paths)
+    by_hash: Dict[str, List[int]] = {}
+
+    for index, p in enumerate(paths):
+        try:
+            by_hash.setdefault(file_sha256(p), []).append(index)
+        except OSError as e:
+            descriptions[index] = {"path": p, "status": "error", "message": f"Cannot read image: {e.strerror}"}
+
+    futures = {
+        content_hash: _describe_executor.submit(_describe_one, paths[indices[0]], content_hash, backend, use_cache)
+        for content_hash, indices in by_hash.items()
+    }
+
+    described = 0
+    for content_hash, future in futures.items():
+        try:
+            descriptor = future.result()
+            described += not descriptor["cached"]
+        except Exception as e:
+            logging.error(f"[Reference] Failed to describe {paths[by_hash[content_hash][0]]}: {e}")
+            descriptor = {"status": "error", "message": str(e)}
+
+        for index in by_hash[content_hash]:
+            descriptions[index] = {"path": paths[index], "hash": content_hash, **descriptor}
 
+    logging.info(
+        f"[Reference] Described {len(paths)} images ({len(futures)} unique, "
+        f"{described} via '{backend}', {len(futures) - described} cached)"
+    )
     return descriptions
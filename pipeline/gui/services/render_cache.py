@@ -0,0 +1,256 @@
+# services/render_cache.py
+"""
+SpriteForge – Sprite Render Cache
+---------------------------------
+Content-addressed cache of finished ComfyUI sprite renders.
+
+The key is a SHA-256 over a canonical JSON document of:
+  - the workflow graph
+  - the runtime inputs (minus per-run bookkeeping such as run_id)
+  - the content hash of every file / directory the inputs point at
+    (motion frames, reference images, ...)
+  - the identity (path, size, mtime) of every model file the graph or the
+    project's active models reference
+
+A hit returns the stored /history entry plus local copies of the output
+images, without touching ComfyUI.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from services import http_client
+from services.comfyui import COMFYUI_URL
+from services.disk_cache import CACHE_ROOT, DiskLRUCache
+from services.models import MODEL_ROOT, VALID_EXTENSIONS, load_active_models
+
+RENDER_CACHE_DIR = os.path.join(CACHE_ROOT, "render")
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+# Remembered input-file hashes; a frames directory is one entry per frame
+RENDER_HASH_MEMO_ENTRIES = int(os.getenv("RENDER_HASH_MEMO_ENTRIES", "16384"))
+
+# Inputs that change on every run without changing the render
+VOLATILE_INPUTS = ("run_id", "project_id", "no_cache")
+
+_cache: Optional[DiskLRUCache] = None
+_cache_lock = threading.Lock()
+
+# (path, size, mtime_ns) -> sha256, so unchanged frames are hashed once;
+# least recently used entries go past RENDER_HASH_MEMO_ENTRIES
+_file_hashes: "OrderedDict[tuple, str]" = OrderedDict()
+_file_hashes_lock = threading.Lock()
+_model_index: Optional[Dict[str, str]] = None
+
+
+def get_render_cache() -> DiskLRUCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskLRUCache("render", RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES)
+        return _cache
+
+
+# ---------------------------------------------------------
+# Key building
+# ---------------------------------------------------------
+
+def _file_digest(path: str) -> str:
+    st = os.stat(path)
+    stamp = (path, st.st_size, st.st_mtime_ns)
+    with _file_hashes_lock:
+        digest = _file_hashes.get(stamp)
+        if digest is not None:
+            _file_hashes.move_to_end(stamp)
+            return digest
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _file_hashes_lock:
+        _file_hashes[stamp] = digest
+        while len(_file_hashes) > RENDER_HASH_MEMO_ENTRIES:
+            _file_hashes.popitem(last=False)
+    return digest
+
+
+def _content_digest(path: str) -> str:
+    if os.path.isfile(path):
+        return _file_digest(path)
+
+    # Directory: names and contents of every file, in sorted order
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            h.update(os.path.relpath(full, path).encode())
+            h.update(_file_digest(full).encode())
+    return h.hexdigest()
+
+
+def _strings(value) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [s for v in value.values() for s in _strings(v)]
+    if isinstance(value, (list, tuple)):
+        return [s for v in value for s in _strings(v)]
+    return []
+
+
+def _input_files(inputs: Dict[str, Any]) -> Dict[str, str]:
+    """Content hashes of every absolute path mentioned in the inputs."""
+    digests = {}
+    for value in _strings(inputs):
+        if os.path.isabs(value) and os.path.exists(value) and value not in digests:
+            digests[value] = _content_digest(value)
+    return digests
+
+
+def _models_by_name(refresh: bool = False) -> Dict[str, str]:
+    global _model_index
+    if _model_index is None or refresh:
+        index = {}
+        for root, _, files in os.walk(MODEL_ROOT):
+            for name in files:
+                if name.lower().endswith(VALID_EXTENSIONS):
+                    full = os.path.join(root, name)
+                    index.setdefault(name, full)
+                    index.setdefault(os.path.relpath(full, MODEL_ROOT), full)
+        _model_index = index
+    return _model_index
+
+
+def _model_identities(graph: Dict[str, Any], project_id: Optional[str]) -> Dict[str, Any]:
+    names = [s for s in _strings(graph) if s.lower().endswith(VALID_EXTENSIONS)]
+    if project_id:
+        names += [
+            s for s in _strings(load_active_models(project_id))
+            if s.lower().endswith(VALID_EXTENSIONS)
+        ]
+
+    identities = {}
+    index = _models_by_name()
+    if any(not os.path.isabs(n) and n not in index and os.path.basename(n) not in index for n in names):
+        # A model was added since the index was built
+        index = _models_by_name(refresh=True)
+
+    for name in sorted(set(names)):
+        path = name if os.path.isabs(name) else index.get(name) or index.get(os.path.basename(name))
+        if path and os.path.exists(path):
+            st = os.stat(path)
+            identities[name] = [os.path.relpath(path, MODEL_ROOT), st.st_size, st.st_mtime_ns]
+        else:
+            identities[name] = None
+    return identities
+
+
+def render_cache_key(graph: Dict[str, Any], inputs: Dict[str, Any]) -> str:
+    runtime = {k: v for k, v in inputs.items() if k not in VOLATILE_INPUTS}
+    document = {
+        "graph": graph,
+        "inputs": runtime,
+        "files": _input_files(runtime),
+        "models": _model_identities(graph, inputs.get("project_id")),
+    }
+    canonical = json.dumps(document, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+# ---------------------------------------------------------
+# Lookup / store
+# ---------------------------------------------------------
+
+def _output_images(history: Dict[str, Any]) -> List[Dict[str, Any]]:
+    images = []
+    for node_id, output in (history.get("outputs") or {}).items():
+        for kind in ("images", "gifs", "videos"):
+            for item in output.get(kind) or []:
+                if isinstance(item, dict) and item.get("filename"):
+                    images.append({"node": node_id, **item})
+    return images
+
+
+def lookup_render(key: str) -> Optional[Dict[str, Any]]:
+    entry = get_render_cache().get(key)
+    if entry is None:
+        return None
+
+    try:
+        with open(os.path.join(entry["path"], "result.json"), "r") as f:
+            stored = json.load(f)
+    except Exception as e:
+        logging.error(f"[RenderCache] Unreadable entry {key}: {e}")
+        get_render_cache().delete(key)
+        return None
+
+    files = [os.path.join(entry["path"], "outputs", name) for name in stored.get("files", [])]
+    logging.info(f"[RenderCache] Hit {key[:12]} (prompt {stored.get('prompt_id')})")
+
+    return {
+        "status": "success",
+        "cached": True,
+        "cache_key": key,
+        "run_id": stored.get("run_id"),
+        "prompt_id": stored.get("prompt_id"),
+        "result": stored.get("result"),
+        "files": files,
+    }
+
+
+def store_render(key: str, result: Dict[str, Any]) -> bool:
+    """
+    Copies a successful render's outputs out of ComfyUI into the cache.
+    Outputs are fetched through /view so this also works against a remote
+    ComfyUI.
+    """
+    cache = get_render_cache()
+    entry_dir = cache.entry_path(key)
+    tmp_dir = entry_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_dir, "outputs"), exist_ok=True)
+
+    history = result.get("result") or {}
+    files = []
+
+    try:
+        for i, item in enumerate(_output_images(history)):
+            name = f"{i:04d}_{os.path.basename(item['filename'])}"
+            params = {
+                "filename": item["filename"],
+                "subfolder": item.get("subfolder", ""),
+                "type": item.get("type", "output"),
+            }
+            with http_client.get(f"{COMFYUI_URL}/view", params=params, stream=True, timeout=60) as r:
+                r.raise_for_status()
+                with open(os.path.join(tmp_dir, "outputs", name), "wb") as f:
+                    for chunk in r.iter_content(1024 * 1024):
+                        f.write(chunk)
+            files.append(name)
+
+        with open(os.path.join(tmp_dir, "result.json"), "w") as f:
+            json.dump({
+                "run_id": result.get("run_id"),
+                "prompt_id": result.get("prompt_id"),
+                "result": history,
+                "files": files,
+            }, f)
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+    except Exception as e:
+        logging.error(f"[RenderCache] Failed to store {key[:12]}: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+    cache.put(key, entry_dir, {"prompt_id": result.get("prompt_id"), "files": len(files)})
+    logging.info(f"[RenderCache] Stored {key[:12]} ({len(files)} outputs)")
+    return True
@@ -1,49 +1,265 @@
 # services/spritesheet.py
 import os
+import sys
 import uuid
 import logging
-from PIL import Image
+from PIL import Image, ImageColor
 from datetime import datetime
 import json
 
+from services.atlas import grid_layout, pack_rects
+from services.frame_prepass import analyze_frames, find_duplicates, batch_bytes
+from services.image_pool import decode_frames, encode_image_async, get_image_workers
+
+try:
+    import resource
+except ImportError:  # not available on Windows dev machines
+    resource = None
+
 PROJECT_ROOT = "/workspace/pipeline/projects"
 
+RGBA_BYTES_PER_PIXEL = 4
+
+LAYOUTS = ("strip", "grid", "packed")
+IMAGE_FORMATS = {
+    "png": ("PNG", {"optimize": False}),
+    "webp": ("WEBP", {"lossless": True, "method": 4}),
+}
+MAX_TEXTURE_SIZE = int(os.getenv("SPRITEFORGE_MAX_TEXTURE_SIZE", "4096"))
+
+
+def _frame_size(path: str):
+    # Image.open only parses the header; pixels are decoded lazily
+    with Image.open(path) as img:
+        return img.size
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
+
 
-def assemble_spritesheet(project_id: str, frames: list, stride: int = 1):
+def _page_path(output_dir: str, index: int, ext: str) -> str:
+    name = f"sheet.{ext}" if index == 0 else f"sheet_{index}.{ext}"
+    return os.path.join(output_dir, name)
+
+
+def assemble_spritesheet(
+    project_id: str,
+    frames: list,
+    stride: int = 1,
+    layout: str = "strip",
+    rows: int | None = None,
+    columns: int | None = None,
+    padding: int = 0,
+    max_size: int = MAX_TEXTURE_SIZE,
+    power_of_two: bool = False,
+    pivot=(0.5, 0.5),
+    background=None,
+    dedupe: bool | None = None,
+    image_format: str = "png",
+):
     """
     frames: list of absolute frame paths
     stride: 1 = every frame, 2 = every 2nd frame, etc.
+    layout:
+      - strip:  one row of equal cells
+      - grid:   equal cells, `rows` / `columns` (square-ish if neither)
+      - packed: frames are alpha-trimmed and MaxRects-packed
+    Pages never exceed max_size; extra frames spill onto sheet_1.png, ...
+    pivot: normalized pivot in source-frame space, re-expressed per
+    sprite relative to its (possibly trimmed) rect.
+    dedupe: pixel-identical frames share one cell and are recorded with
+    "alias_of" (default: on for packed, off for strip/grid).
+    image_format: "png" or "webp" (lossless).
+
+    Frames are streamed: the canvas is sized from image headers, then
+    frames are decoded by the image process pool (a bounded window in
+    flight, pasted in order) and each finished page is encoded in a worker
+    while the next one renders. Peak memory is two pages plus the decode
+    window.
     """
 
     frames = frames[::stride]
     if not frames:
         return {"status": "error", "message": "No frames after stride filtering"}
 
+    if layout not in LAYOUTS:
+        return {"status": "error", "message": f"Unknown layout '{layout}'"}
+
+    if image_format not in IMAGE_FORMATS:
+        return {"status": "error", "message": f"Unknown image format '{image_format}'"}
+
+    try:
+        fill = ImageColor.getcolor(background, "RGBA") if background and background != "transparent" else (0, 0, 0, 0)
+    except ValueError:
+        return {"status": "error", "message": f"Invalid background color '{background}'"}
+
     run_id = str(uuid.uuid4())[:8]
     output_dir = os.path.join(PROJECT_ROOT, project_id, "sprites", run_id)
     os.makedirs(output_dir, exist_ok=True)
 
-    logging.info(f"[SpriteForge] Assembling sheet for project {project_id} (stride={stride})")
+    logging.info(f"[SpriteForge] Assembling {layout} sheet for project {project_id} (stride={stride})")
+
+    rss_before = _peak_rss_bytes()
+
+    # ------------------------------------------------------------------
+    # Measure frames and lay out pages
+    # ------------------------------------------------------------------
+    if dedupe is None:
+        dedupe = layout == "packed"
+
+    prepass_bytes = 0
+    aliases = {}
+
+    if layout == "packed" or dedupe:
+        analysis = analyze_frames(frames)
+        sizes = [info["size"] for info in analysis]
+        prepass_bytes = max(batch_bytes(size) for size in set(sizes)) * get_image_workers()
+        if dedupe:
+            aliases = find_duplicates(analysis, match_offsets=layout != "packed")
+    else:
+        sizes = [_frame_size(f) for f in frames]
+
+    if layout == "packed":
+        # Fully transparent frames keep a 1x1 cell so they stay addressable
+        crops = [info["bbox"] or (0, 0, 1, 1) for info in analysis]
+    else:
+        crops = [None] * len(frames)
+
+    unique = [i for i in range(len(frames)) if i not in aliases]
+
+    w = max(size[0] for size in sizes)
+    h = max(size[1] for size in sizes)
+
+    try:
+        if layout == "packed":
+            rect_sizes = [(crops[i][2] - crops[i][0], crops[i][3] - crops[i][1]) for i in unique]
+            pages = pack_rects(rect_sizes, max_size, padding, power_of_two)
+        else:
+            pages = grid_layout(
+                len(unique), w, h,
+                rows=1 if layout == "strip" else rows,
+                columns=None if layout == "strip" else columns,
+                padding=padding, max_size=max_size, power_of_two=power_of_two,
+            )
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    # Layout indices are positions in `unique`; map back to frame indices
+    for page in pages:
+        page["rects"] = {unique[slot]: rect for slot, rect in page["rects"].items()}
+
+    # ------------------------------------------------------------------
+    # Render pages one at a time
+    # ------------------------------------------------------------------
+    sprites = [None] * len(frames)
+    page_meta = []
+    sheet_bytes = 0
+    peak_frame_bytes = 0
+    decode_window = 2 * get_image_workers()
+    save_format, save_options = IMAGE_FORMATS[image_format]
+    pending_save = None
+
+    for page_index, page in enumerate(pages):
+        sheet = Image.new("RGBA", (page["width"], page["height"]), fill)
+        sheet_bytes = max(sheet_bytes, sheet.width * sheet.height * RGBA_BYTES_PER_PIXEL)
+
+        order = sorted(page["rects"])
+        decoded = decode_frames(
+            [frames[i] for i in order], [crops[i] for i in order], window=decode_window
+        )
+
+        for idx, img in zip(order, decoded):
+            x, y, rw, rh = page["rects"][idx]
+            crop = crops[idx]
+            src_w, src_h = sizes[idx]
+            if crop is None:
+                rw, rh = src_w, src_h
+
+            sheet.paste(img, (x, y))
+            peak_frame_bytes = max(peak_frame_bytes, img.width * img.height * RGBA_BYTES_PER_PIXEL)
+            img.close()
+
+            offset_x, offset_y = (crop[0], crop[1]) if crop else (0, 0)
+            sprites[idx] = {
+                "index": idx,
+                "source": frames[idx],
+                "page": page_index,
+                "rect": {"x": x, "y": y, "w": rw, "h": rh},
+                "offset": {"x": offset_x, "y": offset_y},
+                "source_size": {"w": src_w, "h": src_h},
+                "trimmed": bool(crop) and (rw, rh) != (src_w, src_h),
+                "pivot": {
+                    "x": round((pivot[0] * src_w - offset_x) / rw, 6),
+                    "y": round((pivot[1] * src_h - offset_y) / rh, 6),
+                },
+            }
 
-    images = [Image.open(f).convert("RGBA") for f in frames]
+        # Encode this page in a worker while the next page renders
+        if pending_save is not None:
+            pending_save.result()
+        sheet_path = _page_path(output_dir, page_index, image_format)
+        pending_save = encode_image_async(sheet, sheet_path, save_format, **save_options)
+        sheet.close()
 
-    w, h = images[0].size
-    sheet = Image.new("RGBA", (w * len(images), h))
+        page_meta.append({
+            "index": page_index,
+            "path": sheet_path,
+            "width": page["width"],
+            "height": page["height"],
+            "num_frames": len(page["rects"]),
+        })
 
-    for i, img in enumerate(images):
-        sheet.paste(img, (i * w, 0))
+    if pending_save is not None:
+        pending_save.result()
 
-    sheet_path = os.path.join(output_dir, "sheet.png")
-    sheet.save(sheet_path)
+    for idx, original in aliases.items():
+        src_w, src_h = sizes[idx]
+        rect = sprites[original]["rect"]
+        offset_x, offset_y = (crops[idx][0], crops[idx][1]) if crops[idx] else (0, 0)
+        sprites[idx] = {
+            **sprites[original],
+            "index": idx,
+            "source": frames[idx],
+            "offset": {"x": offset_x, "y": offset_y},
+            "source_size": {"w": src_w, "h": src_h},
+            "pivot": {
+                "x": round((pivot[0] * src_w - offset_x) / rect["w"], 6),
+                "y": round((pivot[1] * src_h - offset_y) / rect["h"], 6),
+            },
+            "alias_of": original,
+        }
 
     metadata = {
         "project_id": project_id,
         "run_id": run_id,
+        "layout": layout,
+        "padding": padding,
+        "max_size": max_size,
+        "power_of_two": power_of_two,
+        "image_format": image_format,
         "frame_width": w,
         "frame_height": h,
-        "num_frames": len(images),
+        "num_frames": len(frames),
+        "unique_frames": len(unique),
         "frames": frames,
-        "sheet_path": sheet_path,
+        "sheet_path": page_meta[0]["path"],
+        "pages": page_meta,
+        "sprites": sprites,
+        "memory": {
+            # page being rendered + page being encoded + decode window
+            "sheet_bytes": sheet_bytes,
+            "peak_frame_bytes": peak_frame_bytes,
+            "decode_window": decode_window,
+            "peak_bytes": 2 * sheet_bytes + decode_window * peak_frame_bytes,
+            "prepass_batch_bytes": prepass_bytes,
+            "process_peak_rss_before": rss_before,
+            "process_peak_rss_after": _peak_rss_bytes(),
+        },
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -52,6 +268,7 @@ def assemble_spritesheet(project_id: str, frames: list, stride: int = 1):
 
     return {
         "status": "success",
-        "sheet": sheet_path,
+        "sheet": page_meta[0]["path"],
+        "pages": [p["path"] for p in page_meta],
         "metadata": metadata
     }
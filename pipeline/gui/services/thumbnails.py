@@ -0,0 +1,169 @@
+# services/thumbnails.py
+"""
+SpriteForge – Thumbnail Cache
+-----------------------------
+Small WebP previews of frames, sheets and references so the GUI does not
+download full-resolution PNGs to draw a 60px strip.
+
+- requested sizes snap up to a fixed bucket (THUMBNAIL_BUCKETS), so a
+  handful of variants per image cover every widget
+- thumbnails live in a DiskLRUCache keyed by source path, mtime, file
+  size and bucket; editing a frame naturally misses
+- prewarm_directory() renders a whole frames directory through the image
+  pool as a background job (its own queue, not the render queue)
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from services.disk_cache import CACHE_ROOT, DiskLRUCache
+from services.image_pool import derive_images, derive_images_many
+
+THUMBNAIL_CACHE_DIR = os.path.join(CACHE_ROOT, "thumbnails")
+THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(512 * 1024 ** 2)))
+THUMBNAIL_BUCKETS = sorted(int(s) for s in os.getenv("THUMBNAIL_BUCKETS", "64,128,256,512").split(","))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+# Bump when the encoding settings change
+THUMBNAIL_VERSION = "1"
+
+_cache: Optional[DiskLRUCache] = None
+_cache_lock = threading.Lock()
+
+# key → [lock, holders + waiters], so concurrent requests for one thumbnail
+# render it once; dropped when the last one leaves
+_key_locks: Dict[str, list] = {}
+_key_locks_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> DiskLRUCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskLRUCache("thumbnails", THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES)
+        return _cache
+
+
+def bucket_for(size: int) -> int:
+    """Smallest bucket that is at least `size` (the largest bucket caps it)."""
+    for bucket in THUMBNAIL_BUCKETS:
+        if bucket >= size:
+            return bucket
+    return THUMBNAIL_BUCKETS[-1]
+
+
+def thumbnail_key(path: str, bucket: int) -> str:
+    st = os.stat(path)
+    identity = f"{os.path.realpath(path)}:{st.st_mtime_ns}:{st.st_size}:{bucket}:{THUMBNAIL_VERSION}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def _output(key: str, bucket: int) -> tuple:
+    dst = get_thumbnail_cache().entry_path(key) + ".webp"
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    return (dst, bucket, "WEBP", {"quality": THUMBNAIL_QUALITY, "method": 4})
+
+
+@contextmanager
+def _key_lock(key: str):
+    with _key_locks_lock:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _key_locks.pop(key, None)
+
+
+def get_thumbnail(path: str, size: int) -> str:
+    """
+    Path of a cached WebP thumbnail of `path` whose longest side fits the
+    bucket for `size`, rendering it on a miss. Images smaller than the
+    bucket are re-encoded, never upscaled.
+    """
+    bucket = bucket_for(size)
+    key = thumbnail_key(path, bucket)
+    cache = get_thumbnail_cache()
+
+    entry = cache.get(key)
+    if entry is not None:
+        return entry["path"]
+
+    with _key_lock(key):
+        # Another request may have rendered it while we waited
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["path"]
+
+        dst = _output(key, bucket)
+        derive_images(path, [dst])
+        cache.put(key, dst[0], {"source": path, "bucket": bucket})
+
+    return dst[0]
+
+
+def list_images(directory: str) -> List[str]:
+    return sorted(
+        entry.path for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def prewarm_directory(job, directory: str, sizes: List[int]) -> Dict:
+    """
+    Job function: renders every missing thumbnail for the images in
+    `directory` at each of `sizes`, fanned out over the image pool.
+    """
+    cache = get_thumbnail_cache()
+    buckets = sorted({bucket_for(s) for s in sizes})
+    images = list_images(directory)
+
+    # One decode per image covers every missing bucket
+    todo = []
+    cached = 0
+    for path in images:
+        outputs = []
+        for bucket in buckets:
+            key = thumbnail_key(path, bucket)
+            if not cache.contains(key):
+                outputs.append((key, _output(key, bucket)))
+            else:
+                cached += 1
+        if outputs:
+            todo.append((path, outputs))
+
+    job.progress = {"images": len(images), "done": len(images) - len(todo), "cached": cached}
+    rendered = 0
+    errors = []
+
+    items = ((path, [dst for _, dst in outputs]) for path, outputs in todo)
+    for (path, outputs), result in zip(todo, derive_images_many(items)):
+        if isinstance(result, Exception):
+            errors.append({"path": path, "message": str(result)})
+        else:
+            for key, dst in outputs:
+                cache.put(key, dst[0], {"source": path, "bucket": dst[1]})
+                rendered += 1
+        job.progress["done"] += 1
+        job.emit("progress", dict(job.progress))
+
+    logging.info(f"[Thumbnails] Prewarmed {directory}: {rendered} rendered, {cached} cached, {len(errors)} errors")
+    return {
+        "status": "success",
+        "directory": directory,
+        "images": len(images),
+        "buckets": buckets,
+        "rendered": rendered,
+        "cached": cached,
+        "errors": errors,
+    }
@@ -0,0 +1,228 @@
+# services/uploads.py
+"""
+SpriteForge – Chunked, Resumable Uploads
+----------------------------------------
+Multi-GB model / asset uploads in pieces, so a network hiccup costs one
+chunk instead of the whole transfer:
+
+  init      → upload id; data is written straight into
+              <dest dir>/.upload-<id>.part (same filesystem as the target,
+              no spooled copy, no doubled disk use)
+  chunk     → bytes at an offset, verified against the chunk's SHA-256;
+              offsets must continue where the upload stands, replays of
+              data already received are acknowledged and ignored
+  status    → current offset, to resume after a failure or restart
+  complete  → all bytes present, whole-file SHA-256 checked against the
+              one given at init (if any), then os.replace() onto the
+              destination
+
+Upload state lives in UPLOAD_STATE_DIR as one JSON file per upload, so
+resumes survive a server restart. Uploads idle for UPLOAD_EXPIRY_HOURS
+are removed.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from services.disk_cache import CACHE_ROOT
+
+UPLOAD_STATE_DIR = os.getenv("UPLOAD_STATE_DIR", os.path.join(CACHE_ROOT, "uploads"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(16 * 1024 ** 2)))
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", str(64 * 1024 ** 2)))
+UPLOAD_EXPIRY_HOURS = float(os.getenv("UPLOAD_EXPIRY_HOURS", "48"))
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """Carries the HTTP status the endpoints should answer with."""
+
+    def __init__(self, message: str, status: int = 400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.extra = extra
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"status": "error", "message": self.message, **self.extra}
+
+
+def _lock(upload_id: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _state_path(upload_id: str) -> str:
+    if not upload_id or not all(c in "0123456789abcdef" for c in upload_id):
+        raise UploadError("Unknown upload", 404)
+    return os.path.join(UPLOAD_STATE_DIR, f"{upload_id}.json")
+
+
+def _load(upload_id: str) -> Dict[str, Any]:
+    try:
+        with open(_state_path(upload_id), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise UploadError("Unknown upload", 404)
+
+
+def _save(state: Dict[str, Any]):
+    state["updated"] = time.time()
+    path = _state_path(state["upload_id"])
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _remove(state: Dict[str, Any], keep_part: bool = False):
+    for path in ([] if keep_part else [state["part"]]) + [_state_path(state["upload_id"])]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    with _locks_lock:
+        _locks.pop(state["upload_id"], None)
+
+
+def _public(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "upload_id": state["upload_id"],
+        "filename": os.path.basename(state["dest"]),
+        "size": state["size"],
+        "offset": state["offset"],
+        "chunk_size": state["chunk_size"],
+        "complete": state["offset"] >= state["size"],
+    }
+
+
+def purge_expired():
+    if not os.path.isdir(UPLOAD_STATE_DIR):
+        return
+    cutoff = time.time() - UPLOAD_EXPIRY_HOURS * 3600
+    for name in os.listdir(UPLOAD_STATE_DIR):
+        if not name.endswith(".json"):
+            continue
+        try:
+            state = _load(name[:-5])
+        except (UploadError, ValueError, OSError):
+            continue
+        if state.get("updated", 0) < cutoff:
+            logging.info(f"[Uploads] Expiring stale upload {state['upload_id']} → {state['dest']}")
+            _remove(state)
+
+
+def init_upload(dest: str, size: int, sha256: Optional[str] = None, overwrite: bool = False) -> Dict[str, Any]:
+    """
+    Starts an upload to the absolute path `dest` (already validated by the
+    caller). Returns the upload's status with its id.
+    """
+    if not isinstance(size, int) or size < 0:
+        raise UploadError("'size' must be a non-negative integer")
+    if os.path.exists(dest) and not overwrite:
+        raise UploadError(f"{os.path.basename(dest)} already exists", 409)
+
+    purge_expired()
+    os.makedirs(UPLOAD_STATE_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+    upload_id = uuid.uuid4().hex
+    state = {
+        "upload_id": upload_id,
+        "dest": dest,
+        "part": os.path.join(os.path.dirname(dest), f".upload-{upload_id}.part"),
+        "size": size,
+        "sha256": sha256.lower() if sha256 else None,
+        "offset": 0,
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+        "created": time.time(),
+    }
+    open(state["part"], "wb").close()
+    _save(state)
+
+    logging.info(f"[Uploads] Started {upload_id}: {dest} ({size} bytes)")
+    return _public(state)
+
+
+def upload_status(upload_id: str) -> Dict[str, Any]:
+    return _public(_load(upload_id))
+
+
+def write_chunk(upload_id: str, offset: int, data: bytes, sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Writes `data` at `offset`. The offset must be the upload's current
+    offset (409 with the expected offset otherwise); a chunk that only
+    repeats bytes already received is acknowledged without writing.
+    """
+    if len(data) > UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f"Chunks are limited to {UPLOAD_MAX_CHUNK_SIZE} bytes", 413)
+    if sha256 and hashlib.sha256(data).hexdigest() != sha256.lower():
+        raise UploadError("Chunk checksum mismatch", 400)
+
+    with _lock(upload_id):
+        state = _load(upload_id)
+
+        if offset + len(data) <= state["offset"]:
+            return _public(state)
+        if offset != state["offset"]:
+            raise UploadError("Offset does not match the upload", 409, offset=state["offset"])
+        if offset + len(data) > state["size"]:
+            raise UploadError("Chunk runs past the declared size", 400, offset=state["offset"])
+
+        with open(state["part"], "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        state["offset"] = offset + len(data)
+        _save(state)
+        return _public(state)
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(4 * 1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def complete_upload(upload_id: str) -> Dict[str, Any]:
+    """Verifies the assembled file and atomically moves it into place."""
+    with _lock(upload_id):
+        state = _load(upload_id)
+        if state["offset"] != state["size"] or os.path.getsize(state["part"]) != state["size"]:
+            raise UploadError("Upload is incomplete", 409, offset=state["offset"])
+
+        digest = _file_sha256(state["part"])
+        if state["sha256"] and digest != state["sha256"]:
+            _remove(state)
+            raise UploadError("File checksum mismatch; upload discarded", 422)
+
+        os.replace(state["part"], state["dest"])
+        _remove(state, keep_part=True)
+
+    logging.info(f"[Uploads] Completed {upload_id}: {state['dest']}")
+    return {
+        "status": "success",
+        "path": state["dest"],
+        "filename": os.path.basename(state["dest"]),
+        "size": state["size"],
+        "sha256": digest,
+    }
+
+
+def abort_upload(upload_id: str) -> Dict[str, Any]:
+    with _lock(upload_id):
+        state = _load(upload_id)
+        _remove(state)
+    logging.info(f"[Uploads] Aborted {upload_id}")
+    return {"status": "success", "upload_id": upload_id}
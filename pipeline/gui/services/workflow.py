@@ -5,6 +5,7 @@ import logging
 from typing import Optional, Dict, Any
 
 from services.comfyui import generate_sprites
+from services.render_cache import render_cache_key, lookup_render, store_render
 
 PROJECT_ROOT = "/workspace/pipeline/projects"
 
@@ -66,15 +67,60 @@ def validate_workflow_graph(graph: Dict[str, Any]):
     return True, "ok"
 
 
-def run_workflow(project_id: str, workflow_type: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+def run_workflow(project_id: str, workflow_type: str, inputs: Dict[str, Any], on_event=None) -> Dict[str, Any]:
     graph = load_workflow(project_id, workflow_type)
     if graph is None:
         return {"status": "error", "message": "Workflow not found"}
 
     if workflow_type == "sprite":
-        return generate_sprites(graph, inputs)
+        return _run_sprite_workflow(graph, inputs, on_event=on_event)
 
     return {
         "status": "error",
         "message": f"Workflow type '{workflow_type}' is not runnable yet"
     }
+
+
+def _run_sprite_workflow(graph: Dict[str, Any], inputs: Dict[str, Any], on_event=None) -> Dict[str, Any]:
+    """
+    Serves identical renders from the render cache. inputs["no_cache"]
+    forces a fresh render (the result still refreshes the cache).
+    """
+    try:
+        key = render_cache_key(graph, inputs)
+    except Exception as e:
+        logging.error(f"[Workflow] Could not build render cache key: {e}")
+        key = None
+
+    if key and not inputs.get("no_cache"):
+        cached = lookup_render(key)
+        if cached:
+            if on_event:
+                on_event("cache_hit", {"cache_key": key, "prompt_id": cached.get("prompt_id")})
+            return cached
+
+    result = generate_sprites(graph, inputs, on_event=on_event)
+
+    if key and result.get("status") == "success":
+        result["cached"] = False
+        result["cache_key"] = key
+        store_render(key, result)
+
+    return result
+
+
+def run_workflow_job(job, project_id: str, workflow_type: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Job-queue entry point: runs the workflow and mirrors ComfyUI execution
+    events into the job's event stream.
+    """
+    def on_event(event_type: str, data: Dict[str, Any]):
+        if event_type == "progress":
+            job.progress = {
+                "value": data.get("value"),
+                "max": data.get("max"),
+                "node": data.get("node"),
+            }
+        job.emit(event_type, data)
+
+    return run_workflow(project_id, workflow_type, inputs, on_event=on_event)
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# The GUI imports its packages as top-level `services` / `api`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Caches are created under CACHE_ROOT at import time; keep them out of /workspace
+os.environ.setdefault("SPRITEFORGE_CACHE_ROOT", tempfile.mkdtemp(prefix="spriteforge-tests-"))
@@ -0,0 +1,18 @@
+"""Warm-worker adapter stub: counts model loads, records the serving pid."""
+import os
+
+LOADS = 0
+
+
+def load_model():
+    global LOADS
+    LOADS += 1
+    return {"loaded": LOADS}
+
+
+def run_inference(model, prompt_path, skeleton, output_dir, seed):
+    os.makedirs(os.path.join(output_dir, "frames"), exist_ok=True)
+    with open(os.path.join(output_dir, "frames", "0000.png"), "wb") as f:
+        f.write(b"png")
+    with open(os.path.join(output_dir, "worker.txt"), "w") as f:
+        f.write(f"{os.getpid()} {model['loaded']} {seed}")
@@ -0,0 +1,14 @@
+"""CLI-only inference stub: no load_model / run_inference, parses argv at import."""
+import os
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--prompt", required=True)
+parser.add_argument("--skeleton")
+parser.add_argument("--output", required=True)
+parser.add_argument("--seed")
+args = parser.parse_args()
+
+os.makedirs(os.path.join(args.output, "frames"), exist_ok=True)
+with open(os.path.join(args.output, "oneshot.txt"), "w") as f:
+    f.write(str(os.getpid()))
@@ -0,0 +1,212 @@
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import comfyui, comfyui_events
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class FakeComfyUI:
+    """/prompt, /history/<id> and a bare-bones /ws that pushes text frames."""
+
+    def __init__(self):
+        self.history = {}
+        self.ws_enabled = True
+        self.clients = []
+        self.lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                self._json(200, {"prompt_id": uuid.uuid4().hex})
+
+            def do_GET(self):
+                if self.path.startswith("/history/"):
+                    prompt_id = self.path.rsplit("/", 1)[1]
+                    entry = fake.history.get(prompt_id)
+                    self._json(200, {prompt_id: entry} if entry else {})
+                elif self.path.startswith("/ws") and fake.ws_enabled:
+                    self._upgrade()
+                else:
+                    self._json(503, {})
+
+            def _upgrade(self):
+                accept = base64.b64encode(
+                    hashlib.sha1((self.headers["Sec-WebSocket-Key"] + WS_GUID).encode()).digest()
+                ).decode()
+                # Registered before the handshake completes, so drop() right
+                # after the client sees the connection always reaches it
+                with fake.lock:
+                    fake.clients.append(self.connection)
+                self.send_response(101)
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                self.wfile.flush()
+
+                # Hold the connection until the client or drop() closes it
+                try:
+                    while True:
+                        frame = self.connection.recv(1024)
+                        if not frame:
+                            break
+                        if frame[0] & 0x0F == 0x8:  # close: echo it back
+                            self.connection.sendall(b"\x88\x00")
+                            break
+                except OSError:
+                    pass
+                with fake.lock:
+                    if self.connection in fake.clients:
+                        fake.clients.remove(self.connection)
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def send(self, event_type, **data):
+        payload = json.dumps({"type": event_type, "data": data}).encode()
+        header = bytes([0x81, len(payload)]) if len(payload) < 126 else \
+            bytes([0x81, 126]) + struct.pack(">H", len(payload))
+        with self.lock:
+            for conn in self.clients:
+                conn.sendall(header + payload)
+
+    def finish(self, prompt_id, event=True):
+        self.history[prompt_id] = {"status": {"status_str": "success", "completed": True}, "outputs": {}}
+        if event:
+            self.send("execution_success", prompt_id=prompt_id)
+
+    def drop(self):
+        with self.lock:
+            clients, self.clients = self.clients, []
+        for conn in clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        self.drop()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def comfy(monkeypatch):
+    fake = FakeComfyUI()
+    monkeypatch.setattr(comfyui, "COMFYUI_URL", fake.url)
+    listener = comfyui_events.get_event_listener(fake.url)
+    assert listener.wait_connected(5)
+    yield fake, listener
+    listener.stop()
+    comfyui_events._listener = None
+    fake.close()
+
+
+def _wait_in_thread(prompt_id):
+    box = {}
+
+    def run():
+        start = time.monotonic()
+        box["result"] = comfyui.wait_for_result(prompt_id, timeout=20)
+        box["elapsed"] = time.monotonic() - start
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, box
+
+
+def _submit():
+    prompt_id = comfyui.trigger_workflow({}, {})
+    assert prompt_id
+    return prompt_id
+
+
+def test_completes_on_the_terminal_event(comfy, monkeypatch):
+    fake, listener = comfy
+    monkeypatch.setattr(comfyui, "POLL_MAX_INTERVAL", 30.0)
+    prompt_id = _submit()
+
+    thread, box = _wait_in_thread(prompt_id)
+    time.sleep(0.3)
+    fake.finish(prompt_id)
+    thread.join(10)
+
+    assert box["result"]["status"]["completed"]
+    assert box["elapsed"] < 2  # woken by the event, not the 30s poll
+
+
+def test_lost_terminal_event_is_recovered_by_history_poll(comfy, monkeypatch):
+    fake, listener = comfy
+    monkeypatch.setattr(comfyui, "POLL_MAX_INTERVAL", 0.5)
+    prompt_id = _submit()
+
+    thread, box = _wait_in_thread(prompt_id)
+    time.sleep(0.2)
+    fake.finish(prompt_id, event=False)
+    thread.join(10)
+
+    assert box["result"]["status"]["completed"]
+    assert box["elapsed"] < 2
+
+
+def test_socket_down_polls_then_reconnects(comfy, monkeypatch):
+    fake, listener = comfy
+    monkeypatch.setattr(comfyui, "POLL_MAX_INTERVAL", 30.0)
+    generation = listener.generation
+
+    # Socket down: the prompt finishes unseen and is found by backoff polling
+    fake.ws_enabled = False
+    fake.drop()
+    deadline = time.monotonic() + 5
+    while listener.connected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not listener.connected
+
+    prompt_id = _submit()
+    thread, box = _wait_in_thread(prompt_id)
+    time.sleep(0.3)
+    fake.finish(prompt_id, event=False)
+    thread.join(10)
+    assert box["result"]["status"]["completed"]
+    assert box["elapsed"] < 3
+
+    # Back up: the listener reconnects and events wake waiters again
+    fake.ws_enabled = True
+    assert listener.wait_connected(10)
+    assert listener.generation == generation + 1
+
+    prompt_id = _submit()
+    thread, box = _wait_in_thread(prompt_id)
+    time.sleep(0.3)
+    fake.finish(prompt_id)
+    thread.join(10)
+    assert box["result"]["status"]["completed"]
+    assert box["elapsed"] < 2
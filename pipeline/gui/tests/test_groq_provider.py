@@ -0,0 +1,128 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.ai import groq_provider
+from services.ai.rate_limit import RateLimiter
+
+
+class FakeGroq(BaseHTTPRequestHandler):
+    """Streams {"ok": true} as SSE; answers 429 while `throttle` > 0."""
+
+    throttle = 0
+    retry_after = "0.3"
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append((time.monotonic(), body))
+
+        if type(self).throttle > 0:
+            type(self).throttle -= 1
+            self.send_response(429)
+            self.send_header("Retry-After", self.retry_after)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"error": {"message": "rate limited"}}')
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for piece in ('{"ok"', ": true}"):
+            chunk = {"choices": [{"delta": {"content": piece}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def groq(monkeypatch):
+    FakeGroq.throttle = 0
+    FakeGroq.requests = []
+    FakeGroq.retry_after = "0.3"
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGroq)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    limiter = RateLimiter(rpm=120, tpm=6000, queue_timeout=10)
+    monkeypatch.setattr(groq_provider, "GROQ_URL", f"http://127.0.0.1:{server.server_port}/chat/completions")
+    monkeypatch.setattr(groq_provider, "GROQ_KEY", "test")
+    monkeypatch.setattr(groq_provider, "GROQ_STREAM", True)
+    monkeypatch.setattr(groq_provider, "GROQ_COMPLETION_TOKENS", 100)
+    monkeypatch.setattr(groq_provider, "limiter", limiter)
+    yield limiter
+    server.shutdown()
+    server.server_close()
+
+
+PAYLOAD = {"task": "test", "input": {"prompt": "hello"}}
+
+
+def test_streamed_call_settles_on_estimates(groq):
+    assert groq_provider.call_groq("test", PAYLOAD) == {"ok": True}
+
+    prompt_tokens = groq_provider.estimate_tokens(groq_provider.serialize_payload(PAYLOAD))
+    used = groq.tokens.capacity - groq.stats()["tokens_available"]
+    # Prompt plus the ~3 tokens streamed, not the 100 reserved for completion
+    assert prompt_tokens <= used <= prompt_tokens + 5
+
+
+def test_requests_queue_for_rpm(groq):
+    groq.requests.level = 0  # 120 rpm refills one request every 0.5s
+
+    start = time.monotonic()
+    for _ in range(2):
+        assert groq_provider.call_groq("test", PAYLOAD) == {"ok": True}
+
+    assert time.monotonic() - start >= 0.9
+    assert groq.stats()["admitted"] == 2
+    assert groq.max_wait >= 0.4
+
+
+def test_requests_queue_for_tpm(groq):
+    groq.tokens.level = 0  # 6000 tpm refills 100 tokens/s
+
+    assert groq_provider.call_groq("test", PAYLOAD) == {"ok": True}
+
+    reserved = groq_provider.estimate_tokens(groq_provider.serialize_payload(PAYLOAD)) + 100
+    assert groq.max_wait >= reserved / 100 - 0.1
+
+
+def test_429_waits_for_retry_after_then_succeeds(groq):
+    FakeGroq.throttle = 1
+
+    assert groq_provider.call_groq("test", PAYLOAD) == {"ok": True}
+
+    (first, _), (second, _) = FakeGroq.requests
+    assert second - first >= 0.3
+    assert groq.stats()["throttled_429"] == 1
+
+
+def test_final_429_is_an_error(groq, monkeypatch):
+    monkeypatch.setattr(groq_provider, "GROQ_MAX_THROTTLE_RETRIES", 1)
+    FakeGroq.retry_after = "0.1"
+    FakeGroq.throttle = 5
+
+    result = groq_provider.call_groq("test", PAYLOAD)
+
+    assert result["status"] == "error"
+    assert len(FakeGroq.requests) == 2
+
+
+def test_unreachable_groq_refunds_its_reservation(groq, monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    monkeypatch.setattr(groq_provider, "GROQ_URL", f"http://127.0.0.1:{port}/chat/completions")
+
+    result = groq_provider.call_groq("test", PAYLOAD)
+
+    assert result["status"] == "error"
+    assert groq.stats()["tokens_available"] == groq.tokens.capacity
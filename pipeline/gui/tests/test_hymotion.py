@@ -0,0 +1,91 @@
+import os
+import sys
+
+import pytest
+
+from services import hymotion
+
+STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs")
+
+
+@pytest.fixture
+def motion(monkeypatch, tmp_path):
+    monkeypatch.setattr(hymotion, "OUTPUT_ROOT", str(tmp_path))
+    monkeypatch.setattr(hymotion, "HY_MOTION_PYTHON", sys.executable)
+    monkeypatch.setattr(hymotion, "HY_MOTION_WORKERS", 1)
+    monkeypatch.setattr(hymotion, "_warm", None)
+    monkeypatch.setattr(hymotion, "_pool", None)
+    yield hymotion
+    if hymotion._pool is not None:
+        while not hymotion._pool._idle.empty():
+            hymotion._pool._idle.get().stop()
+
+
+def _oneshot_calls(monkeypatch):
+    calls = []
+    real = hymotion._run_oneshot
+
+    def record(*args):
+        calls.append(args)
+        return real(*args)
+
+    monkeypatch.setattr(hymotion, "_run_oneshot", record)
+    return calls
+
+
+def test_two_jobs_share_one_warm_worker(motion, monkeypatch):
+    monkeypatch.setattr(motion, "HY_MOTION_ADAPTER", os.path.join(STUBS, "hymotion_adapter_stub.py"))
+    calls = _oneshot_calls(monkeypatch)
+
+    served = []
+    for _ in range(2):
+        result = motion.generate_motion("walk cycle", seed=None)
+        assert result["status"] == "success"
+        with open(os.path.join(result["output_dir"], "worker.txt")) as f:
+            served.append(f.read().split()[:2])
+
+    assert served[0][0] == served[1][0] != str(os.getpid())
+    assert served[0][1] == served[1][1] == "1"  # model loaded once
+    assert calls == []
+
+
+def test_missing_entry_points_run_oneshot(motion, monkeypatch):
+    cli = os.path.join(STUBS, "hymotion_cli_stub.py")
+    monkeypatch.setattr(motion, "HY_MOTION_ADAPTER", cli)
+    monkeypatch.setattr(motion, "HY_MOTION_INFERENCE", cli)
+    calls = _oneshot_calls(monkeypatch)
+
+    result = motion.generate_motion("walk cycle", seed=None)
+
+    assert result["status"] == "success"
+    assert len(calls) == 1
+    assert os.path.exists(os.path.join(result["output_dir"], "oneshot.txt"))
+    assert motion._pool is None
+
+
+def test_default_adapter_falls_back_for_cli_script(motion, monkeypatch):
+    cli = os.path.join(STUBS, "hymotion_cli_stub.py")
+    monkeypatch.setattr(motion, "HY_MOTION_INFERENCE", cli)
+    calls = _oneshot_calls(monkeypatch)
+
+    for _ in range(2):
+        assert motion.generate_motion("walk cycle", seed=None)["status"] == "success"
+
+    # The worker reported the script unsupported once; later requests skip it
+    assert len(calls) == 2
+    assert motion._warm is False
+
+
+def test_default_adapter_keeps_script_model_warm(motion, monkeypatch):
+    monkeypatch.setattr(motion, "HY_MOTION_INFERENCE", os.path.join(STUBS, "hymotion_adapter_stub.py"))
+    calls = _oneshot_calls(monkeypatch)
+
+    served = []
+    for _ in range(2):
+        result = motion.generate_motion("walk cycle", seed=None)
+        with open(os.path.join(result["output_dir"], "worker.txt")) as f:
+            served.append(f.read().split()[:2])
+
+    assert served[0] == served[1]
+    assert served[0][1] == "1"
+    assert calls == []
@@ -0,0 +1,45 @@
+from services.ai import prompt_builder
+from services.ai.prompt_builder import (
+    MIN_DESCRIPTION_CHARS,
+    _fit_budget,
+    build_sprite_suggest_prompt,
+    estimate_tokens,
+    serialize_payload,
+)
+
+
+def _descriptions(count, length=90):
+    return [{"subject": f"{i:04d} " + "x" * (length - 5), "style": "y" * length} for i in range(count)]
+
+
+def test_over_budget_descriptions_fit():
+    payload = {"task": "sprite_suggest", "input": {"reference_descriptions": _descriptions(300)}}
+
+    truncated, fitted = _fit_budget(payload, 500)
+
+    assert truncated and fitted
+    assert estimate_tokens(serialize_payload(payload)) <= 500
+    for desc in payload["input"]["reference_descriptions"]:
+        assert all(len(v) <= MIN_DESCRIPTION_CHARS for v in desc.values())
+
+
+def test_unfittable_payload_finishes_unfitted():
+    payload = {
+        "task": "sprite_suggest",
+        "input": {"user_prompt": "z" * 20000, "reference_descriptions": _descriptions(10)},
+    }
+
+    truncated, fitted = _fit_budget(payload, 100)
+
+    assert truncated and not fitted
+    assert payload["input"]["reference_descriptions"] == []
+    assert payload["input"]["user_prompt"] == "z" * 20000
+
+
+def test_sprite_suggest_prompt_terminates(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "AI_COMPACT_PROMPTS", True)
+
+    payload = build_sprite_suggest_prompt("a knight", {"style": "pixel"}, _descriptions(300))
+
+    budget = prompt_builder.TASK_TOKEN_BUDGETS.get("sprite_suggest", prompt_builder.AI_PROMPT_TOKEN_BUDGET)
+    assert estimate_tokens(serialize_payload(payload)) <= budget
@@ -0,0 +1,82 @@
+import shutil
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from services import reference_descriptor as rd
+from services.disk_cache import DiskLRUCache
+
+
+@pytest.fixture
+def fake_backend(monkeypatch, tmp_path):
+    cache = DiskLRUCache("reference-test", str(tmp_path / "cache"), 16 * 1024 ** 2)
+    monkeypatch.setattr(rd, "_cache", cache)
+
+    calls = []
+    active = [0, 0]  # current, peak
+    lock = threading.Lock()
+
+    def describe(path):
+        with lock:
+            calls.append(path)
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.2)
+        try:
+            return rd.describe_fake(path)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setitem(rd.VISION_BACKENDS, "fake", describe)
+    return calls, active
+
+
+def _images(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"ref{i}.png"
+        Image.new("RGBA", (32, 48), (40 * i, 255 - 30 * i, 90, 255)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_misses_are_described_in_parallel_within_the_pool(fake_backend, tmp_path):
+    calls, active = fake_backend
+    paths = _images(tmp_path, rd.REFERENCE_DESCRIBE_WORKERS + 2)
+
+    results = rd.describe_reference_images(paths, backend="fake")
+
+    assert len(calls) == len(paths)
+    assert not any(r["cached"] for r in results)
+    assert 1 < active[1] <= rd.REFERENCE_DESCRIBE_WORKERS
+
+
+def test_cache_hits_by_content_hash(fake_backend, tmp_path):
+    calls, _ = fake_backend
+    paths = _images(tmp_path, 3)
+    first = rd.describe_reference_images(paths, backend="fake")
+
+    # Same pixels under new names, plus a duplicate within one request
+    renamed = []
+    for i, path in enumerate(paths):
+        renamed.append(shutil.copy(path, tmp_path / f"renamed{i}.png"))
+    second = rd.describe_reference_images(renamed + [renamed[0]], backend="fake")
+
+    assert len(calls) == 3
+    assert all(r["cached"] for r in second)
+    assert [r["palette"] for r in second[:3]] == [r["palette"] for r in first]
+    assert second[3]["hash"] == second[0]["hash"]
+
+
+def test_hash_memo_is_bounded(monkeypatch, tmp_path):
+    monkeypatch.setattr(rd, "REFERENCE_HASH_MEMO_ENTRIES", 2)
+    monkeypatch.setattr(rd, "_hash_memo", rd.OrderedDict())
+    paths = _images(tmp_path, 3)
+
+    for path in paths:
+        rd.file_sha256(path)
+
+    assert [key[0] for key in rd._hash_memo] == paths[1:]
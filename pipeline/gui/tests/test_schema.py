@@ -0,0 +1,23 @@
+from services.ai.prompt_builder import build_motion_refine_prompt
+from services.ai.schema import conform
+
+MOTION = {"overall": "slow walk", "segments": [{"start": 0, "end": 1.5, "description": "step"}]}
+
+
+def test_missing_placeholder_fields_are_filled():
+    payload = {"expected_output": {"motion": {"overall": "string", "tags": ["string"], "speed": "number"}}}
+
+    result, outcome = conform({"motion": {"overall": "run", "speed": "1.5"}}, payload)
+
+    assert outcome == "repaired"
+    assert result == {"motion": {"overall": "run", "tags": [], "speed": 1.5}}
+
+
+def test_missing_refine_fields_are_not_copied_from_the_input():
+    payload = build_motion_refine_prompt("make it faster", MOTION)
+
+    result, outcome = conform({"motion": {"overall": "fast walk"}}, payload)
+
+    assert outcome == "invalid"
+    assert result["status"] == "error"
+    assert "$.motion.segments: missing" in result["errors"]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sprite sheet assembly throughput vs. image pool size.
+
+Generates a synthetic clip (300 RGBA frames, 512px by default), then
+assembles it with 1, 2, 4, ... image workers and prints frames/second
+and speed-up over the single-worker run.
+
+    python pipeline/scripts/bench_image_pool.py [--frames 300] [--size 512]
+        [--layout packed] [--format png] [--workers 1,2,4,8]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gui"))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from services import spritesheet  # noqa: E402
+from services.image_pool import set_image_workers  # noqa: E402
+
+
+def make_clip(directory: str, count: int, size: int) -> list:
+    paths = []
+    for i in range(count):
+        img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        # A figure that moves and changes shape so frames differ and compress realistically
+        cx = size // 2 + int((size // 5) * ((i % 40) / 20 - 1))
+        draw.ellipse((cx - size // 8, size // 6, cx + size // 8, size // 6 + size // 4), fill=(230, 180, 140, 255))
+        draw.rectangle((cx - size // 6, size // 2 - size // 12, cx + size // 6, size - size // 6 - (i % 7)),
+                       fill=(40 + i % 200, 90, 160, 255))
+        for k in range(0, size, 16):
+            draw.line((k, size - 8, k + (i % 16), size - 1), fill=(20, 20, 20, 200))
+        path = os.path.join(directory, f"frame_{i:04d}.png")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--layout", default="packed", choices=spritesheet.LAYOUTS)
+    parser.add_argument("--format", default="png", choices=sorted(spritesheet.IMAGE_FORMATS))
+    parser.add_argument("--workers", default=None,
+                        help="comma-separated worker counts (default: powers of two up to CPU count)")
+    args = parser.parse_args()
+
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(",")]
+    else:
+        cpus = os.cpu_count() or 1
+        counts, n = [], 1
+        while n < cpus:
+            counts.append(n)
+            n *= 2
+        counts.append(cpus)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Generating {args.frames} frames of {args.size}px ...")
+        frames_dir = os.path.join(tmp, "frames")
+        os.makedirs(frames_dir)
+        frames = make_clip(frames_dir, args.frames, args.size)
+        spritesheet.PROJECT_ROOT = os.path.join(tmp, "projects")
+
+        print(f"{'workers':>8} {'seconds':>9} {'frames/s':>9} {'speed-up':>9} {'pages':>6}")
+        baseline = None
+        for workers in counts:
+            set_image_workers(workers)
+            # Warm the pool so process start-up is not timed
+            spritesheet.assemble_spritesheet("bench", frames[:workers * 2], layout=args.layout,
+                                             image_format=args.format)
+
+            start = time.perf_counter()
+            result = spritesheet.assemble_spritesheet("bench", frames, layout=args.layout,
+                                                      image_format=args.format)
+            elapsed = time.perf_counter() - start
+
+            if result["status"] != "success":
+                print(f"{workers:>8} failed: {result.get('message')}")
+                continue
+
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.frames / elapsed:>9.1f} "
+                  f"{baseline / elapsed:>8.2f}x {len(result['pages']):>6}")
+
+        set_image_workers(1)
+
+
+if __name__ == "__main__":
+    main()